@@ -9,12 +9,13 @@ from peaq.utils import calculate_multi_sig
 import random
 from tools.utils import show_account
 from tools.utils import send_proposal, send_approval, get_as_multi_extrinsic_id
-from tools.block_creation_utils import get_block_creation_times
+from tools.block_creation_utils import get_block_time_stats
 
 THRESHOLD = 2
 BLOCK_TRAVERSE = 20
 BLOCK_CREATION_MS = 12000
 BLOCK_TOLERATE_PERCENTAGE = 10
+BLOCK_TAIL_TOLERATE_SLOT = 3
 
 
 @given('Use the Alice keypair')
@@ -88,7 +89,8 @@ def check_token_back_to_bob(context):
 
 @when('Get all block creation time')
 def get_block_creation_time(context):
-    context._ave_time = get_block_creation_times(context._substrate, BLOCK_TRAVERSE)
+    context._block_time_stats = get_block_time_stats(context._substrate, BLOCK_TRAVERSE, BLOCK_CREATION_MS)
+    context._ave_time = context._block_time_stats['mean']
 
 
 @then('Check block create time')
@@ -97,4 +99,7 @@ def check_block_creation_time(context):
     if abs(context._ave_time - BLOCK_CREATION_MS) / float(BLOCK_CREATION_MS) * 100. > BLOCK_TOLERATE_PERCENTAGE:
         print(f'The average block time {ave_time} is longer than the tolerate rate {BLOCK_TOLERATE_PERCENTAGE} * {BLOCK_CREATION_MS}')
         assert f'Check the average block creation time {ave_time}'
+    max_time = context._block_time_stats['max']
+    assert max_time <= BLOCK_CREATION_MS * BLOCK_TAIL_TOLERATE_SLOT, \
+        f'The longest block time {max_time} is longer than {BLOCK_TAIL_TOLERATE_SLOT} slots, {context._block_time_stats}'
     print(f'The block creation time {ave_time} (ms) is okay')
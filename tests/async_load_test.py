@@ -0,0 +1,71 @@
+import json
+import asyncio
+import unittest
+import pytest
+
+from tools.stress.async_load import AsyncSubstrateRpc
+
+
+class FakeWebsocket():
+    """Answers the requests through reply(request), a None message from reply closes the connection"""
+
+    def __init__(self, reply):
+        self._reply = reply
+        self._inbox = asyncio.Queue()
+
+    async def send(self, data):
+        for message in self._reply(json.loads(data)):
+            self._inbox.put_nowait(message)
+
+    async def close(self):
+        self._inbox.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        message = await self._inbox.get()
+        if message is None:
+            raise StopAsyncIteration
+        return json.dumps(message)
+
+
+def _run(reply, coroutine_fn):
+    async def run():
+        rpc = AsyncSubstrateRpc('ws://fake')
+        rpc._ws = FakeWebsocket(reply)
+        rpc._reader = asyncio.create_task(rpc._read())
+        try:
+            return await asyncio.wait_for(coroutine_fn(rpc), 5)
+        finally:
+            await rpc.close()
+    return asyncio.run(run())
+
+
+def _watch_reply(statuses):
+    def reply(request):
+        if request['method'] != 'author_submitAndWatchExtrinsic':
+            return [{'jsonrpc': '2.0', 'id': request['id'], 'result': True}]
+        return [{'jsonrpc': '2.0', 'id': request['id'], 'result': 'sub'}] + [
+            status if status is None else {'jsonrpc': '2.0', 'params': {'subscription': 'sub', 'result': status}}
+            for status in statuses]
+    return reply
+
+
+@pytest.mark.unit
+class TestAsyncSubstrateRpc(unittest.TestCase):
+    def test_pending_request_fails_when_closed(self):
+        with self.assertRaises(ConnectionError):
+            _run(lambda request: [None], lambda rpc: rpc.request('chain_getHeader', []))
+
+    def test_watch_fails_when_closed(self):
+        with self.assertRaises(ConnectionError):
+            _run(_watch_reply(['ready', None]), lambda rpc: rpc.submit_and_watch('0x00', 60))
+
+    def test_in_block(self):
+        block_hash = _run(_watch_reply(['ready', {'inBlock': '0x01'}]), lambda rpc: rpc.submit_and_watch('0x00', 60))
+        self.assertEqual(block_hash, '0x01')
+
+    def test_usurped(self):
+        with self.assertRaisesRegex(IOError, 'usurped'):
+            _run(_watch_reply(['ready', {'usurped': '0x02'}]), lambda rpc: rpc.submit_and_watch('0x00', 60))
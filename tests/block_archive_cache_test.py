@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+import pytest
+
+from tools.block_archive_cache import enable_block_archive_cache
+
+
+class FakeSubstrate():
+    """Blocks up to finalized_num are finalized, the hash of a block is its number"""
+
+    def __init__(self, finalized_num):
+        self.finalized_num = finalized_num
+        self.calls = []
+
+    def rpc_request(self, method, params, result_handler=None):
+        self.calls.append(method)
+        if method == 'chain_getFinalizedHead':
+            return {'result': f'0x{self.finalized_num:x}'}
+        if method == 'chain_getHeader':
+            return {'result': {'number': params[0]}}
+        if method == 'chain_getBlockHash':
+            return {'result': f'0x{params[0]:x}'}
+        return {'result': f'{method}@{params[-1]}'}
+
+
+@pytest.mark.unit
+class TestBlockArchiveCache(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, 'archive.sqlite')
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_finalized_blocks_are_cached(self):
+        substrate = enable_block_archive_cache(FakeSubstrate(10), self.path)
+        block_hash = substrate.rpc_request('chain_getBlockHash', [5])['result']
+        substrate.rpc_request('chain_getBlock', [block_hash])
+
+        # A new connection reads the same block from the cache only
+        other = enable_block_archive_cache(FakeSubstrate(10), self.path)
+        self.assertEqual(other.rpc_request('chain_getBlockHash', [5])['result'], block_hash)
+        self.assertEqual(other.rpc_request('chain_getBlock', [block_hash])['result'], f'chain_getBlock@{block_hash}')
+        self.assertEqual(other.calls, [])
+
+    def test_unfinalized_blocks_are_not_cached(self):
+        substrate = enable_block_archive_cache(FakeSubstrate(10), self.path)
+        block_hash = substrate.rpc_request('chain_getBlockHash', [12])['result']
+        substrate.rpc_request('chain_getBlock', [block_hash])
+
+        other = enable_block_archive_cache(FakeSubstrate(10), self.path)
+        other.rpc_request('chain_getBlockHash', [12])
+        other.rpc_request('chain_getBlock', [block_hash])
+        self.assertIn('chain_getBlock', other.calls)
@@ -1,14 +1,16 @@
 import unittest
 import pytest
 
-from substrateinterface import SubstrateInterface
 from tools.constants import WS_URL
 from peaq.utils import wait_for_n_blocks, get_block_height
-from tools.block_creation_utils import get_block_creation_times
+from tools.block_creation_utils import get_block_time_stats
+from tests.connection_pool import get_substrate
 
 BLOCK_TRAVERSE = 10
 BLOCK_CREATION_MS = 6000
 BLOCK_TOLERATE_PERCENTAGE = 50
+# No block interval may take longer than this many slots
+BLOCK_TAIL_TOLERATE_SLOT = 3
 
 
 @pytest.mark.substrate
@@ -20,10 +22,11 @@ class TestBlockCreationTime(unittest.TestCase):
         wait_for_n_blocks(substrate, block_number - now_block + 1)
 
     def test_block_creation_time(self):
-        substrate = SubstrateInterface(url=WS_URL)
+        substrate = get_substrate(WS_URL)
 
         self.wait_block(substrate, BLOCK_TRAVERSE)
 
-        ave_time = get_block_creation_times(substrate, BLOCK_TRAVERSE)
-        self.assertLess(abs(ave_time - BLOCK_CREATION_MS) / float(BLOCK_CREATION_MS) * 100.,
+        stats = get_block_time_stats(substrate, BLOCK_TRAVERSE, BLOCK_CREATION_MS)
+        self.assertLess(abs(stats['mean'] - BLOCK_CREATION_MS) / float(BLOCK_CREATION_MS) * 100.,
                         BLOCK_TOLERATE_PERCENTAGE)
+        self.assertLessEqual(stats['max'], BLOCK_CREATION_MS * BLOCK_TAIL_TOLERATE_SLOT, f'block time stats: {stats}')
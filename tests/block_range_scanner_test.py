@@ -0,0 +1,65 @@
+import threading
+import unittest
+import pytest
+
+from substrateinterface.exceptions import SubstrateRequestException
+from tools.block_range_scanner import BlockRangeScanner
+
+
+class FakeSubstrate():
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeScanner(BlockRangeScanner):
+    """Connects to fake connections instead of a node"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__('ws://fake', *args, **kwargs)
+        self.connect_num = 0
+
+    def _get_substrate(self, reconnect=False):
+        if reconnect or not hasattr(self._local, 'substrate'):
+            self._local.substrate = FakeSubstrate()
+            with self._lock:
+                self.connect_num += 1
+                self._substrates.append(self._local.substrate)
+        return self._local.substrate
+
+
+@pytest.mark.unit
+class TestBlockRangeScanner(unittest.TestCase):
+    def test_scan_in_order_and_reuse_workers(self):
+        with FakeScanner(worker_num=4) as scanner:
+            threads = set()
+
+            def fetch(substrate, block_num):
+                threads.add(threading.get_ident())
+                return block_num * 2
+
+            self.assertEqual(list(scanner.scan(10, 110, fetch)), [(i, i * 2) for i in range(10, 110)])
+            self.assertEqual(list(scanner.scan(0, 50, fetch)), [(i, i * 2) for i in range(50)])
+            # Both scans run on the same workers and connections
+            self.assertLessEqual(len(threads), 4)
+            self.assertEqual(scanner.connect_num, len(threads))
+            substrates = list(scanner._substrates)
+        self.assertTrue(all(substrate.closed for substrate in substrates))
+
+    def test_retry_only_connection_errors(self):
+        failures = {'connection': 1}
+
+        def fetch(substrate, block_num):
+            if block_num == 3 and failures['connection']:
+                failures['connection'] -= 1
+                raise ConnectionError('closed')
+            if block_num == 5:
+                raise SubstrateRequestException({'message': 'Unknown block'})
+            return block_num
+
+        with FakeScanner(worker_num=2) as scanner:
+            self.assertEqual(list(scanner.scan(0, 5, fetch)), [(i, i) for i in range(5)])
+            with self.assertRaises(SubstrateRequestException):
+                list(scanner.scan(5, 6, fetch))
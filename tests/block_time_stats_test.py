@@ -0,0 +1,25 @@
+import unittest
+import pytest
+
+from tools.stats_utils import get_percentile
+from tools.block_creation_utils import _summarize
+
+
+@pytest.mark.unit
+class TestBlockTimeStats(unittest.TestCase):
+    def test_percentile(self):
+        values = [15, 1, 7, 3]
+        # Same as numpy.percentile with the linear interpolation
+        self.assertEqual(get_percentile(values, 0), 1)
+        self.assertEqual(get_percentile(values, 50), 5)
+        self.assertAlmostEqual(get_percentile(values, 90), 12.6)
+        self.assertEqual(get_percentile(values, 100), 15)
+        self.assertEqual(get_percentile([6000], 99), 6000)
+
+    def test_summarize(self):
+        out = _summarize([6000, 6000, 12000, 6000])
+        self.assertEqual(out['count'], 4)
+        self.assertEqual(out['mean'], 7500)
+        self.assertAlmostEqual(out['stddev'], 2598.0762, places=3)
+        self.assertEqual((out['min'], out['max'], out['p50']), (6000, 12000, 6000))
+        self.assertAlmostEqual(out['p99'], 11820)
@@ -1,7 +1,6 @@
 import unittest
 import pytest
 
-from substrateinterface import SubstrateInterface
 from tools.asset import get_valid_asset_id
 from tools.constants import WS_URL, ETH_URL
 from peaq.utils import ExtrinsicBatch
@@ -11,6 +10,7 @@ from tools.peaq_eth_utils import calculate_asset_to_evm_address
 from tools.peaq_eth_utils import get_eth_info
 from tools.constants import KP_GLOBAL_SUDO
 from tests.evm_utils import sign_and_submit_evm_transaction
+from tests.connection_pool import get_substrate, get_web3
 from web3 import Web3
 
 
@@ -24,10 +24,11 @@ IERC20PLUS_ABI_FILE = 'ETH/erc20plus/abi'
 
 
 @pytest.mark.eth
+@pytest.mark.serial
 class bridge_asset_factory_test(unittest.TestCase):
     def setUp(self):
-        self._substrate = SubstrateInterface(url=WS_URL)
-        self._w3 = Web3(Web3.HTTPProvider(ETH_URL))
+        self._substrate = get_substrate(WS_URL)
+        self._w3 = get_web3(ETH_URL)
         self._kp_creator = get_eth_info()
         self._kp_admin = get_eth_info()
         self._eth_chain_id = get_eth_chain_id(self._substrate)
@@ -2,7 +2,7 @@ import pytest
 import unittest
 import time
 
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 from peaq.utils import ExtrinsicBatch
 from peaq.utils import get_account_balance
 from tools.utils import get_modified_chain_spec
@@ -14,7 +14,7 @@ from tools.peaq_eth_utils import get_eth_chain_id
 from tools.peaq_eth_utils import get_eth_info
 from peaq.utils import get_chain
 from tools.utils import batch_fund
-from web3 import Web3
+from tests.connection_pool import get_substrate, get_web3
 from eth_account import Account as ETHAccount
 from eth_account.messages import encode_structured_data
 
@@ -55,10 +55,11 @@ def batch_transfer(batch, addr_dst, token_num):
 
 
 @pytest.mark.eth
+@pytest.mark.serial
 class balance_erc20_asset_test(unittest.TestCase):
     def setUp(self):
-        self._substrate = SubstrateInterface(url=WS_URL)
-        self._w3 = Web3(Web3.HTTPProvider(ETH_URL))
+        self._substrate = get_substrate(WS_URL)
+        self._w3 = get_web3(ETH_URL)
         self._kp_creator = Keypair.create_from_uri('//Alice')
         self._kp_admin = Keypair.create_from_uri('//Bob')
         self._eth_kp_src = get_eth_info()
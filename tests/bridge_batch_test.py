@@ -6,12 +6,12 @@ from tools.constants import WS_URL, ETH_URL
 from tools.peaq_eth_utils import get_contract
 from tools.peaq_eth_utils import GAS_LIMIT, get_eth_info
 from tools.peaq_eth_utils import get_eth_chain_id
-from substrateinterface import SubstrateInterface
 from peaq.utils import ExtrinsicBatch
 from web3 import Web3
 from tools.constants import KP_GLOBAL_SUDO
 from tests.evm_utils import sign_and_submit_evm_transaction
 from tools.peaq_eth_utils import generate_random_hex
+from tests.connection_pool import get_substrate, get_web3
 
 
 KEY1 = generate_random_hex()
@@ -32,8 +32,8 @@ STORAGE_ADDRESS = '0x0000000000000000000000000000000000000801'
 @pytest.mark.eth
 class TestBridgeBatch(unittest.TestCase):
     def setUp(self):
-        self.si_peaq = SubstrateInterface(url=WS_URL)
-        self.w3 = Web3(Web3.HTTPProvider(ETH_URL))
+        self.si_peaq = get_substrate(WS_URL)
+        self.w3 = get_web3(ETH_URL)
         self.kp_eth = get_eth_info()
 
     def _fund_eth_account(self):
@@ -1,13 +1,14 @@
 import pytest
 import unittest
 
-from substrateinterface import SubstrateInterface, Keypair, KeypairType
+from substrateinterface import Keypair, KeypairType
 from peaq.eth import calculate_evm_account, calculate_evm_addr
 from peaq.extrinsic import transfer
 from tools.peaq_eth_utils import call_eth_transfer_a_lot, get_contract, generate_random_hex
 from tools.constants import WS_URL, ETH_URL
 from tests.evm_utils import sign_and_submit_evm_transaction
 from tools.peaq_eth_utils import get_eth_chain_id
+from tests.connection_pool import get_substrate, get_web3
 from web3 import Web3
 
 
@@ -67,8 +68,8 @@ class TestBridgeDid(unittest.TestCase):
         return tx_receipt['blockNumber']
 
     def setUp(self):
-        self.w3 = Web3(Web3.HTTPProvider(ETH_URL))
-        self.substrate = SubstrateInterface(url=WS_URL)
+        self.w3 = get_web3(ETH_URL)
+        self.substrate = get_substrate(WS_URL)
         self.eth_chain_id = get_eth_chain_id(self.substrate)
 
     def test_bridge_did(self):
@@ -1,6 +1,6 @@
 import pytest
 import unittest
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 from tools.asset import batch_create_asset, get_valid_asset_id, batch_set_metadata, batch_mint
 from tools.constants import WS_URL, ETH_URL
 from tests.evm_utils import sign_and_submit_evm_transaction
@@ -9,7 +9,7 @@ from tools.peaq_eth_utils import get_contract
 from tools.peaq_eth_utils import get_eth_chain_id
 from tools.peaq_eth_utils import calculate_asset_to_evm_address
 from tools.peaq_eth_utils import get_eth_info
-from web3 import Web3
+from tests.connection_pool import get_substrate, get_web3
 
 
 ABI_FILE = 'ETH/erc20/abi'
@@ -33,10 +33,11 @@ def batch_transfer(batch, addr_dst, token_num):
 
 
 @pytest.mark.eth
+@pytest.mark.serial
 class erc20_asset_test(unittest.TestCase):
     def setUp(self):
-        self._substrate = SubstrateInterface(url=WS_URL)
-        self._w3 = Web3(Web3.HTTPProvider(ETH_URL))
+        self._substrate = get_substrate(WS_URL)
+        self._w3 = get_web3(ETH_URL)
         self._kp_creator = Keypair.create_from_uri('//Alice')
         self._kp_admin = Keypair.create_from_uri('//Bob')
         self._eth_kp_src = get_eth_info()
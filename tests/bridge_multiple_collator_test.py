@@ -2,7 +2,7 @@ import pytest
 import unittest
 from tests.utils_func import restart_parachain_and_runtime_upgrade
 from tools.runtime_upgrade import wait_until_block_height
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 from tools.constants import WS_URL, ETH_URL, RELAYCHAIN_WS_URL
 from tests.evm_utils import sign_and_submit_evm_transaction
 from peaq.utils import ExtrinsicBatch
@@ -10,8 +10,8 @@ from tools.peaq_eth_utils import get_contract
 from tools.peaq_eth_utils import get_eth_chain_id
 from tools.peaq_eth_utils import get_eth_info
 from tools.constants import KP_GLOBAL_SUDO, KP_COLLATOR
+from tests.connection_pool import get_substrate, get_web3
 from peaq.utils import get_block_hash
-from web3 import Web3
 
 
 PARACHAIN_STAKING_ABI_FILE = 'ETH/parachain-staking/abi'
@@ -26,14 +26,14 @@ class bridge_parachain_staking_collators_test(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         restart_parachain_and_runtime_upgrade()
-        wait_until_block_height(SubstrateInterface(url=RELAYCHAIN_WS_URL), 2)
-        wait_until_block_height(SubstrateInterface(url=WS_URL), 2)
+        wait_until_block_height(get_substrate(RELAYCHAIN_WS_URL), 2)
+        wait_until_block_height(get_substrate(WS_URL), 2)
 
     def setUp(self):
-        wait_until_block_height(SubstrateInterface(url=WS_URL), 3)
+        wait_until_block_height(get_substrate(WS_URL), 3)
 
-        self._substrate = SubstrateInterface(url=WS_URL)
-        self._w3 = Web3(Web3.HTTPProvider(ETH_URL))
+        self._substrate = get_substrate(WS_URL)
+        self._w3 = get_web3(ETH_URL)
         self._kp_moon = get_eth_info()
         self._kp_mars = get_eth_info()
         self._eth_chain_id = get_eth_chain_id(self._substrate)
@@ -2,7 +2,7 @@ import pytest
 import unittest
 from tests.utils_func import restart_parachain_and_runtime_upgrade
 from tools.runtime_upgrade import wait_until_block_height
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 from tools.constants import WS_URL, ETH_URL, RELAYCHAIN_WS_URL
 from tests.evm_utils import sign_and_submit_evm_transaction
 from peaq.utils import ExtrinsicBatch
@@ -14,7 +14,7 @@ from tools.evm_claim_sign import calculate_claim_signature, claim_account
 from tools.constants import KP_GLOBAL_SUDO, KP_COLLATOR, BLOCK_GENERATE_TIME
 from peaq.utils import get_block_hash, get_chain
 from tools.utils import get_modified_chain_spec
-from web3 import Web3
+from tests.connection_pool import get_substrate, get_web3
 
 
 PARACHAIN_STAKING_ABI_FILE = 'ETH/parachain-staking/abi'
@@ -34,13 +34,13 @@ class bridge_parachain_staking_test(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         restart_parachain_and_runtime_upgrade()
-        wait_until_block_height(SubstrateInterface(url=RELAYCHAIN_WS_URL), 1)
-        wait_until_block_height(SubstrateInterface(url=WS_URL), 1)
+        wait_until_block_height(get_substrate(RELAYCHAIN_WS_URL), 1)
+        wait_until_block_height(get_substrate(WS_URL), 1)
 
     def _initialize_connections_and_keypairs(self):
         """Initialize connections and keypairs"""
-        self._substrate = SubstrateInterface(url=WS_URL)
-        self._w3 = Web3(Web3.HTTPProvider(ETH_URL))
+        self._substrate = get_substrate(WS_URL)
+        self._w3 = get_web3(ETH_URL)
         self._kp_moon = get_eth_info()
         self._kp_mars = get_eth_info()
         self._eth_chain_id = get_eth_chain_id(self._substrate)
@@ -49,14 +49,14 @@ class bridge_parachain_staking_test(unittest.TestCase):
         self._chain_spec = get_modified_chain_spec(get_chain(self._substrate))
 
     def setUp(self):
-        wait_until_block_height(SubstrateInterface(url=WS_URL), 1)
+        wait_until_block_height(get_substrate(WS_URL), 1)
         self._initialize_connections_and_keypairs()
 
     def restart_chain_and_reinit(self):
         """Restart chain and reinitialize connections"""
         restart_parachain_and_runtime_upgrade()
-        wait_until_block_height(SubstrateInterface(url=RELAYCHAIN_WS_URL), 1)
-        wait_until_block_height(SubstrateInterface(url=WS_URL), 1)
+        wait_until_block_height(get_substrate(RELAYCHAIN_WS_URL), 1)
+        wait_until_block_height(get_substrate(WS_URL), 1)
         self._initialize_connections_and_keypairs()
         self._fund_users()
 
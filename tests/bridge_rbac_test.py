@@ -1,11 +1,12 @@
 import pytest
 
-from substrateinterface import SubstrateInterface, Keypair, KeypairType
+from substrateinterface import Keypair, KeypairType
 from tests.evm_utils import sign_and_submit_evm_transaction
 from tools.constants import WS_URL, ETH_URL
 from peaq.eth import calculate_evm_account, calculate_evm_addr
 from tools.peaq_eth_utils import get_eth_chain_id
 from tools.peaq_eth_utils import call_eth_transfer_a_lot, get_contract, generate_random_hex, TX_SUCCESS_STATUS
+from tests.connection_pool import get_substrate, get_web3
 from web3 import Web3
 import enum
 import unittest
@@ -531,8 +532,8 @@ class TestBridgeRbac(unittest.TestCase):
 
     def setUp(self):
         self._eth_src = calculate_evm_addr(KP_SRC.ss58_address)
-        self._w3 = Web3(Web3.HTTPProvider(ETH_URL))
-        self._substrate = SubstrateInterface(url=WS_URL)
+        self._w3 = get_web3(ETH_URL)
+        self._substrate = get_substrate(WS_URL)
         self._eth_kp_src = Keypair.create_from_private_key(ETH_PRIVATE_KEY, crypto_type=KeypairType.ECDSA)
         self._contract = get_contract(self._w3, RBAC_ADDRESS, ABI_FILE)
         self._batch_contract = get_contract(self._w3, BATCH_ADDRESS, BATCH_ABI_FILE)
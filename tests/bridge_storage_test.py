@@ -1,6 +1,6 @@
 import pytest
 
-from substrateinterface import SubstrateInterface, Keypair, KeypairType
+from substrateinterface import Keypair, KeypairType
 from peaq.eth import calculate_evm_account_hex, calculate_evm_addr, calculate_evm_account
 from peaq.extrinsic import transfer
 from tools.constants import WS_URL, ETH_URL
@@ -8,7 +8,7 @@ from tests.evm_utils import sign_and_submit_evm_transaction
 from tools.peaq_eth_utils import get_eth_chain_id
 from tools.peaq_eth_utils import call_eth_transfer_a_lot, get_contract, generate_random_hex
 from tools.peaq_eth_utils import TX_SUCCESS_STATUS
-from web3 import Web3
+from tests.connection_pool import get_substrate, get_web3
 
 import unittest
 
@@ -65,8 +65,8 @@ class TestBridgeStorage(unittest.TestCase):
 
     def setUp(self):
         self._eth_src = calculate_evm_addr(KP_SRC.ss58_address)
-        self._w3 = Web3(Web3.HTTPProvider(ETH_URL))
-        self._substrate = SubstrateInterface(url=WS_URL)
+        self._w3 = get_web3(ETH_URL)
+        self._substrate = get_substrate(WS_URL)
         self._eth_kp_src = Keypair.create_from_private_key(ETH_PRIVATE_KEY, crypto_type=KeypairType.ECDSA)
         self._account = calculate_evm_account_hex(self._eth_kp_src.ss58_address)
 
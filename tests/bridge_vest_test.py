@@ -2,7 +2,6 @@ import unittest
 import time
 import pytest
 
-from substrateinterface import SubstrateInterface
 from peaq.utils import ExtrinsicBatch
 from tools.peaq_eth_utils import get_contract
 from tools.constants import BLOCK_GENERATE_TIME
@@ -13,7 +12,7 @@ from tests.evm_utils import sign_and_submit_evm_transaction
 from tools.peaq_eth_utils import get_eth_chain_id
 from tools.peaq_eth_utils import get_eth_info
 from tools.utils import batch_fund
-from web3 import Web3
+from tests.connection_pool import get_substrate, get_web3
 
 
 VEST_ABI_FILE = 'ETH/vest/abi'
@@ -24,8 +23,8 @@ VEST_PERIOD = 100
 @pytest.mark.eth
 class TestBridgeVest(unittest.TestCase):
     def setUp(self):
-        self._w3 = Web3(Web3.HTTPProvider(ETH_URL))
-        self._substrate = SubstrateInterface(url=WS_URL)
+        self._w3 = get_web3(ETH_URL)
+        self._substrate = get_substrate(WS_URL)
         self._eth_chain_id = get_eth_chain_id(self._substrate)
         self._kp_moon = get_eth_info()
         self._kp_mars = get_eth_info()
@@ -6,9 +6,8 @@ from tools.runtime_upgrade import wait_until_block_height
 from tools.peaq_eth_utils import get_contract
 from tools.peaq_eth_utils import get_eth_info
 from tools.peaq_eth_utils import get_eth_chain_id
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 from peaq.utils import ExtrinsicBatch
-from web3 import Web3
 from tools.constants import KP_GLOBAL_SUDO
 from tests.evm_utils import sign_and_submit_evm_transaction
 from peaq.utils import get_account_balance
@@ -16,6 +15,7 @@ from tests import utils_func as TestUtils
 from tools.asset import wait_for_account_asset_change_wrap
 from tools.asset import get_tokens_account_from_pallet_tokens
 from tools.utils import get_modified_chain_spec
+from tests.connection_pool import get_substrate, get_web3
 from peaq.utils import get_chain
 import pytest
 
@@ -33,14 +33,14 @@ class TestBridgeXCMUtils(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         restart_parachain_and_runtime_upgrade()
-        wait_until_block_height(SubstrateInterface(url=RELAYCHAIN_WS_URL), 1)
-        wait_until_block_height(SubstrateInterface(url=WS_URL), 1)
-        wait_until_block_height(SubstrateInterface(url=ACA_WS_URL), 1)
+        wait_until_block_height(get_substrate(RELAYCHAIN_WS_URL), 1)
+        wait_until_block_height(get_substrate(WS_URL), 1)
+        wait_until_block_height(get_substrate(ACA_WS_URL), 1)
 
     def setUp(self):
-        self.si_peaq = SubstrateInterface(url=WS_URL)
-        wait_until_block_height(SubstrateInterface(url=WS_URL), 1)
-        self.w3 = Web3(Web3.HTTPProvider(ETH_URL))
+        self.si_peaq = get_substrate(WS_URL)
+        wait_until_block_height(get_substrate(WS_URL), 1)
+        self.w3 = get_web3(ETH_URL)
         self.kp_eth = get_eth_info("sphere gasp actual clock wreck rural essay name claw deputy party output")
         self.eth_chain_id = get_eth_chain_id(self.si_peaq)
         self.setup_sibling_parachain_account()
@@ -218,8 +218,8 @@ class TestBridgeXCMUtils(unittest.TestCase):
 
     @pytest.mark.xcm
     def test_xcm_send(self):
-        self.si_peaq = SubstrateInterface(url=WS_URL)
-        self.si_aca = SubstrateInterface(url=ACA_WS_URL)
+        self.si_peaq = get_substrate(WS_URL)
+        self.si_aca = get_substrate(ACA_WS_URL)
 
         self._fund_eth_account()
         self.aca_fund(self.si_aca, KP_GLOBAL_SUDO, self.sibling_parachain_addr, 1000 * 10 ** 18)
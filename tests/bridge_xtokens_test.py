@@ -5,7 +5,7 @@ import unittest
 import pytest
 from tests.utils_func import restart_parachain_and_runtime_upgrade
 from tools.runtime_upgrade import wait_until_block_height
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 from tools.constants import ETH_URL, RELAYCHAIN_WS_URL
 from tools.constants import WS_URL, ACA_WS_URL, PARACHAIN_WS_URL
 from tests.evm_utils import sign_and_submit_evm_transaction
@@ -21,12 +21,12 @@ from tools.asset import PEAQ_METADATA, PEAQ_ASSET_ID
 from tools.utils import get_peaq_chain_id
 from tools.asset import batch_create_asset, batch_mint, batch_set_metadata, batch_force_create_asset
 from tools.peaq_eth_utils import calculate_asset_to_evm_address
-from web3 import Web3
 from tools.peaq_eth_utils import get_contract
 from tools.peaq_eth_utils import get_eth_info
 from tools.peaq_eth_utils import get_eth_chain_id
 from tools.asset import wait_for_account_asset_change_wrap
 from tools.asset import get_tokens_account_from_pallet_assets
+from tests.connection_pool import get_substrate, get_web3
 
 
 PEAQ_PD_CHAIN_ID = get_peaq_chain_id()
@@ -253,19 +253,19 @@ class TestBridgeXTokens(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         restart_parachain_and_runtime_upgrade()
-        wait_until_block_height(SubstrateInterface(url=RELAYCHAIN_WS_URL), 1)
-        wait_until_block_height(SubstrateInterface(url=PARACHAIN_WS_URL), 1)
-        wait_until_block_height(SubstrateInterface(url=ACA_WS_URL), 1)
+        wait_until_block_height(get_substrate(RELAYCHAIN_WS_URL), 1)
+        wait_until_block_height(get_substrate(PARACHAIN_WS_URL), 1)
+        wait_until_block_height(get_substrate(ACA_WS_URL), 1)
 
     def setUp(self):
-        wait_until_block_height(SubstrateInterface(url=PARACHAIN_WS_URL), 1)
-        wait_until_block_height(SubstrateInterface(url=ACA_WS_URL), 1)
+        wait_until_block_height(get_substrate(PARACHAIN_WS_URL), 1)
+        wait_until_block_height(get_substrate(ACA_WS_URL), 1)
 
-        self.si_peaq = SubstrateInterface(url=WS_URL,)
-        self.si_aca = SubstrateInterface(url=ACA_WS_URL)
+        self.si_peaq = get_substrate(WS_URL)
+        self.si_aca = get_substrate(ACA_WS_URL)
         self.alice = Keypair.create_from_uri('//Alice')
         self.kp_eth = get_eth_info()
-        self._w3 = Web3(Web3.HTTPProvider(ETH_URL))
+        self._w3 = get_web3(ETH_URL)
         self.eth_chain_id = get_eth_chain_id(self.si_peaq)
 
         # transfer
@@ -1,12 +1,13 @@
 import unittest
 import pytest
-from substrateinterface import SubstrateInterface, Keypair, KeypairType
+from substrateinterface import Keypair, KeypairType
 from tools.constants import WS_URL, ETH_URL
 from tools.constants import KP_COLLATOR
 from tools.evm_claim_sign import calculate_claim_signature, claim_account
 from tests.utils_func import restart_parachain_and_runtime_upgrade
 from tools.runtime_upgrade import wait_until_block_height
 from tools.peaq_eth_utils import get_eth_chain_id, calculate_evm_default_addr
+from tests.connection_pool import get_substrate, get_web3
 from peaq.utils import ExtrinsicBatch
 from web3 import Web3
 from peaq.eth import calculate_evm_addr
@@ -27,17 +28,18 @@ def batch_claim_default_account(batch):
 
 
 def get_eth_block_author():
-    w3 = Web3(Web3.HTTPProvider(ETH_URL))
+    w3 = get_web3(ETH_URL)
     block = w3.eth.get_block('latest')
     return block['author']
 
 
 @pytest.mark.eth
+@pytest.mark.serial
 class TestCollatorBehavior(unittest.TestCase):
     def setUp(self):
         restart_parachain_and_runtime_upgrade()
-        wait_until_block_height(SubstrateInterface(url=WS_URL), 2)
-        self._substrate = SubstrateInterface(url=WS_URL)
+        wait_until_block_height(get_substrate(WS_URL), 2)
+        self._substrate = get_substrate(WS_URL)
         self._eth_chain_id = get_eth_chain_id(self._substrate)
 
     def test_author_check_address_unification(self):
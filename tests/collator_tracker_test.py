@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+import pytest
+import requests
+from unittest.mock import patch
+
+from tools.collator_tracker import CollatorTracker, serve_tracker
+from tools.check_collator import get_tracked_collator
+
+
+VALIDATORS = ['alice', 'bob', 'charlie']
+
+
+class FakeValue():
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeSubstrate():
+    """Sessions are two blocks long, the author of a block takes turns between alice and bob"""
+
+    def __init__(self, url=None):
+        self.url = url
+        self.closed = False
+
+    def get_block_hash(self, block_num):
+        return f'0x{block_num:x}'
+
+    def get_block_header(self, block_hash, include_author=False):
+        return {'author': VALIDATORS[int(block_hash, 16) % 2]}
+
+    def query(self, module, storage_function, block_hash=None):
+        if storage_function == 'CurrentIndex':
+            return FakeValue(int(block_hash, 16) // 2)
+        return FakeValue(VALIDATORS)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.mark.unit
+class TestCollatorTracker(unittest.TestCase):
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        self._state_path = os.path.join(self._folder.name, 'tracker.json')
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def _track(self, start, end, session_num=2):
+        tracker = CollatorTracker('ws://fake', self._state_path, session_num)
+        tracker._substrate = FakeSubstrate()
+        tracker._state['last_block'] = start - 1
+        tracker._catch_up(end)
+        return tracker
+
+    def test_session_rollover_and_pruning(self):
+        tracker = self._track(2, 7)
+        # Sessions 1, 2 and 3 are tracked, only the last two are kept
+        self.assertEqual(sorted(tracker.get_state()['sessions'], key=int), ['2', '3'])
+        self.assertEqual(tracker.get_session(), {
+            'session': 3, 'first_block': 6, 'last_block': 7,
+            'authors': {'alice': 1, 'bob': 1}, 'missing': ['charlie']})
+        self.assertIsNone(tracker.get_session(1))
+
+    def test_resume_from_state(self):
+        self._track(2, 5)
+        tracker = CollatorTracker('ws://fake', self._state_path, 2)
+        self.assertEqual(tracker.get_state()['last_block'], 5)
+        tracker._substrate = FakeSubstrate()
+        tracker._catch_up(5)
+        self.assertEqual(tracker.get_session(2)['authors'], {'alice': 1, 'bob': 1})
+
+    def test_reconnect_closes_old_connection(self):
+        tracker = CollatorTracker('ws://fake', self._state_path)
+        with patch('tools.collator_tracker.SubstrateInterface', FakeSubstrate):
+            tracker._connect()
+            first = tracker._substrate
+            tracker._connect()
+        self.assertTrue(first.closed)
+        self.assertFalse(tracker._substrate.closed)
+
+
+@pytest.mark.unit
+class TestTrackerHandler(unittest.TestCase):
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        self._tracker = CollatorTracker('ws://fake', os.path.join(self._folder.name, 'tracker.json'))
+        self._server = serve_tracker(self._tracker, '127.0.0.1', 0)
+        self._url = f'http://127.0.0.1:{self._server.server_address[1]}'
+
+    def tearDown(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._folder.cleanup()
+
+    def _track(self, start, end):
+        self._tracker._substrate = FakeSubstrate()
+        self._tracker._state['last_block'] = start - 1
+        self._tracker._catch_up(end)
+
+    def test_routes(self):
+        self._track(2, 5)
+        self.assertEqual(sorted(requests.get(f'{self._url}/sessions', timeout=10).json()['sessions']), ['1', '2'])
+        self.assertEqual(requests.get(f'{self._url}/session', timeout=10).json()['session'], 2)
+        self.assertEqual(requests.get(f'{self._url}/session/1', timeout=10).json()['first_block'], 2)
+        self.assertEqual(requests.get(f'{self._url}/session/9', timeout=10).status_code, 404)
+        self.assertEqual(requests.get(f'{self._url}/unknown', timeout=10).status_code, 404)
+
+    def test_check_collator_reads_tracker(self):
+        self._track(2, 3)
+        missing, authors = get_tracked_collator(self._url)
+        self.assertEqual(missing, {'charlie'})
+        self.assertEqual(authors, {'alice': 1, 'bob': 1})
+
+    def test_check_collator_without_session(self):
+        with self.assertRaisesRegex(IOError, 'session is not tracked'):
+            get_tracked_collator(self._url)
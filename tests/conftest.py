@@ -1,24 +1,82 @@
 import pytest  # noqa: F401
-import importlib
-import sys
 import tools.utils  # noqa: F401
 from tests.substrate_utils import monkey_submit_extrinsic_for_fee_weight
 from tests.substrate_utils import generate_substrate_weight_fee_report
 from tests.evm_utils import generate_evm_fee_report
+from tests.utils_func import fund_worker_keypairs
+from tools.constants import WS_URL
+from tools.parallel_utils import get_worker_keypairs, session_lock, get_chain_generation
+from tools.parallel_utils import WORKER_FUND_AMOUNT
+from tools.monkey.patch_registry import register_patch, ensure_patches
+from tools.monkey.monkey_reorg_batch import monkey_execute_extrinsic_batch
+from tests.connection_pool import get_substrate, connection_pool
 from substrateinterface import SubstrateInterface
+from peaq.utils import ExtrinsicBatch
 
-SubstrateInterface.submit_extrinsic = monkey_submit_extrinsic_for_fee_weight
+# Installed once per session, tools.utils already applied the rpc_request patch
+register_patch(SubstrateInterface, 'submit_extrinsic', monkey_submit_extrinsic_for_fee_weight)
+register_patch(SubstrateInterface, 'rpc_request', SubstrateInterface.rpc_request)
+register_patch(ExtrinsicBatch, '_execute_extrinsic_batch', monkey_execute_extrinsic_batch)
+
+# Tests with these markers cannot run beside other pytest-xdist workers
+SERIAL_MARKERS = ['serial', 'relaunch', 'detail_upgrade_check']
+
+
+def _is_serial(node):
+    return node is not None and any(node.get_closest_marker(marker) for marker in SERIAL_MARKERS)
 
 
 def pytest_runtest_setup(item):
-    # For the monkey patching to work, the module must be reloaded
-    # Avoid the dependency on the module name
-    if 'substrateinterface' in sys.modules:
-        importlib.reload(sys.modules['substrateinterface'])
-    if 'peaq.utils' in sys.modules:
-        importlib.reload(sys.modules['peaq.utils'])
+    # A test module can import a tool which installs its own patch, put ours back
+    restored = ensure_patches()
+    if restored:
+        print(f'Restore the monkey patches {restored} before {item.nodeid}')
+
+
+@pytest.fixture(scope='class', autouse=True)
+def serial_class_lock(request):
+    # Class scope, so the lock is also held during setUpClass (e.g. relaunch the chain)
+    if request.cls is None or not _is_serial(request.node):
+        yield
+        return
+    with session_lock(exclusive=True):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def serial_test_lock(request):
+    if request.cls is not None and _is_serial(request.node.getparent(pytest.Class)):
+        # Already held exclusively by serial_class_lock
+        yield
+        return
+    with session_lock(exclusive=_is_serial(request.node)):
+        yield
+
+
+# Chain generation the worker keypairs of this process were last funded on
+_worker_funding = {'generation': None}
+
+
+@pytest.fixture
+def worker_kps():
+    # Runs under the shared session lock, so no relaunch can happen between the funding and the test
+    kps = get_worker_keypairs()
+    generation = get_chain_generation()
+    if _worker_funding['generation'] != generation:
+        receipt = fund_worker_keypairs(get_substrate(WS_URL), kps, WORKER_FUND_AMOUNT)
+        if not receipt.is_success:
+            raise IOError(f'Cannot fund the worker keypairs: {receipt.error_message}')
+        _worker_funding['generation'] = generation
+    return kps
+
+
+@pytest.fixture
+def class_worker_kps(request, worker_kps):
+    request.cls.worker_kps = worker_kps
 
 
 def pytest_sessionfinish(session, exitstatus):
     generate_substrate_weight_fee_report()
     generate_evm_fee_report()
+    print('Connection pool:')
+    connection_pool.report()
@@ -0,0 +1,87 @@
+import threading
+import requests
+from collections import defaultdict
+from substrateinterface import SubstrateInterface
+from web3 import Web3
+
+
+class ConnectionPool():
+    """
+    Session-wide connections per URL, so the tests do not pay the websocket handshake
+    and the metadata load in every setUp.
+    A SubstrateInterface is not thread safe, so every thread gets its own one per URL;
+    the Web3 objects of a URL share one keep-alive HTTP session.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._substrates = {}
+        self._web3s = {}
+        self._metrics = defaultdict(lambda: {'created': 0, 'reused': 0, 'reconnected': 0})
+
+    def _is_healthy(self, substrate):
+        return substrate.websocket is not None and substrate.websocket.connected
+
+    def get_substrate(self, url):
+        key = (url, threading.get_ident())
+        with self._lock:
+            substrate = self._substrates.get(key)
+            if substrate is None:
+                self._metrics[url]['created'] += 1
+            elif self._is_healthy(substrate):
+                self._metrics[url]['reused'] += 1
+                return substrate
+            else:
+                self._metrics[url]['reconnected'] += 1
+        if substrate is None:
+            substrate = SubstrateInterface(url=url)
+            with self._lock:
+                self._substrates[key] = substrate
+        else:
+            substrate.connect_websocket()
+        return substrate
+
+    def get_web3(self, url):
+        with self._lock:
+            if url in self._web3s:
+                self._metrics[url]['reused'] += 1
+                return self._web3s[url]
+            self._metrics[url]['created'] += 1
+            w3 = Web3(Web3.HTTPProvider(url, session=requests.Session()))
+            self._web3s[url] = w3
+            return w3
+
+    def reset(self):
+        """Drops all connections, e.g. after the chain is relaunched"""
+        with self._lock:
+            substrates = list(self._substrates.values())
+            self._substrates.clear()
+            self._web3s.clear()
+        for substrate in substrates:
+            try:
+                substrate.close()
+            except Exception as e:
+                print(f'Cannot close the connection to {substrate.url}: {e}')
+
+    def get_metrics(self):
+        with self._lock:
+            return {url: dict(metrics) for url, metrics in self._metrics.items()}
+
+    def report(self):
+        for url, metrics in self.get_metrics().items():
+            print(f'{url}: created {metrics["created"]}, reused {metrics["reused"]}, reconnected {metrics["reconnected"]}')
+
+
+connection_pool = ConnectionPool()
+
+
+def get_substrate(url):
+    return connection_pool.get_substrate(url)
+
+
+def get_web3(url):
+    return connection_pool.get_web3(url)
+
+
+def reset_connection_pool():
+    connection_pool.reset()
@@ -0,0 +1,51 @@
+import gc
+import unittest
+import pytest
+
+from tools.event_index import EventIndex, get_event_index, _EVENT_INDEXES
+
+
+class FakeSubstrate():
+    def __init__(self, finalized_num):
+        self.finalized_num = finalized_num
+        self.finalized_calls = 0
+
+    def get_chain_finalised_head(self):
+        self.finalized_calls += 1
+        return f'0x{self.finalized_num:064x}'
+
+    def get_block_number(self, block_hash):
+        return int(block_hash, 16)
+
+    def get_block_hash(self, block_num):
+        return f'0x{block_num:064x}'
+
+
+@pytest.mark.unit
+class TestEventIndex(unittest.TestCase):
+    def test_index_is_dropped_with_connection(self):
+        substrate = FakeSubstrate(10)
+        get_event_index(substrate)
+        self.assertEqual(len(_EVENT_INDEXES), 1)
+        del substrate
+        gc.collect()
+        self.assertEqual(len(_EVENT_INDEXES), 0)
+
+    def test_refresh_only_above_finalized(self):
+        substrate = FakeSubstrate(10)
+        index = EventIndex(substrate)
+        self.assertEqual(index.refresh_finalized(), 10)
+        self.assertEqual(substrate.finalized_calls, 1)
+
+        index.refresh_finalized(8)
+        index.refresh_finalized(10)
+        self.assertEqual(substrate.finalized_calls, 1)
+
+        # Above the finalized height, but asked again too soon
+        index.refresh_finalized(12)
+        self.assertEqual(substrate.finalized_calls, 1)
+
+        index._refresh_at = 0
+        substrate.finalized_num = 12
+        self.assertEqual(index.refresh_finalized(12), 12)
+        self.assertEqual(substrate.finalized_calls, 2)
@@ -1,6 +1,6 @@
 import pytest
 
-from substrateinterface import SubstrateInterface, Keypair, KeypairType
+from substrateinterface import Keypair, KeypairType
 from tools.runtime_upgrade import wait_until_block_height
 from peaq.eth import calculate_evm_account, calculate_evm_addr
 from peaq.extrinsic import transfer
@@ -18,7 +18,7 @@ from peaq.utils import get_account_balance
 from tests import utils_func as TestUtils
 from tools.peaq_eth_utils import get_eth_info
 from tools.utils import batch_fund
-from web3 import Web3
+from tests.connection_pool import get_substrate, get_web3
 import unittest
 
 import pprint
@@ -74,16 +74,17 @@ def call_copy(w3, address, kp_src, eth_chain_id, file_name, data):
 
 
 @pytest.mark.eth
+@pytest.mark.serial
 class TestEVMEthRPC(unittest.TestCase):
     def setUp(self):
-        wait_until_block_height(SubstrateInterface(url=WS_URL), 3)
-        self._conn = SubstrateInterface(url=WS_URL)
+        wait_until_block_height(get_substrate(WS_URL), 3)
+        self._conn = get_substrate(WS_URL)
         self._eth_chain_id = get_eth_chain_id(self._conn)
         self._kp_src = Keypair.create_from_uri('//Alice')
         self._eth_src = calculate_evm_addr(self._kp_src.ss58_address)
         self._kp_eth_src = Keypair.create_from_mnemonic(MNEMONIC[0], crypto_type=KeypairType.ECDSA)
         self._kp_eth_dst = Keypair.create_from_mnemonic(MNEMONIC[1], crypto_type=KeypairType.ECDSA)
-        self._w3 = Web3(Web3.HTTPProvider(ETH_URL))
+        self._w3 = get_web3(ETH_URL)
         self._eth_deposited_src = calculate_evm_account(self._eth_src)
 
     def test_evm_api_balance_same(self):
@@ -1,12 +1,10 @@
 import pytest
 
-from substrateinterface import SubstrateInterface
 from tools.constants import KP_GLOBAL_SUDO
 from tools.runtime_upgrade import wait_until_block_height
 from tools.constants import WS_URL, ETH_URL
 from tools.peaq_eth_utils import get_eth_info
 from peaq.sudo_extrinsic import funds
-from web3 import Web3
 from tests.utils_func import restart_with_setup, start_runtime_upgrade_only
 from tests.utils_func import is_runtime_upgrade_test
 import unittest
@@ -29,6 +27,7 @@ from tests.evm_sc.calldata_heavy import CalldataHeavyTestBehavior
 from tests.evm_sc.chain_info import ChainInfoTestBehavior
 from tests.evm_sc.eip1153_transient import EIP1153TransientTestBehavior
 from tests.evm_sc.eip5656_mcopy import EIP5656MCOPYTestBehavior
+from tests.connection_pool import get_substrate, get_web3
 
 import pprint
 
@@ -40,9 +39,9 @@ pp = pprint.PrettyPrinter(indent=4)
 class TestEVMEthUpgrade(unittest.TestCase):
     def setUp(self):
         restart_with_setup()
-        wait_until_block_height(SubstrateInterface(url=WS_URL), 3)
-        self._substrate = SubstrateInterface(url=WS_URL)
-        self._w3 = Web3(Web3.HTTPProvider(ETH_URL))
+        wait_until_block_height(get_substrate(WS_URL), 3)
+        self._substrate = get_substrate(WS_URL)
+        self._w3 = get_web3(ETH_URL)
 
         self._smart_contracts = [
             ERC20SmartContractBehavior(self, self._w3, get_eth_info()),
@@ -1,11 +1,12 @@
 import pytest
 
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 from tools.constants import WS_URL, KP_GLOBAL_SUDO
 from peaq.eth import calculate_evm_account, calculate_evm_addr
 from peaq.utils import ExtrinsicBatch
 from peaq.sudo_extrinsic import funds
 from tools.peaq_eth_utils import get_eth_balance
+from tests.connection_pool import get_substrate
 import unittest
 
 import pprint
@@ -104,9 +105,10 @@ def get_eth_contract_code(conn, contract_addr):
 
 @pytest.mark.eth
 @pytest.mark.substrate
+@pytest.mark.serial
 class TestEVMSubstrateExtrinsic(unittest.TestCase):
     def setUp(self):
-        self._conn = SubstrateInterface(url=WS_URL)
+        self._conn = get_substrate(WS_URL)
         self._kp_src = Keypair.create_from_uri('//Alice')
         self._eth_src = calculate_evm_addr(self._kp_src.ss58_address)
         self._eth_deposited_src = calculate_evm_account(self._eth_src)
@@ -3,6 +3,7 @@ from eth_utils import function_abi_to_4byte_selector
 import os
 import json
 import datetime
+from tools.parallel_utils import get_worker_id, is_parallel_run
 from tools.constants import PARACHAIN_ETH_URL
 
 evm_all_fee_data = {}
@@ -77,8 +78,8 @@ def compose_function_name(w3, tx):
     return name
 
 
-def sign_and_submit_evm_transaction(tx, w3, signer):
-    receipt = PeaqEthUtils.sign_and_submit_evm_transaction(tx, w3, signer)
+def sign_and_submit_evm_transaction(tx, w3, signer, nonce_manager=None):
+    receipt = PeaqEthUtils.sign_and_submit_evm_transaction(tx, w3, signer, nonce_manager)
     gas_used = receipt['gasUsed']
     effective_gas_price = receipt['effectiveGasPrice']
 
@@ -105,10 +106,12 @@ def generate_evm_fee_report():
     date = now.strftime("%Y-%m-%d-%H-%M")
 
     folder = os.path.realpath("reports")
+    # Every pytest-xdist worker writes its own report
+    if is_parallel_run():
+        date = f'{date}-{get_worker_id()}'
     report_file = f"evm_fee_summary_{date}.json"
 
-    if not os.path.exists(folder):
-        os.makedirs(folder)
+    os.makedirs(folder, exist_ok=True)
 
     report_path = os.path.join(folder, report_file)
     summary_data = process_fee_data()
@@ -1,8 +1,9 @@
 import pytest
 import unittest
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 from tools.utils import get_existential_deposit
 from tools.constants import WS_URL
+from tests.connection_pool import get_substrate
 
 
 @pytest.mark.substrate
@@ -12,7 +13,7 @@ class TestExitentialDeposits(unittest.TestCase):
         return get_existential_deposit(self.substrate)
 
     def setUp(self):
-        self.substrate = SubstrateInterface(url=WS_URL,)
+        self.substrate = get_substrate(WS_URL)
         self.alice = Keypair.create_from_uri('//Alice')
         self.kp = Keypair.create_from_mnemonic(Keypair.generate_mnemonic())
 
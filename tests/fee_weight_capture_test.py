@@ -0,0 +1,22 @@
+import unittest
+import pytest
+
+from tests.substrate_utils import compose_extrinsic_name
+
+
+TRANSFER = {'call_module': 'Balances', 'call_function': 'transfer_keep_alive', 'call_args': {'dest': '5F', 'value': 1}}
+REMARK = {'call_module': 'System', 'call_function': 'remark', 'call_args': {'remark': '0x00'}}
+
+
+@pytest.mark.unit
+class TestComposeExtrinsicName(unittest.TestCase):
+    def test_composed_call(self):
+        call = {'call_module': 'Utility', 'call_function': 'batch_all', 'call_args': {'calls': [TRANSFER, REMARK]}}
+        self.assertEqual(compose_extrinsic_name(call), 'Utility.batch_all(Balances.transfer_keep_alive,System.remark)')
+
+    def test_decoded_call(self):
+        call = {'call_module': 'Sudo', 'call_function': 'sudo', 'call_args': [
+            {'name': 'call', 'type': 'Call', 'value': {
+                'call_module': 'System', 'call_function': 'remark',
+                'call_args': [{'name': 'remark', 'type': 'Bytes', 'value': '0x00'}]}}]}
+        self.assertEqual(compose_extrinsic_name(call), '[Sudo.sudo.System.remark]')
@@ -1,18 +1,20 @@
 import unittest
 import pytest
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 from tools.constants import WS_URL
 from peaq.sudo_extrinsic import fund
 from peaq.utils import get_account_balance
 from tools.constants import KP_GLOBAL_SUDO
+from tests.connection_pool import get_substrate
 
 TOKEN_NUM_BASE = pow(10, 18)
 
 
 @pytest.mark.substrate
+@pytest.mark.serial
 class TestFund(unittest.TestCase):
     def test_fund(self):
-        substrate = SubstrateInterface(url=WS_URL)
+        substrate = get_substrate(WS_URL)
         kp_dst = Keypair.create_from_uri('//Bob')
         receipt = fund(substrate, KP_GLOBAL_SUDO, kp_dst, 500 * TOKEN_NUM_BASE)
         self.assertTrue(receipt.is_success, f'fund failed: {receipt.error_message}')
@@ -0,0 +1,70 @@
+import unittest
+import threading
+import pytest
+
+from websocket import ABNF, WebSocketTimeoutException
+from tools.monkey.monkey_3rd_substrate_interface import _heartbeat_once
+
+
+class FakeFrame():
+    def __init__(self, data=b''):
+        self.data = data
+
+
+class FakeWebsocket():
+    """Answers a ping with the given frames, then times out like a socket without data"""
+
+    def __init__(self, frames):
+        self._frames = frames
+        self.timeout = None
+        self.pinged = False
+
+    def gettimeout(self):
+        return self.timeout
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def ping(self):
+        self.pinged = True
+
+    def recv_data_frame(self, control_frame=False):
+        if not self._frames:
+            raise WebSocketTimeoutException('Connection timed out')
+        return self._frames.pop(0)
+
+
+class FakeSubstrate():
+    def __init__(self, frames):
+        self.url = 'ws://fake'
+        self.websocket = FakeWebsocket(frames)
+        self._heartbeat_busy = threading.RLock()
+        self._heartbeat_last_active = 0
+        setattr(self, '_SubstrateInterface__rpc_message_queue', [])
+
+
+@pytest.mark.unit
+class TestHeartbeat(unittest.TestCase):
+    def test_pong(self):
+        substrate = FakeSubstrate([(ABNF.OPCODE_PING, FakeFrame()), (ABNF.OPCODE_PONG, FakeFrame())])
+        _heartbeat_once(substrate)
+        self.assertFalse(getattr(substrate, '_heartbeat_failed', False))
+        self.assertGreater(substrate._heartbeat_last_active, 0)
+        self.assertIsNone(substrate.websocket.timeout)
+
+    def test_late_pong(self):
+        substrate = FakeSubstrate([(ABNF.OPCODE_TEXT, FakeFrame(b'{"id": 7, "result": null}'))])
+        _heartbeat_once(substrate)
+        self.assertTrue(substrate._heartbeat_failed)
+        # The message read while waiting is still there for rpc_request
+        self.assertEqual(substrate._SubstrateInterface__rpc_message_queue, [{'id': 7, 'result': None}])
+        self.assertIsNone(substrate.websocket.timeout)
+
+    def test_busy_connection_is_skipped(self):
+        substrate = FakeSubstrate([])
+        holder = threading.Thread(target=substrate._heartbeat_busy.acquire)
+        holder.start()
+        holder.join()
+        _heartbeat_once(substrate)
+        self.assertFalse(substrate.websocket.pinged)
+        self.assertFalse(getattr(substrate, '_heartbeat_failed', False))
@@ -0,0 +1,49 @@
+import os
+import csv
+import json
+import tempfile
+import unittest
+import pytest
+
+from tools.stress.latency_recorder import LatencyHistogram, TxLatencyRecorder
+
+
+@pytest.mark.unit
+class TestLatencyRecorder(unittest.TestCase):
+    def test_histogram_percentile(self):
+        hist = LatencyHistogram()
+        for i in range(1, 101):
+            hist.record(i / 1000)
+        self.assertEqual(hist.count, 100)
+        # Within the precision of two significant digits
+        self.assertTrue(0.050 <= hist.percentile(50) < 0.051)
+        self.assertTrue(0.099 <= hist.percentile(99) < 0.1)
+        self.assertEqual(hist.percentile(100), 0.1)
+
+    def test_completed_records_are_streamed(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path_prefix = os.path.join(folder, 'latency')
+            recorder = TxLatencyRecorder(path_prefix)
+            for tx_id in range(3):
+                recorder.submitted(tx_id, 'substrate')
+                recorder.accepted(tx_id)
+            recorder.included(0, 10)
+            recorder.included(1, 11)
+            recorder.failed(2, 'invalid')
+            recorder.finalized(10)
+            # Only the transaction waiting for finalization is kept in memory
+            self.assertEqual(list(recorder._records), [1])
+
+            recorder.dump()
+            with open(f'{path_prefix}.csv') as f:
+                self.assertEqual([row['tx_id'] for row in csv.DictReader(f)], ['2', '0'])
+
+            recorder.failed(3, 'cannot sign', 'evm')
+            recorder.close()
+            with open(f'{path_prefix}.csv') as f:
+                self.assertEqual([row['tx_id'] for row in csv.DictReader(f)], ['2', '0', '3', '1'])
+            with open(f'{path_prefix}.json') as f:
+                summary = json.load(f)
+            self.assertEqual(summary['sent'], 4)
+            self.assertEqual(summary['failed'], {'substrate': 1, 'evm': 1})
+            self.assertEqual(summary['latency']['substrate']['finalization']['count'], 1)
@@ -0,0 +1,45 @@
+import tempfile
+import unittest
+import pytest
+
+from tools.metadata_cache import MetadataCacheRegion
+
+
+class FakeMetadata():
+    def __init__(self, data):
+        self.data = type('Data', (), {'to_hex': lambda self: data})()
+
+
+class FakeSubstrate():
+    def __init__(self, genesis_hash, url='ws://127.0.0.1:10044'):
+        self.url = url
+        self.genesis_hash = genesis_hash
+        self.requests = []
+
+    def rpc_request(self, method, params):
+        self.requests.append((method, params))
+        return {'result': self.genesis_hash}
+
+
+@pytest.mark.unit
+class TestMetadataCacheKey(unittest.TestCase):
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def test_genesis_asked_once_per_connection(self):
+        substrate = FakeSubstrate('0xaa')
+        region = MetadataCacheRegion(substrate, self._folder.name)
+        self.assertEqual(region._get_cache_key('METADATA_5'), ('0xaa', '5'))
+        self.assertEqual(region._get_cache_key('METADATA_6'), ('0xaa', '6'))
+        self.assertEqual(substrate.requests, [('chain_getBlockHash', [0])])
+
+    def test_relaunched_chain_on_same_url(self):
+        metadata = FakeMetadata('0x01')
+        MetadataCacheRegion(FakeSubstrate('0xcc'), self._folder.name).set('METADATA_5', metadata)
+
+        # Another chain at the same URL does not get the metadata of the old one
+        self.assertIsNone(MetadataCacheRegion(FakeSubstrate('0xdd'), self._folder.name).get('METADATA_5'))
+        self.assertIs(MetadataCacheRegion(FakeSubstrate('0xcc'), self._folder.name).get('METADATA_5'), metadata)
@@ -1,14 +1,14 @@
 import unittest
 import pytest
 
-from substrateinterface import SubstrateInterface
 from tools.constants import WS_URL
+from tests.connection_pool import get_substrate
 
 
 @pytest.mark.substrate
 class TestMetadata(unittest.TestCase):
     def setUp(self):
-        self.substrate = SubstrateInterface(url=WS_URL)
+        self.substrate = get_substrate(WS_URL)
 
     def test_check_meta(self):
         metadata = self.substrate.get_block_metadata()
@@ -0,0 +1,108 @@
+import unittest
+import pytest
+
+from types import SimpleNamespace
+from eth_account import Account
+from substrateinterface import Keypair, KeypairType
+from substrateinterface.exceptions import SubstrateRequestException
+from tools.nonce_manager import NonceManager, is_nonce_error
+from tools.peaq_eth_utils import send_evm_transaction
+from tools.utils import execute_batch_without_wait
+
+
+class FakeChain():
+    """Returns the nonces of the node and fails the submissions in failures one after another"""
+
+    def __init__(self, nonce, failures=None):
+        self.nonce = nonce
+        self.failures = list(failures or [])
+        self.fetch_num = 0
+        self.sent_nonces = []
+
+    def fetch_nonce(self, addr):
+        self.fetch_num += 1
+        return self.nonce
+
+    def send(self, nonce):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent_nonces.append(nonce)
+        return f'0x{nonce:064x}'
+
+
+class FakeSubstrate():
+    def __init__(self, chain):
+        self.chain = chain
+
+    def compose_call(self, call_module, call_function, call_params):
+        return call_params
+
+    def create_signed_extrinsic(self, call, keypair, era, nonce, tip):
+        return nonce
+
+    def submit_extrinsic(self, nonce):
+        return SimpleNamespace(extrinsic_hash=self.chain.send(nonce))
+
+
+class FakeEth():
+    account = Account
+
+    def __init__(self, chain):
+        self.chain = chain
+
+    def send_raw_transaction(self, raw_tx):
+        return bytes.fromhex(self.chain.send(len(self.chain.sent_nonces))[2:])
+
+
+@pytest.mark.unit
+class TestNonceManager(unittest.TestCase):
+    def test_next_nonce_and_resync(self):
+        chain = FakeChain(5)
+        manager = NonceManager(chain.fetch_nonce)
+        self.assertEqual([manager.next_nonce('a') for i in range(3)], [5, 6, 7])
+        self.assertEqual(chain.fetch_num, 1)
+
+        chain.nonce = 6
+        manager.resync('a')
+        self.assertEqual(manager.next_nonce('a'), 6)
+        self.assertEqual(chain.fetch_num, 2)
+
+    def test_is_nonce_error(self):
+        self.assertTrue(is_nonce_error(SubstrateRequestException({'message': 'Transaction is outdated'})))
+        self.assertFalse(is_nonce_error(SubstrateRequestException({'message': 'Inability to pay some fees'})))
+
+    def _execute_batch(self, chain):
+        manager = NonceManager(chain.fetch_nonce)
+        batch = SimpleNamespace(substrate=FakeSubstrate(chain), keypair=Keypair.create_from_uri('//Alice'), batch=[])
+        return manager, lambda: execute_batch_without_wait(batch, manager)
+
+    def test_batch_resync_after_nonce_error(self):
+        chain = FakeChain(3, [SubstrateRequestException({'message': 'Invalid Transaction: Transaction is outdated'})])
+        manager, execute = self._execute_batch(chain)
+        chain.nonce = 4
+        execute()
+        self.assertEqual(chain.sent_nonces, [4])
+
+    def test_batch_resync_after_other_error(self):
+        chain = FakeChain(3, [SubstrateRequestException({'message': 'Inability to pay some fees'}), ConnectionError('closed')])
+        manager, execute = self._execute_batch(chain)
+        with self.assertRaises(SubstrateRequestException):
+            execute()
+        with self.assertRaises(ConnectionError):
+            execute()
+        # No gap is left by the failed submissions
+        execute()
+        self.assertEqual(chain.sent_nonces, [3])
+        self.assertEqual(chain.fetch_num, 3)
+
+    def test_evm_resync_after_other_error(self):
+        chain = FakeChain(0, [ValueError({'message': 'insufficient funds for gas * price + value'})])
+        manager = NonceManager(chain.fetch_nonce)
+        w3 = SimpleNamespace(eth=FakeEth(chain))
+        signer = Keypair.create_from_mnemonic(Keypair.generate_mnemonic(), crypto_type=KeypairType.ECDSA)
+        tx = {'to': signer.ss58_address, 'value': 0, 'gas': 21000, 'gasPrice': 10 ** 9, 'chainId': 9990}
+        with self.assertRaises(ValueError):
+            send_evm_transaction(tx, w3, signer, manager)
+        send_evm_transaction(tx, w3, signer, manager)
+        self.assertEqual(tx['nonce'], 0)
+        self.assertEqual(chain.fetch_num, 2)
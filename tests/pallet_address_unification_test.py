@@ -1,6 +1,6 @@
 import unittest
 import pytest
-from substrateinterface import SubstrateInterface, Keypair, KeypairType
+from substrateinterface import Keypair, KeypairType
 from tools.constants import WS_URL, ETH_URL
 from tools.constants import KP_GLOBAL_SUDO
 from tests.evm_utils import sign_and_submit_evm_transaction
@@ -14,9 +14,9 @@ from peaq.utils import ExtrinsicBatch
 from tools.peaq_eth_utils import calculate_asset_to_evm_address
 from tools.peaq_eth_utils import get_contract
 from peaq.utils import get_account_balance
-from web3 import Web3
 from peaq.eth import calculate_evm_account, calculate_evm_addr
 from tools.utils import batch_fund
+from tests.connection_pool import get_substrate, get_web3
 
 ABI_FILE = 'ETH/erc20/abi'
 FUND_NUMBER = 3 * 10 ** 18
@@ -51,7 +51,7 @@ def withdraw_evm_addr(substrate, kp_sub, addr_eth, num):
 
 def evm_erc20_trasfer(asset_id, kp_eth_src, kp_eth_dst, amount, eth_chain_id):
     erc20_addr = calculate_asset_to_evm_address(asset_id)
-    w3 = Web3(Web3.HTTPProvider(ETH_URL))
+    w3 = get_web3(ETH_URL)
     contract = get_contract(w3, erc20_addr, ABI_FILE)
     nonce = w3.eth.get_transaction_count(kp_eth_src.ss58_address)
     tx = contract.functions.transfer(kp_eth_dst.ss58_address, amount).build_transaction({
@@ -63,14 +63,15 @@ def evm_erc20_trasfer(asset_id, kp_eth_src, kp_eth_dst, amount, eth_chain_id):
 
 
 def get_eth_account_balance(eth_addr):
-    w3 = Web3(Web3.HTTPProvider(ETH_URL))
+    w3 = get_web3(ETH_URL)
     return w3.eth.get_balance(eth_addr)
 
 
 @pytest.mark.substrate
+@pytest.mark.serial
 class TestPalletEvmAccounts(unittest.TestCase):
     def setUp(self):
-        self._substrate = SubstrateInterface(url=WS_URL)
+        self._substrate = get_substrate(WS_URL)
         self._eth_chain_id = get_eth_chain_id(self._substrate)
 
     @pytest.mark.skip(reason="ED is 0 and then we don't delete any account")
@@ -3,10 +3,11 @@ import sys
 sys.path.append('./')
 import pytest
 
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 from tools.constants import WS_URL, KP_GLOBAL_SUDO
 from tools.asset import batch_create_asset, batch_set_metadata, batch_mint, get_valid_asset_id
 from tools.asset import get_asset_balance, convert_enum_to_asset_id
+from tests.connection_pool import get_substrate
 from peaq.utils import ExtrinsicBatch
 from peaq.sudo_extrinsic import fund
 
@@ -135,7 +136,7 @@ def batch_thaw(batch, kp_src, asset_id):
 @pytest.mark.substrate
 class pallet_assets_test(unittest.TestCase):
     def setUp(self):
-        self._substrate = SubstrateInterface(url=WS_URL)
+        self._substrate = get_substrate(WS_URL)
         self._kp_creator = Keypair.create_from_uri('//Alice')
         self._kp_admin = Keypair.create_from_uri('//Bob')
         fund(self._substrate, KP_GLOBAL_SUDO, self._kp_admin, 100000 * 10 ** 18)
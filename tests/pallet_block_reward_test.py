@@ -1,6 +1,7 @@
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 from tools.constants import WS_URL
 from tools.utils import set_block_reward_configuration
+from tests.connection_pool import get_substrate
 import unittest
 import pytest
 
@@ -12,7 +13,7 @@ WAIT_TIME_PERIOD = 12 * 3
 class TestPalletBlockReward(unittest.TestCase):
 
     def setUp(self):
-        self.substrate = SubstrateInterface(url=WS_URL)
+        self.substrate = get_substrate(WS_URL)
         self.kp_src = Keypair.create_from_uri('//Alice')
 
     def test_config(self):
@@ -1,7 +1,6 @@
 import unittest
 import pytest
 
-from substrateinterface import SubstrateInterface, Keypair
 from tools.utils import get_balance_reserve_value
 from tools.constants import WS_URL
 from peaq.utils import ExtrinsicBatch
@@ -11,6 +10,7 @@ from tools.runtime_upgrade import wait_until_block_height
 from tools.constants import PARACHAIN_WS_URL, RELAYCHAIN_WS_URL
 from peaq.utils import get_chain
 from tools.utils import get_modified_chain_spec
+from tests.connection_pool import get_substrate
 
 
 DID_MIN_DEPOSIT = {
@@ -21,12 +21,13 @@ DID_MIN_DEPOSIT = {
 
 
 @pytest.mark.substrate
+@pytest.mark.usefixtures('class_worker_kps')
 class TestPalletDid(unittest.TestCase):
     def setUp(self):
-        self.substrate = SubstrateInterface(url=WS_URL)
-        self.kp_src = Keypair.create_from_uri('//Alice')
-        wait_until_block_height(SubstrateInterface(url=RELAYCHAIN_WS_URL), 1)
-        wait_until_block_height(SubstrateInterface(url=PARACHAIN_WS_URL), 1)
+        self.substrate = get_substrate(WS_URL)
+        self.kp_src = self.worker_kps[0]
+        wait_until_block_height(get_substrate(RELAYCHAIN_WS_URL), 1)
+        wait_until_block_height(get_substrate(PARACHAIN_WS_URL), 1)
         self.chain_spec = get_chain(self.substrate)
         self.chain_spec = get_modified_chain_spec(self.chain_spec)
 
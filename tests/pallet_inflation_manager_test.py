@@ -1,6 +1,5 @@
 import pytest
 import unittest
-from substrateinterface import SubstrateInterface
 from tests.utils_func import is_krest_related_chain
 from tools.utils import get_modified_chain_spec
 from tools.constants import WS_URL
@@ -10,6 +9,7 @@ from peaq.utils import ExtrinsicBatch
 from tools.utils import get_event
 from tools.runtime_upgrade import wait_until_block_height
 from tests.utils_func import restart_parachain_and_runtime_upgrade
+from tests.connection_pool import get_substrate
 from enum import Enum
 from peaq.utils import get_chain
 import time
@@ -89,6 +89,7 @@ class InflationState(Enum):
 
 
 @pytest.mark.substrate
+@pytest.mark.serial
 class TestPalletInflationManager(unittest.TestCase):
     # Fetches storage at latest block unless a blocknumber is provided
     def _fetch_pallet_storage(self, storage_name, block_number=None):
@@ -102,9 +103,9 @@ class TestPalletInflationManager(unittest.TestCase):
 
     def setUp(self):
         restart_parachain_and_runtime_upgrade()
-        wait_until_block_height(SubstrateInterface(url=WS_URL), 1)
+        wait_until_block_height(get_substrate(WS_URL), 1)
 
-        self.substrate = SubstrateInterface(url=WS_URL)
+        self.substrate = get_substrate(WS_URL)
         self.detail_chain_spec = get_chain(self.substrate)
         self.chain_spec = get_modified_chain_spec(self.detail_chain_spec)
 
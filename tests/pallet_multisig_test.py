@@ -1,9 +1,10 @@
 import unittest
 import pytest
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 from tools.constants import WS_URL
 from tools.constants import KP_GLOBAL_SUDO
 from tools.utils import show_account, send_approval, send_proposal, get_as_multi_extrinsic_id
+from tests.connection_pool import get_substrate
 from peaq.extrinsic import transfer
 from peaq.utils import calculate_multi_sig
 from peaq.sudo_extrinsic import funds
@@ -16,7 +17,7 @@ TOKEN_NUM_BASE = 10 ** 18
 class PalletMultisig(unittest.TestCase):
 
     def setUp(self):
-        self.substrate = SubstrateInterface(url=WS_URL,)
+        self.substrate = get_substrate(WS_URL)
         self.kp_src = Keypair.create_from_mnemonic(Keypair.generate_mnemonic())
         self.kp_dst = Keypair.create_from_mnemonic(Keypair.generate_mnemonic())
         receipt = funds(
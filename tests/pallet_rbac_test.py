@@ -2,7 +2,7 @@ import traceback
 import sys
 import pytest
 
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 from tools.constants import WS_URL
 from peaq.sudo_extrinsic import fund
 from peaq.utils import ExtrinsicBatch
@@ -23,6 +23,7 @@ from tools.runtime_upgrade import wait_until_block_height
 from tools.constants import PARACHAIN_WS_URL, RELAYCHAIN_WS_URL
 from peaq.utils import get_chain
 from tools.utils import get_modified_chain_spec
+from tests.connection_pool import get_substrate
 import unittest
 
 
@@ -447,9 +448,9 @@ class TestPalletRBAC(unittest.TestCase):
         show_success_msg('verify_rpc_fail_disabled_id')
 
     def setUp(self):
-        self.substrate = SubstrateInterface(url=WS_URL)
-        wait_until_block_height(SubstrateInterface(url=RELAYCHAIN_WS_URL), 1)
-        wait_until_block_height(SubstrateInterface(url=PARACHAIN_WS_URL), 1)
+        self.substrate = get_substrate(WS_URL)
+        wait_until_block_height(get_substrate(RELAYCHAIN_WS_URL), 1)
+        wait_until_block_height(get_substrate(PARACHAIN_WS_URL), 1)
         self.chain_spec = get_chain(self.substrate)
         self.chain_spec = get_modified_chain_spec(self.chain_spec)
 
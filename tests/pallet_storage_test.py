@@ -2,12 +2,12 @@ import time
 import pytest
 from tools.constants import WS_URL
 from tools.utils import get_balance_reserve_value
-from substrateinterface import SubstrateInterface, Keypair
 from peaq.utils import ExtrinsicBatch
 from peaq.storage import storage_add_payload, storage_update_payload, storage_rpc_read
 from tools.utils import get_modified_chain_spec
 from tools.runtime_upgrade import wait_until_block_height
 from tools.constants import PARACHAIN_WS_URL, RELAYCHAIN_WS_URL
+from tests.connection_pool import get_substrate
 from peaq.utils import get_chain
 
 import unittest
@@ -29,13 +29,14 @@ def storage_remove_payload(batch, item_type):
 
 
 @pytest.mark.substrate
+@pytest.mark.usefixtures('class_worker_kps')
 class TestPalletStorage(unittest.TestCase):
 
     def setUp(self):
-        self._substrate = SubstrateInterface(url=WS_URL)
-        self._kp_src = Keypair.create_from_uri('//Alice')
-        wait_until_block_height(SubstrateInterface(url=RELAYCHAIN_WS_URL), 1)
-        wait_until_block_height(SubstrateInterface(url=PARACHAIN_WS_URL), 1)
+        self._substrate = get_substrate(WS_URL)
+        self._kp_src = self.worker_kps[0]
+        wait_until_block_height(get_substrate(RELAYCHAIN_WS_URL), 1)
+        wait_until_block_height(get_substrate(PARACHAIN_WS_URL), 1)
         self._chain_spec = get_chain(self._substrate)
         self._chain_spec = get_modified_chain_spec(self._chain_spec)
 
@@ -1,7 +1,8 @@
 import pytest
 import unittest
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 from tools.constants import WS_URL
+from tests.connection_pool import get_substrate
 from peaq.utils import ExtrinsicBatch
 
 
@@ -59,7 +60,7 @@ def service_deliver(substrate, kp_src, kp_dst, receipt, call):
 @pytest.mark.substrate
 class TestPalletTransaction(unittest.TestCase):
     def setUp(self):
-        self.substrate = SubstrateInterface(url=WS_URL)
+        self.substrate = get_substrate(WS_URL)
         self.kp_src = Keypair.create_from_uri('//Alice')
         self.kp_dst = Keypair.create_from_uri('//Bob//stash')
 
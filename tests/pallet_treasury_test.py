@@ -1,10 +1,11 @@
 import pytest
 
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 from tools.constants import WS_URL, TOKEN_NUM_BASE_DEV, KP_GLOBAL_SUDO
 from peaq.utils import show_extrinsic
 from peaq.utils import ExtrinsicBatch
 from tools.utils import batch_fund, get_event
+from tests.connection_pool import get_substrate
 import unittest
 import random
 
@@ -89,7 +90,7 @@ def spend(substrate, value, beneficiary):
 @pytest.mark.substrate
 class TestTreasury(unittest.TestCase):
     def setUp(self):
-        self.substrate = SubstrateInterface(url=WS_URL)
+        self.substrate = get_substrate(WS_URL)
 
     # To submit a spend proposal
     def propose_spend(self, value, beneficiary, kp_member):
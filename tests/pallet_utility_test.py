@@ -14,6 +14,7 @@ AMOUNT_TO_BE_TRANSFERED = 1
 
 @pytest.mark.skip(reason="Skip because of the reorg siutation")
 @pytest.mark.substrate
+@pytest.mark.serial
 class TestPalletUtility(unittest.TestCase):
 
     # source account
@@ -1,8 +1,9 @@
 import math
 import pytest
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 from tools.constants import WS_URL, TOKEN_NUM_BASE_DEV, KP_GLOBAL_SUDO
 from tools.utils import get_account_balance_locked
+from tests.connection_pool import get_substrate
 from peaq.utils import get_account_balance
 from peaq.sudo_extrinsic import funds
 from peaq.utils import wait_for_n_blocks
@@ -96,9 +97,10 @@ def get_schedule_index(substrate, kp_target):
 
 
 @pytest.mark.substrate
+@pytest.mark.serial
 class TestPalletVesting(unittest.TestCase):
     def setUp(self):
-        self._substrate = SubstrateInterface(url=WS_URL)
+        self._substrate = get_substrate(WS_URL)
         self._kp_user = Keypair.create_from_mnemonic(Keypair.generate_mnemonic())
         self._kp_source = Keypair.create_from_mnemonic(Keypair.generate_mnemonic())
         self._kp_target = Keypair.create_from_mnemonic(Keypair.generate_mnemonic())
@@ -1,5 +1,5 @@
 import pytest
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 from peaq.utils import get_chain
 from tools.utils import get_existential_deposit, wait_for_event
 from peaq.utils import ExtrinsicBatch
@@ -13,6 +13,7 @@ from tools.utils import get_event, get_modified_chain_spec
 from tools.constants import KP_COLLATOR, KP_GLOBAL_SUDO
 from tools.utils import set_block_reward_configuration
 from tools.constants import BLOCK_GENERATE_TIME
+from tests.connection_pool import get_substrate
 import unittest
 import time
 
@@ -67,6 +68,7 @@ def set_round(substrate, round_number):
 
 
 @pytest.mark.substrate
+@pytest.mark.serial
 class TestRewardDistribution(unittest.TestCase):
     _kp_bob = Keypair.create_from_uri('//Bob')
     _kp_eve = Keypair.create_from_uri('//Eve')
@@ -74,7 +76,7 @@ class TestRewardDistribution(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         restart_parachain_and_runtime_upgrade()
-        substrate = SubstrateInterface(url=WS_URL)
+        substrate = get_substrate(WS_URL)
         cls.ori_reward_config = substrate.query(
             module='BlockReward',
             storage_function='RewardDistributionConfigStorage',
@@ -90,14 +92,14 @@ class TestRewardDistribution(unittest.TestCase):
 
     @classmethod
     def tearDownClass(cls):
-        substrate = SubstrateInterface(url=WS_URL)
+        substrate = get_substrate(WS_URL)
         receipt = set_block_reward_configuration(substrate, cls.ori_reward_config.value)
         assert receipt.is_success, 'cannot setup the block reward configuration'
         receipt = set_round(substrate, cls.ori_round)
         assert receipt.is_success, 'cannot setup the round'
 
     def setUp(self):
-        self._substrate = SubstrateInterface(url=WS_URL)
+        self._substrate = get_substrate(WS_URL)
         self._chain_spec = get_chain(self._substrate)
         self._chain_spec = get_modified_chain_spec(self._chain_spec)
         self._fee_percentage = EOT_FEE_PERCENTAGE[self._chain_spec]
@@ -0,0 +1,80 @@
+import os
+import json
+import tempfile
+import unittest
+import pytest
+
+from tests.rpc_batch_test import FakeSubstrate
+from tools.block_archive_cache import enable_block_archive_cache
+from tools.rpc_batch import rpc_batch_request
+
+
+FINALIZED_NUM = 10
+
+
+def _answer(request):
+    def result(method, params):
+        if method == 'chain_getBlockHash':
+            return f'0x{params[0]:064x}'
+        return f'{method}@{params[-1]}'
+    return [[{'jsonrpc': '2.0', 'id': call['id'], 'result': result(call['method'], call['params'])} for call in request]]
+
+
+class FakeArchiveSubstrate(FakeSubstrate):
+    """Counts the calls sent in batches, the finalized head is asked through rpc_request"""
+
+    def __init__(self):
+        super().__init__(_answer)
+        self.batched = []
+        send = self.websocket.send
+
+        def counting_send(data):
+            self.batched += [call['method'] for call in json.loads(data)]
+            send(data)
+        self.websocket.send = counting_send
+
+    def rpc_request(self, method, params, result_handler=None):
+        if method == 'chain_getFinalizedHead':
+            return {'result': f'0x{FINALIZED_NUM:064x}'}
+        if method == 'chain_getHeader':
+            return {'result': {'number': hex(int(params[0], 16))}}
+        return super().rpc_request(method, params)
+
+
+def _block_hash(block_num):
+    return f'0x{block_num:064x}'
+
+
+@pytest.mark.unit
+class TestRpcBatchCache(unittest.TestCase):
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._folder.name, 'archive.sqlite')
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def _connect(self):
+        return enable_block_archive_cache(FakeArchiveSubstrate(), self._path)
+
+    def test_batch_results_are_stored(self):
+        calls = [('chain_getBlockHash', [5]), ('chain_getBlockHash', [12])]
+        substrate = self._connect()
+        rpc_batch_request(substrate, calls)
+        rpc_batch_request(substrate, [('state_getStorage', ['0x26aa', _block_hash(5)])])
+
+        # Only the finalized block is answered by the cache on the next connection
+        other = self._connect()
+        responses = rpc_batch_request(other, calls + [('state_getStorage', ['0x26aa', _block_hash(5)])])
+        self.assertEqual([response['result'] for response in responses], [
+            _block_hash(5), _block_hash(12), f'state_getStorage@{_block_hash(5)}'])
+        self.assertEqual(other.batched, ['chain_getBlockHash'])
+
+    def test_all_hits_send_nothing(self):
+        calls = [('chain_getBlockHash', [1]), ('chain_getBlockHash', [2])]
+        rpc_batch_request(self._connect(), calls)
+
+        other = self._connect()
+        responses = rpc_batch_request(other, calls)
+        self.assertEqual([response['result'] for response in responses], [_block_hash(1), _block_hash(2)])
+        self.assertEqual(other.batched, [])
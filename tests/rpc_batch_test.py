@@ -0,0 +1,145 @@
+import json
+import unittest
+import pytest
+from unittest.mock import patch
+
+from websocket import WebSocketTimeoutException
+from substrateinterface.exceptions import SubstrateRequestException
+from tools.rpc_batch import rpc_batch_request, RpcBatch, query_batch, GENESIS_PARENT_HASH
+
+
+class FakeWebsocket():
+    """Answers every sent message with reply(message), or with the queued messages first"""
+
+    def __init__(self, reply):
+        self._reply = reply
+        self._inbox = []
+        self.timeout = None
+
+    def gettimeout(self):
+        return self.timeout
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def send(self, data):
+        self._inbox += self._reply(json.loads(data))
+
+    def recv(self):
+        if not self._inbox:
+            raise WebSocketTimeoutException('Connection timed out')
+        return json.dumps(self._inbox.pop(0))
+
+
+class FakeSubstrate():
+    def __init__(self, reply):
+        self.url = 'ws://fake'
+        self.request_id = 1
+        self.websocket = FakeWebsocket(reply)
+        self.sent_one_by_one = []
+        self.reconnect_num = 0
+        setattr(self, '_SubstrateInterface__rpc_message_queue', [])
+
+    def connect_websocket(self):
+        self.reconnect_num += 1
+
+    def rpc_request(self, method, params):
+        self.sent_one_by_one.append(method)
+        if method == 'fail':
+            raise SubstrateRequestException({'message': 'failed'})
+        return {'jsonrpc': '2.0', 'id': 0, 'result': f'{method}{params}'}
+
+
+def _answer_batch(request):
+    subscription = {'jsonrpc': '2.0', 'method': 'chain_newHead', 'params': {'subscription': 'abc', 'result': {}}}
+    # Out of order, with a subscription update in between
+    return [subscription, [{'jsonrpc': '2.0', 'id': call['id'], 'result': f'{call["method"]}{call["params"]}'}
+                           for call in reversed(request)]]
+
+
+CALLS = [('chain_getBlockHash', [1]), ('chain_getBlockHash', [2])]
+EXPECTED = ['chain_getBlockHash[1]', 'chain_getBlockHash[2]']
+
+
+@pytest.mark.unit
+class TestRpcBatch(unittest.TestCase):
+    def test_batch_response(self):
+        substrate = FakeSubstrate(_answer_batch)
+        responses = rpc_batch_request(substrate, CALLS)
+        self.assertEqual([response['result'] for response in responses], EXPECTED)
+        self.assertEqual(substrate.sent_one_by_one, [])
+        # The subscription update is left for rpc_request
+        self.assertEqual(len(substrate._SubstrateInterface__rpc_message_queue), 1)
+        self.assertIsNone(substrate.websocket.timeout)
+
+    def test_fallback_on_null_id_error(self):
+        substrate = FakeSubstrate(lambda request: [
+            {'jsonrpc': '2.0', 'id': None, 'error': {'code': -32600, 'message': 'Batch requests are disabled'}}])
+        responses = rpc_batch_request(substrate, CALLS)
+        self.assertEqual([response['result'] for response in responses], EXPECTED)
+        self.assertEqual(len(substrate.sent_one_by_one), 2)
+
+    def test_fallback_on_timeout(self):
+        substrate = FakeSubstrate(lambda request: [])
+        responses = rpc_batch_request(substrate, CALLS)
+        self.assertEqual([response['result'] for response in responses], EXPECTED)
+        self.assertEqual(substrate.reconnect_num, 1)
+        self.assertIsNone(substrate.websocket.timeout)
+
+    def test_fallback_returns_errors(self):
+        substrate = FakeSubstrate(lambda request: [])
+        with RpcBatch(substrate) as batch:
+            ok = batch.add('chain_getBlockHash', [1])
+            failed = batch.add('fail', [])
+        self.assertEqual(ok.result, 'chain_getBlockHash[1]')
+        with self.assertRaises(SubstrateRequestException):
+            failed.result
+
+
+# Block 3 sets the new code, its own state reports version 2 but it is still executed with version 1
+UPGRADE_BLOCK = 3
+BLOCK_HASHES = [f'0x{block_num:064x}' for block_num in range(6)]
+
+
+def _answer_chain(request):
+    def result(method, params):
+        block_num = int(params[-1], 16)
+        if method == 'state_getStorage':
+            return f'0x{block_num:02x}'
+        if method == 'chain_getHeader':
+            return {'parentHash': BLOCK_HASHES[block_num - 1] if block_num else GENESIS_PARENT_HASH}
+        if method == 'state_getRuntimeVersion':
+            return {'specVersion': 2 if block_num >= UPGRADE_BLOCK else 1}
+    return [[{'jsonrpc': '2.0', 'id': call['id'], 'result': result(call['method'], call['params'])} for call in request]]
+
+
+class FakeChain(FakeSubstrate):
+    def __init__(self):
+        super().__init__(_answer_chain)
+        self.runtime_version = None
+        self.runtime_config = self.metadata = None
+
+    def create_storage_key(self, module, storage_function, params):
+        return type('Key', (), {'to_hex': lambda self: '0x26aa'})()
+
+    def init_runtime(self, block_hash):
+        # Decoded with the runtime of the parent, like SubstrateInterface.init_runtime
+        block_num = int(block_hash, 16)
+        self.runtime_version = 2 if block_num > UPGRADE_BLOCK else 1
+
+
+@pytest.mark.unit
+class TestQueryBatch(unittest.TestCase):
+    def test_query_across_upgrade(self):
+        substrate = FakeChain()
+
+        def create_key(*args, **kwargs):
+            version = substrate.runtime_version
+            return type('Key', (), {'decode_scale_value': lambda self, raw: (version, raw.to_hex())})()
+
+        with patch('tools.rpc_batch.StorageKey.create_from_storage_function', side_effect=create_key):
+            out = query_batch(substrate, 'System', 'Events', BLOCK_HASHES)
+
+        self.assertEqual(out, [
+            (1 if block_num <= UPGRADE_BLOCK else 2, f'0x{block_num:02x}') for block_num in range(len(BLOCK_HASHES))])
+        self.assertEqual(substrate.sent_one_by_one, [])
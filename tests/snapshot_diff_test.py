@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+import pytest
+
+from tools.snapshot_format import SnapshotWriter, SnapshotReader
+from tools.snapshot_diff import diff_map_items, diff_snapshots
+
+
+def _write_snapshot(path, round_length, accounts, extra_entry):
+    with SnapshotWriter(path) as writer:
+        writer.write_chain({'name': 'peaq-dev'})
+        writer.write_value('storage', 'ParachainStaking', 'Round', {'length': round_length})
+        writer.write_map('storage', 'System', 'Account', accounts.items())
+        if extra_entry:
+            writer.write_value('storage', 'PeaqDid', 'Version', 1)
+    return SnapshotReader(path)
+
+
+@pytest.mark.unit
+class TestSnapshotDiff(unittest.TestCase):
+    def test_diff_map_items(self):
+        items_a = [(f'key{i}', i) for i in range(50)]
+        items_b = [(f'key{i}', i * 2 if i % 10 == 0 else i) for i in range(5, 60)]
+        expected = sorted(
+            [(f'key{i}', 'removed', i, None) for i in range(5)] +
+            [(f'key{i}', 'changed', i, i * 2) for i in range(10, 50, 10)] +
+            [(f'key{i}', 'added', None, i * 2 if i % 10 == 0 else i) for i in range(50, 60)])
+        self.assertEqual(sorted(diff_map_items(items_a, items_b)), expected)
+        # The partitioned diff gives the same records
+        self.assertEqual(sorted(diff_map_items(items_a, items_b, partition_num=4)), expected)
+
+    def test_diff_snapshots(self):
+        with tempfile.TemporaryDirectory() as folder:
+            reader_a = _write_snapshot(
+                os.path.join(folder, 'a.jsonl'), 10, {'alice': 1, 'bob': 2}, False)
+            reader_b = _write_snapshot(
+                os.path.join(folder, 'b.jsonl.gz'), 20, {'alice': 1, 'bob': 3, 'dave': 4}, True)
+            records = [
+                (record['pallet'], record['entry'], record['key'], record['change'], record['a'], record['b'])
+                for record in diff_snapshots(reader_a, reader_b)]
+        self.assertEqual(sorted(records, key=str), sorted([
+            # A dict value is diffed key by key, like the maps of the pprint snapshots
+            ('ParachainStaking', 'Round', 'length', 'changed', 10, 20),
+            ('System', 'Account', 'bob', 'changed', 2, 3),
+            ('System', 'Account', 'dave', 'added', None, 4),
+            ('PeaqDid', 'Version', None, 'added', None, 1),
+        ], key=str))
+
+    def test_same_snapshot_has_no_diff(self):
+        with tempfile.TemporaryDirectory() as folder:
+            reader_a = _write_snapshot(os.path.join(folder, 'a.jsonl'), 10, {'alice': 1}, True)
+            reader_b = _write_snapshot(os.path.join(folder, 'b.jsonl'), 10, {'alice': 1}, True)
+            self.assertEqual(list(diff_snapshots(reader_a, reader_b)), [])
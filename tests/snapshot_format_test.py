@@ -0,0 +1,69 @@
+import gc
+import os
+import warnings
+import tempfile
+import unittest
+import pytest
+
+from tools.snapshot_format import SnapshotWriter, SnapshotReader, INDEX_SUFFIX
+
+
+CHAIN = {'name': 'peaq-dev', 'block_hash': '0x01'}
+ACCOUNTS = [(f'5Account{i}', {'nonce': i, 'data': {'free': i * 10 ** 18}}) for i in range(100)]
+
+
+@pytest.mark.unit
+class TestSnapshotFormat(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def _write(self, name):
+        path = os.path.join(self.folder.name, name)
+        with SnapshotWriter(path) as writer:
+            writer.write_chain(CHAIN)
+            writer.write_value('constant', 'Balances', 'ExistentialDeposit', 500)
+            writer.write_map('storage', 'System', 'Account', iter(ACCOUNTS))
+            writer.write_value('storage', 'ParachainStaking', 'Round', {'current': 3, 'length': 10})
+            writer.write_map('storage', 'PeaqDid', 'AttributeStore', [])
+        return path
+
+    def _check_round_trip(self, reader):
+        self.assertEqual(reader.get_chain(), CHAIN)
+        self.assertEqual(reader.get_value('constant', 'Balances', 'ExistentialDeposit'), 500)
+        self.assertEqual(list(reader.iter_items('storage', 'System', 'Account')), ACCOUNTS)
+        self.assertEqual(reader.get_item_num('storage', 'System', 'Account'), len(ACCOUNTS))
+        self.assertEqual(reader.get_value('storage', 'ParachainStaking', 'Round'), {'current': 3, 'length': 10})
+        self.assertEqual(reader.get_value('storage', 'PeaqDid', 'AttributeStore'), {})
+        self.assertEqual(list(reader.iter_sections()), [
+            ('chain', '', ''),
+            ('constant', 'Balances', 'ExistentialDeposit'),
+            ('storage', 'System', 'Account'),
+            ('storage', 'ParachainStaking', 'Round'),
+            ('storage', 'PeaqDid', 'AttributeStore'),
+        ])
+        self.assertEqual(sum(1 for _ in reader.iter_all()), 3 + len(ACCOUNTS))
+
+    def test_round_trip(self):
+        for name in ['peaq.jsonl', 'peaq.jsonl.gz']:
+            with self.subTest(name=name):
+                self._check_round_trip(SnapshotReader(self._write(name)))
+
+    def test_round_trip_without_index(self):
+        for name in ['peaq.jsonl', 'peaq.jsonl.gz']:
+            with self.subTest(name=name):
+                path = self._write(name)
+                os.remove(f'{path}{INDEX_SUFFIX}')
+                self._check_round_trip(SnapshotReader(path))
+
+    def test_files_are_closed(self):
+        for name in ['peaq.jsonl', 'peaq.jsonl.gz']:
+            with self.subTest(name=name):
+                path = self._write(name)
+                with warnings.catch_warnings(record=True) as caught:
+                    warnings.simplefilter('always', ResourceWarning)
+                    self._check_round_trip(SnapshotReader(path))
+                    gc.collect()
+                self.assertEqual([str(warning.message) for warning in caught if warning.category is ResourceWarning], [])
@@ -0,0 +1,91 @@
+import json
+import unittest
+import pytest
+from unittest.mock import patch
+
+from tests.rpc_batch_test import FakeSubstrate
+from tools.storage_series import get_storage_series
+
+
+# Block 4 sets the new code, its own state reports version 2 but it is still executed with version 1
+UPGRADE_BLOCK = 4
+BLOCK_NUM = 10
+KEY = '0x26aa'
+# Block number -> raw value written in that block
+CHANGES = {0: '0x01', 2: '0x02', 7: '0x03'}
+
+
+def _block_hash(block_num):
+    return f'0x{block_num:064x}'
+
+
+def _answer_versions(request):
+    return [[
+        {'jsonrpc': '2.0', 'id': call['id'], 'result': {'specVersion': 2 if int(call['params'][0], 16) >= UPGRADE_BLOCK else 1}}
+        for call in request]]
+
+
+class FakeChain(FakeSubstrate):
+    def __init__(self):
+        super().__init__(_answer_versions)
+        self.runtime_version = None
+        self.runtime_config = self.metadata = None
+        self.version_calls = 0
+        send = self.websocket.send
+
+        def counting_send(data):
+            self.version_calls += len(json.loads(data))
+            send(data)
+        self.websocket.send = counting_send
+
+    def rpc_request(self, method, params):
+        if method == 'chain_getBlockHash':
+            return {'result': [_block_hash(block_num) for block_num in params[0]]}
+        if method == 'state_queryStorage':
+            start, end = int(params[1], 16), int(params[2], 16)
+            # The first block lists all keys, like the node does
+            changes = {start: max(value for block_num, value in CHANGES.items() if block_num <= start)}
+            changes.update({block_num: value for block_num, value in CHANGES.items() if start < block_num <= end})
+            return {'result': [{'block': _block_hash(block_num), 'changes': [[KEY, value]]} for block_num, value in changes.items()]}
+        raise ValueError(f'Unexpected {method}')
+
+    def init_runtime(self, block_hash):
+        # Decoded with the runtime of the parent, like SubstrateInterface.init_runtime
+        self.runtime_version = 2 if int(block_hash, 16) > UPGRADE_BLOCK else 1
+
+
+class FakeStorageKey():
+    pallet = 'System'
+    storage_function = 'Account'
+    params = ['5F']
+
+    def to_hex(self):
+        return KEY
+
+
+@pytest.mark.unit
+class TestStorageSeries(unittest.TestCase):
+    def _get_series(self, substrate, start, end, chunk_size):
+        def create_key(*args, **kwargs):
+            version = substrate.runtime_version
+            return type('Key', (), {'decode_scale_value': lambda self, raw: type('Value', (), {'value': (version, raw.to_hex())})()})()
+
+        with patch('tools.storage_series.StorageKey.create_from_storage_function', side_effect=create_key):
+            return get_storage_series(substrate, [FakeStorageKey()], start, end, chunk_size)
+
+    def test_decoded_with_parent_runtime(self):
+        substrate = FakeChain()
+        series = self._get_series(substrate, 0, BLOCK_NUM - 1, 4)
+        expected = {}
+        for block_num in range(BLOCK_NUM):
+            value = max(value for changed_num, value in CHANGES.items() if changed_num <= block_num)
+            expected[block_num] = [(1 if block_num <= UPGRADE_BLOCK else 2, value)]
+        self.assertEqual(series, expected)
+        # Only the upgrade is bisected, not every block asked
+        self.assertLess(substrate.version_calls, BLOCK_NUM)
+
+    def test_range_without_upgrade(self):
+        substrate = FakeChain()
+        series = self._get_series(substrate, 6, 9, 256)
+        self.assertEqual(series, {block_num: [(2, '0x02' if block_num < 7 else '0x03')] for block_num in range(6, 10)})
+        self.assertEqual(substrate.version_calls, 2)
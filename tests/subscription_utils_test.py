@@ -0,0 +1,95 @@
+import time
+import unittest
+import pytest
+from unittest.mock import patch
+
+from websocket import WebSocketTimeoutException
+from tools.subscription_utils import wait_for_new_heads
+
+
+class FakeWebsocket():
+    def __init__(self):
+        self.timeout = 5
+
+    def gettimeout(self):
+        return self.timeout
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+
+class FakeSubstrate():
+    """Announces heads[0], heads[1], ... to a subscription, the socket times out after the last one"""
+
+    def __init__(self, heads, head_interval=0):
+        self.url = 'ws://fake'
+        self.websocket = FakeWebsocket()
+        self.heads = heads
+        self.head_interval = head_interval
+        self.unsubscribed = []
+
+    def rpc_request(self, method, params, result_handler=None):
+        if method == 'chain_unsubscribeNewHeads':
+            self.unsubscribed.append(params[0])
+            return {'result': True}
+        for update_nr, block_num in enumerate(self.heads):
+            time.sleep(self.head_interval)
+            out = result_handler({'params': {'result': {'number': hex(block_num)}}}, update_nr, 'sub')
+            if out is not None:
+                return out
+        raise WebSocketTimeoutException('Connection timed out')
+
+
+class FakeHttpSubstrate():
+    def __init__(self, heads):
+        self.url = 'http://fake'
+        self.websocket = None
+        self._heads = heads
+
+    def get_block_number(self, block_hash):
+        return self._heads.pop(0) if len(self._heads) > 1 else self._heads[0]
+
+
+def _endless_heads():
+    block_num = 0
+    while True:
+        block_num += 1
+        yield block_num
+
+
+@pytest.mark.unit
+class TestWaitForNewHeads(unittest.TestCase):
+    def test_handler_value_unsubscribes(self):
+        substrate = FakeSubstrate([1, 2, 3, 4])
+        out = wait_for_new_heads(substrate, lambda block_num: 'found' if block_num == 3 else None, 10)
+        self.assertEqual(out, 'found')
+        self.assertEqual(substrate.unsubscribed, ['sub'])
+        self.assertEqual(substrate.websocket.timeout, 5)
+
+    def test_deadline_passes_while_heads_arrive(self):
+        substrate = FakeSubstrate(_endless_heads(), head_interval=0.01)
+        seen = []
+        out = wait_for_new_heads(substrate, lambda block_num: seen.append(block_num), 0.05)
+        self.assertIsNone(out)
+        self.assertGreater(len(seen), 1)
+        self.assertEqual(substrate.unsubscribed, ['sub'])
+
+    def test_socket_timeout(self):
+        substrate = FakeSubstrate([1, 2])
+        self.assertIsNone(wait_for_new_heads(substrate, lambda block_num: None, 10))
+        self.assertEqual(substrate.unsubscribed, ['sub'])
+        self.assertEqual(substrate.websocket.timeout, 5)
+
+    def test_http_polls_the_head(self):
+        substrate = FakeHttpSubstrate([1, 1, 2, 3])
+        seen = []
+
+        def handler(block_num):
+            seen.append(block_num)
+            return 'found' if block_num == 3 else None
+
+        with patch('tools.subscription_utils.HEAD_POLL_PERIOD', 0):
+            self.assertEqual(wait_for_new_heads(substrate, handler, 10), 'found')
+            self.assertIsNone(wait_for_new_heads(FakeHttpSubstrate([1]), lambda block_num: None, 0.01))
+        # Every head is handled once
+        self.assertEqual(seen, [1, 2, 3])
@@ -1,12 +1,35 @@
 import tools.utils  # noqa: F401
-from substrateinterface import SubstrateInterface
+from substrateinterface import SubstrateInterface, ExtrinsicReceipt
+from scalecodec.types import GenericCall
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import blake2b
+import threading
 import os
 import datetime
+from tools.parallel_utils import get_worker_id, is_parallel_run
 import json
 from tools.constants import PARACHAIN_WS_URL
 
 old_submit_extrinsic = SubstrateInterface.submit_extrinsic
 substrate_all_weight_fee_data = {}
+substrate_fee_weight_failures = []
+# One worker, so the captures share one connection and do not compete with the tests
+_fee_weight_executor = ThreadPoolExecutor(1)
+_fee_weight_futures = []
+_fee_weight_local = threading.local()
+_fee_weight_lock = threading.Lock()
+
+
+def _get_call_arg(call, name):
+    # Decoded calls list their args, the ones composed for submit_extrinsic keep the dict of compose_call
+    args = call['call_args']
+    if isinstance(args, dict):
+        return args[name]
+    return next(arg['value'] for arg in args if arg['name'] == name)
+
+
+def _get_call_value(call):
+    return call.value if isinstance(call, GenericCall) else call
 
 
 def compose_extrinsic_name(call):
@@ -14,35 +37,35 @@ def compose_extrinsic_name(call):
     function = call['call_function']
     extrinsic_name = f'{module}.{function}'
     if module == 'Sudo' and function == 'sudo':
-        inner_call = call['call_args'][0]['value']
+        inner_call = _get_call_value(_get_call_arg(call, 'call'))
         composed_inner_name = compose_extrinsic_name(inner_call)
         return f'[Sudo.sudo.{composed_inner_name}]'
     if module != 'Utility' and function != 'batch_all':
         return extrinsic_name
 
-    inner_names = [compose_extrinsic_name(call) for call in call['call_args'][0]['value']]
+    inner_names = [compose_extrinsic_name(_get_call_value(call)) for call in _get_call_arg(call, 'calls')]
     extrinsic_name += f'({",".join(inner_names)})'
 
     return extrinsic_name
 
 
-def get_transaction_fee(substrate, extrinsic_idx, block_hash):
-    events = substrate.get_events(block_hash)
+def get_extrinsic_call(extrinsic):
+    """A decoded extrinsic keeps its call under 'call', a signed one built by create_signed_extrinsic at the top level"""
+    return extrinsic.value.get('call', extrinsic.value)
+
+
+def get_transaction_fee(events):
+    """events are the ones triggered by the extrinsic"""
     for event in events:
-        if event.value['extrinsic_idx'] != extrinsic_idx:
-            continue
         if event.value['module_id'] != 'TransactionPayment' or \
            event.value['event_id'] != 'TransactionFeePaid':
             continue
-        return event['event'][1][1].value['actual_fee'], event['event'][1][1].value['tip']
+        return event.value['attributes']['actual_fee'], event.value['attributes']['tip']
 
 
-def get_transaction_weight(substrate, extrinsic_idx, block_hash):
-    events = substrate.get_events(block_hash)
-
+def get_transaction_weight(events):
+    """events are the ones triggered by the extrinsic"""
     for event in events:
-        if event.value['extrinsic_idx'] != extrinsic_idx:
-            continue
         if event.value['module_id'] != 'System' or \
            event.value['phase'] != 'ApplyExtrinsic' or \
            'dispatch_info' not in event.value['attributes']:
@@ -51,19 +74,25 @@ def get_transaction_weight(substrate, extrinsic_idx, block_hash):
         return event.value['attributes']['dispatch_info']['weight']['ref_time']
 
 
-def monkey_submit_extrinsic_for_fee_weight(self, extrinsic, wait_for_inclusion, wait_for_finalization):
-    receipt = old_submit_extrinsic(self, extrinsic, wait_for_inclusion, wait_for_finalization)
-    if self.url != PARACHAIN_WS_URL:
-        return receipt
+def _get_fee_weight_substrate():
+    # The test owns the connection of the receipt, the worker thread uses its own one
+    if not hasattr(_fee_weight_local, 'substrate'):
+        _fee_weight_local.substrate = SubstrateInterface(url=PARACHAIN_WS_URL)
+    return _fee_weight_local.substrate
 
-    block_hash = receipt.block_hash
-    block = self.get_block(block_hash)
-    for extrinsic in block['extrinsics']:
-        if f'0x{extrinsic.extrinsic_hash.hex()}' != receipt.extrinsic_hash:
-            continue
-        name = compose_extrinsic_name(extrinsic.value['call'])
-        fee, tip = get_transaction_fee(self, receipt.extrinsic_idx, block_hash)
-        weight = get_transaction_weight(self, receipt.extrinsic_idx, block_hash)
+
+def _find_extrinsic_idx(substrate, block_hash, extrinsic_hash):
+    # Hash the raw extrinsics instead of decoding the whole block
+    for idx, data in enumerate(substrate.rpc_request('chain_getBlock', [block_hash])['result']['block']['extrinsics']):
+        if f'0x{blake2b(bytes.fromhex(data[2:]), digest_size=32).hexdigest()}' == extrinsic_hash:
+            return idx
+    raise Exception(f'Extrinsic {extrinsic_hash} not found in the block {block_hash}')
+
+
+def record_fee_weight(name, events):
+    fee, tip = get_transaction_fee(events)
+    weight = get_transaction_weight(events)
+    with _fee_weight_lock:
         if name not in substrate_all_weight_fee_data:
             substrate_all_weight_fee_data[name] = []
 
@@ -73,23 +102,57 @@ def monkey_submit_extrinsic_for_fee_weight(self, extrinsic, wait_for_inclusion,
             'weight': weight
         })
 
-        break
-    else:
-        raise Exception('Extrinsic not found in the block')
 
+def _capture_fee_weight(name, block_hash, extrinsic_hash):
+    try:
+        substrate = _get_fee_weight_substrate()
+        receipt = ExtrinsicReceipt(
+            substrate, extrinsic_hash=extrinsic_hash, block_hash=block_hash,
+            extrinsic_idx=_find_extrinsic_idx(substrate, block_hash, extrinsic_hash))
+        record_fee_weight(name, receipt.triggered_events)
+    except Exception as e:
+        # The chain can be relaunched before the worker gets to the extrinsic, the report lists what is missing
+        print(f'Cannot capture the fee/weight of {extrinsic_hash} in {block_hash}: {e}')
+        with _fee_weight_lock:
+            substrate_fee_weight_failures.append({
+                'extrinsic': name,
+                'extrinsic_hash': extrinsic_hash,
+                'block_hash': block_hash,
+                'error': str(e),
+            })
+
+
+def monkey_submit_extrinsic_for_fee_weight(self, extrinsic, wait_for_inclusion, wait_for_finalization):
+    receipt = old_submit_extrinsic(self, extrinsic, wait_for_inclusion, wait_for_finalization)
+    if self.url != PARACHAIN_WS_URL or not receipt.block_hash:
+        return receipt
+
+    # The events are fetched on the worker thread with its own connection, the test keeps going
+    _fee_weight_futures.append(_fee_weight_executor.submit(
+        _capture_fee_weight,
+        compose_extrinsic_name(get_extrinsic_call(extrinsic)), receipt.block_hash, receipt.extrinsic_hash))
     return receipt
 
 
+def wait_fee_weight_capture():
+    for future in _fee_weight_futures:
+        future.result()
+    _fee_weight_futures.clear()
+
+
 def generate_substrate_weight_fee_report():
+    wait_fee_weight_capture()
     # get date by format "YYYY-MM-DD-HH-MM"
     now = datetime.datetime.now()
     date = now.strftime("%Y-%m-%d-%H-%M")
 
     folder = os.path.realpath("reports")
+    # Every pytest-xdist worker writes its own report
+    if is_parallel_run():
+        date = f'{date}-{get_worker_id()}'
     report_file = f"substrate_weight_fee_summary_{date}.json"
 
-    if not os.path.exists(folder):
-        os.makedirs(folder)
+    os.makedirs(folder, exist_ok=True)
 
     report_path = os.path.join(folder, report_file)
     summary_data = process_weight_fee_data()
@@ -99,6 +162,12 @@ def generate_substrate_weight_fee_report():
     print('')
     print(f"Weight/fee data saved to {report_path}")
 
+    if substrate_fee_weight_failures:
+        failure_path = os.path.join(folder, f"substrate_weight_fee_failures_{date}.json")
+        with open(failure_path, "w") as f:
+            json.dump(substrate_fee_weight_failures, f, indent=4)
+        print(f"{len(substrate_fee_weight_failures)} extrinsics are not captured, saved to {failure_path}")
+
 
 def process_weight_fee_data():
     summary_data = {}
@@ -1,7 +1,5 @@
 import pytest
 import unittest
-from substrateinterface import SubstrateInterface
-from web3 import Web3
 from tools.constants import WS_URL, ETH_URL
 from tools.peaq_eth_utils import get_eth_info
 from tools.runtime_upgrade import wait_until_block_height
@@ -9,14 +7,15 @@ from tests.evm_sc.event import EventSCBehavior
 from peaq.utils import ExtrinsicBatch
 from tools.constants import KP_GLOBAL_SUDO
 from tools.coretime_utils import get_parachain_id, setup_coretime
+from tests.connection_pool import get_substrate, get_web3
 
 
 @pytest.mark.eth
 class TestEVMEventOnly(unittest.TestCase):
     def setUp(self):
-        wait_until_block_height(SubstrateInterface(url=WS_URL), 3)
-        self._substrate = SubstrateInterface(url=WS_URL)
-        self._w3 = Web3(Web3.HTTPProvider(ETH_URL))
+        wait_until_block_height(get_substrate(WS_URL), 3)
+        self._substrate = get_substrate(WS_URL)
+        self._w3 = get_web3(ETH_URL)
         self._kp_src = get_eth_info()
 
         # Setup coretime cores
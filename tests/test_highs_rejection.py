@@ -9,22 +9,25 @@ Expected behavior: Malleable signatures with s > n/2 should be rejected
 """
 
 import unittest
+import pytest
 import sys
 import os
 from web3 import Web3
 from eth_account import Account
 import rlp
 from eth_utils import to_bytes
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 
 # Add parent directory to path to find modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from tools.constants import ETH_URL, WS_URL
+from tests.connection_pool import get_substrate, get_web3
 from peaq.eth import calculate_evm_account
 from peaq.utils import ExtrinsicBatch
 
 
+@pytest.mark.serial
 class TestHighSRejection(unittest.TestCase):
     """Test that high s-values are properly rejected"""
 
@@ -32,7 +35,7 @@ class TestHighSRejection(unittest.TestCase):
         """Test that malleable signatures with high s-values are rejected"""
 
         # Connect to blockchain
-        w3 = Web3(Web3.HTTPProvider(ETH_URL))
+        w3 = get_web3(ETH_URL)
         self.assertTrue(w3.is_connected(), "Should connect to blockchain")
 
         # Test account
@@ -40,7 +43,7 @@ class TestHighSRejection(unittest.TestCase):
         account = Account.from_key(private_key)
 
         # Fund the test account using substrate sudo
-        substrate = SubstrateInterface(url=WS_URL)
+        substrate = get_substrate(WS_URL)
         alice = Keypair.create_from_uri('//Alice')
 
         # Convert EVM address to substrate account
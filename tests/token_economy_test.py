@@ -1,7 +1,7 @@
 import unittest
 import pytest
 
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 from tools.utils import get_modified_chain_spec
 from tools.constants import WS_URL, ACA_WS_URL
 from peaq.utils import get_block_height, get_block_hash, get_chain
@@ -9,6 +9,7 @@ from tests.utils_func import restart_parachain_and_runtime_upgrade
 from tools.runtime_upgrade import wait_until_block_height
 from tools.utils import get_event, get_account_balance
 from tools.constants import KP_GLOBAL_SUDO
+from tests.connection_pool import get_substrate
 from peaq.utils import ExtrinsicBatch
 from tests import utils_func as TestUtils
 
@@ -148,7 +149,7 @@ def skip_test_total_issuance():
     # If it's peaq-dev-fork, we don't need to test because it's already updated at 0.0.17
     # If it's peaq-network-fork, we don't need to test because it's already updated at 0.0.6
 
-    substrate = SubstrateInterface(url=WS_URL)
+    substrate = get_substrate(WS_URL)
     chain_spec = get_chain(substrate)
     return 'krest-network-fork' != chain_spec
 
@@ -166,12 +167,12 @@ class TokenEconomyTest(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         restart_parachain_and_runtime_upgrade()
-        wait_until_block_height(SubstrateInterface(url=WS_URL), 1)
+        wait_until_block_height(get_substrate(WS_URL), 1)
 
     def setUp(self):
-        wait_until_block_height(SubstrateInterface(url=WS_URL), 2)
-        wait_until_block_height(SubstrateInterface(url=ACA_WS_URL), 2)
-        self._substrate = SubstrateInterface(url=WS_URL)
+        wait_until_block_height(get_substrate(WS_URL), 2)
+        wait_until_block_height(get_substrate(ACA_WS_URL), 2)
+        self._substrate = get_substrate(WS_URL)
         current_height = get_block_height(self._substrate)
         self._block_hash = get_block_hash(self._substrate, current_height)
         self._chain_spec = get_chain(self._substrate)
@@ -9,9 +9,12 @@ from tools.runtime_upgrade import wait_until_block_height
 from tools.runtime_upgrade import fund_account
 from tools.runtime_upgrade import do_runtime_upgrade_only
 from tools.runtime_upgrade import update_xcm_default_version
-from substrateinterface import SubstrateInterface
 from tools.xcm_setup import setup_hrmp_channel
 from peaq.utils import get_account_balance
+from peaq.utils import ExtrinsicBatch
+from tools.utils import batch_fund
+from tests.connection_pool import get_substrate, reset_connection_pool
+from tools.parallel_utils import bump_chain_generation
 
 
 def is_runtime_upgrade_test():
@@ -24,12 +27,16 @@ def get_runtime_upgrade_path():
 
 def restart_with_setup():
     restart_parachain_launch()
-    wait_until_block_height(SubstrateInterface(url=RELAYCHAIN_WS_URL), 1)
+    # The pooled connections point to the chain which is gone
+    reset_connection_pool()
+    # The balances of the worker keypairs are gone too, every worker funds them again
+    bump_chain_generation()
+    wait_until_block_height(get_substrate(RELAYCHAIN_WS_URL), 1)
     setup_hrmp_channel(RELAYCHAIN_WS_URL)
-    wait_until_block_height(SubstrateInterface(url=WS_URL), 1)
-    if get_account_balance(SubstrateInterface(url=WS_URL), KP_GLOBAL_SUDO.ss58_address) < 0.5 * 10 ** 18:
+    wait_until_block_height(get_substrate(WS_URL), 1)
+    if get_account_balance(get_substrate(WS_URL), KP_GLOBAL_SUDO.ss58_address) < 0.5 * 10 ** 18:
         fund_account()
-    substrate = SubstrateInterface(url=WS_URL)
+    substrate = get_substrate(WS_URL)
     update_xcm_default_version(substrate)
 
 
@@ -46,27 +53,34 @@ def restart_parachain_and_runtime_upgrade():
 
 
 def is_not_dev_chain():
-    ws = SubstrateInterface(url=WS_URL)
+    ws = get_substrate(WS_URL)
     chain_name = get_chain(ws)
     return chain_name not in ['peaq-dev', 'peaq-dev-fork']
 
 
 def is_not_peaq_chain():
-    ws = SubstrateInterface(url=WS_URL)
+    ws = get_substrate(WS_URL)
     chain_name = get_chain(ws)
     return chain_name not in ['peaq-network', 'peaq-network-fork']
 
 
 def is_krest_related_chain():
-    ws = SubstrateInterface(url=WS_URL)
+    ws = get_substrate(WS_URL)
     chain_name = get_chain(ws)
     return chain_name in ['krest-network', 'krest-network-fork']
 
 
 def is_local_new_chain():
-    substrate = SubstrateInterface(url=WS_URL)
+    substrate = get_substrate(WS_URL)
     chain_spec = get_chain(substrate)
 
     return 'peaq-dev-fork' != chain_spec and \
         'krest-network-fork' != chain_spec and \
         'peaq-network-fork' != chain_spec
+
+
+def fund_worker_keypairs(substrate, kps, amount):
+    batch = ExtrinsicBatch(substrate, KP_GLOBAL_SUDO)
+    for kp in kps:
+        batch_fund(batch, kp, amount)
+    return batch.execute()
@@ -4,13 +4,14 @@ from tools.constants import WS_URL, ACA_WS_URL
 from tools.constants import ACA_PD_CHAIN_ID
 from tools.constants import PARACHAIN_WS_URL
 from tools.runtime_upgrade import wait_until_block_height
-from substrateinterface import SubstrateInterface, Keypair
+from substrateinterface import Keypair
 from peaq.utils import ExtrinsicBatch
 from tools.constants import KP_GLOBAL_SUDO
 from peaq.utils import get_account_balance
 from tools.asset import get_valid_asset_id
 from tools.utils import get_modified_chain_spec
 from tools.peaq_eth_utils import generate_random_hex
+from tests.connection_pool import get_substrate
 from peaq.did import did_rpc_read
 from peaq.utils import get_chain
 import pytest
@@ -23,11 +24,11 @@ class TestXCMSend(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         restart_parachain_and_runtime_upgrade()
-        wait_until_block_height(SubstrateInterface(url=PARACHAIN_WS_URL), 1)
+        wait_until_block_height(get_substrate(PARACHAIN_WS_URL), 1)
 
     def setUp(self):
-        self.si_peaq = SubstrateInterface(url=WS_URL)
-        wait_until_block_height(SubstrateInterface(url=PARACHAIN_WS_URL), 1)
+        self.si_peaq = get_substrate(WS_URL)
+        wait_until_block_height(get_substrate(PARACHAIN_WS_URL), 1)
         self.setup_sibling_parachain_account()
 
     # Just calculate the sibling parachain account by moonbeam's xcm-utils tool
@@ -214,8 +215,8 @@ class TestXCMSend(unittest.TestCase):
 
     @pytest.mark.xcm
     def test_xcm_send_from_substrate_transfer(self):
-        self.si_peaq = SubstrateInterface(url=WS_URL)
-        self.si_aca = SubstrateInterface(url=ACA_WS_URL)
+        self.si_peaq = get_substrate(WS_URL)
+        self.si_aca = get_substrate(ACA_WS_URL)
 
         self.aca_fund(self.si_aca, KP_GLOBAL_SUDO, self.sibling_parachain_addr, 10000 * 10 ** 18)
 
@@ -238,8 +239,8 @@ class TestXCMSend(unittest.TestCase):
 
     @pytest.mark.xcm
     def test_xcm_send_from_substrate_asset_create(self):
-        self.si_peaq = SubstrateInterface(url=WS_URL)
-        self.si_aca = SubstrateInterface(url=ACA_WS_URL)
+        self.si_peaq = get_substrate(WS_URL)
+        self.si_aca = get_substrate(ACA_WS_URL)
 
         self.aca_fund(self.si_aca, KP_GLOBAL_SUDO, self.sibling_parachain_addr, 10000 * 10 ** 18)
 
@@ -273,8 +274,8 @@ class TestXCMSend(unittest.TestCase):
 
     @pytest.mark.xcm
     def test_xcm_send_from_substrate_did_create_fail(self):
-        self.si_peaq = SubstrateInterface(url=WS_URL)
-        self.si_aca = SubstrateInterface(url=ACA_WS_URL)
+        self.si_peaq = get_substrate(WS_URL)
+        self.si_aca = get_substrate(ACA_WS_URL)
 
         self.aca_fund(self.si_aca, KP_GLOBAL_SUDO, self.sibling_parachain_addr, 10000 * 10 ** 18)
 
@@ -27,6 +27,7 @@ from tools.zenlink import compose_zdex_create_lppair, compose_zdex_add_liquidity
 from tools.asset import wait_for_account_asset_change_wrap
 from tools.asset import get_balance_account_from_pallet_balance
 from tools.asset import get_tokens_account_from_pallet_assets
+from tests.connection_pool import get_substrate
 from peaq.utils import get_chain
 
 
@@ -300,14 +301,14 @@ class TestXCMTransfer(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         restart_parachain_and_runtime_upgrade()
-        wait_until_block_height(SubstrateInterface(url=RELAYCHAIN_WS_URL), 3)
-        wait_until_block_height(SubstrateInterface(url=PARACHAIN_WS_URL), 3)
-        wait_until_block_height(SubstrateInterface(url=ACA_WS_URL), 3)
+        wait_until_block_height(get_substrate(RELAYCHAIN_WS_URL), 3)
+        wait_until_block_height(get_substrate(PARACHAIN_WS_URL), 3)
+        wait_until_block_height(get_substrate(ACA_WS_URL), 3)
 
     def setUp(self):
-        self.si_peaq = SubstrateInterface(url=WS_URL,)
+        self.si_peaq = get_substrate(WS_URL)
         self.si_relay = SubstrateInterface(url=RELAYCHAIN_WS_URL, type_registry_preset='rococo')
-        self.si_aca = SubstrateInterface(url=ACA_WS_URL)
+        self.si_aca = get_substrate(ACA_WS_URL)
         self.alice = Keypair.create_from_uri('//Alice')
 
         self.chain_spec = get_chain(self.si_peaq)
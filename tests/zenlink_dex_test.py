@@ -6,7 +6,6 @@ import pytest
 sys.path.append('./')
 
 from peaq.sudo_extrinsic import funds
-from substrateinterface import SubstrateInterface
 from tools.constants import PARACHAIN_WS_URL, KP_GLOBAL_SUDO, URI_GLOBAL_SUDO
 from tools.utils import show_test, show_title, show_subtitle, wait_for_event
 from tools.utils import get_existential_deposit
@@ -20,6 +19,7 @@ from tools.asset import RELAY_METADATA
 from tools.asset import get_valid_asset_id, batch_mint
 from tools.zenlink import compose_zdex_create_lppair, compose_zdex_lppair_params, compose_zdex_add_liquidity
 from tools.zenlink import calc_deadline
+from tests.connection_pool import get_substrate
 
 
 # Technical constants
@@ -459,11 +459,12 @@ def zenlink_empty_lp_swap_test(si_peaq, asset_id):
 
 
 @pytest.mark.substrate
+@pytest.mark.serial
 class TestZenlinkDex(unittest.TestCase):
     def setUp(self):
-        wait_until_block_height(SubstrateInterface(url=PARACHAIN_WS_URL), 1)
+        wait_until_block_height(get_substrate(PARACHAIN_WS_URL), 1)
         show_title('Zenlink-DEX-Protocol Test')
-        self.si_peaq = SubstrateInterface(url=PARACHAIN_WS_URL)
+        self.si_peaq = get_substrate(PARACHAIN_WS_URL)
         funds(self.si_peaq, KP_GLOBAL_SUDO,
               [into_keypair(URI_MOON).ss58_address, into_keypair(URI_MARS).ss58_address],
               100000 * 10 ** 18)
@@ -472,7 +473,7 @@ class TestZenlinkDex(unittest.TestCase):
     def test_create_pair_swap(self):
         show_title('Zenlink-DEX-Protocol create pair swap Test')
         try:
-            si_peaq = SubstrateInterface(url=PARACHAIN_WS_URL)
+            si_peaq = get_substrate(PARACHAIN_WS_URL)
             # [TODO] It can only be asset 1...
             asset_id = 1
             setup_asset_if_not_exist(si_peaq, KP_GLOBAL_SUDO, asset_id, RELAY_METADATA)
@@ -488,7 +489,7 @@ class TestZenlinkDex(unittest.TestCase):
     def test_booststrap(self):
         show_title('Zenlink-DEX-Protocol boostrap Test')
         try:
-            si_peaq = SubstrateInterface(url=PARACHAIN_WS_URL)
+            si_peaq = get_substrate(PARACHAIN_WS_URL)
             asset_id = get_valid_asset_id(si_peaq)
             setup_asset_if_not_exist(si_peaq, KP_GLOBAL_SUDO, asset_id, ACA_METADATA)
 
@@ -504,7 +505,7 @@ class TestZenlinkDex(unittest.TestCase):
     def test_empty_lp_swap(self):
         show_title('Zenlink-DEX-Protocol empty lp swap Test')
         try:
-            si_peaq = SubstrateInterface(url=PARACHAIN_WS_URL)
+            si_peaq = get_substrate(PARACHAIN_WS_URL)
             asset_id = get_valid_asset_id(si_peaq)
             setup_asset_if_not_exist(si_peaq, KP_GLOBAL_SUDO, asset_id, RELAY_METADATA, 100)
 
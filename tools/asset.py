@@ -3,7 +3,8 @@ from tools.utils import get_peaq_chain_id
 from tools.constants import ACA_PD_CHAIN_ID
 from peaq.utils import get_account_balance
 from tools.constants import BLOCK_GENERATE_TIME
-import time
+from tools.subscription_utils import wait_for_new_heads
+from tools.storage_series import iter_raw_storage_series
 
 
 PEAQ_PD_CHAIN_ID = get_peaq_chain_id()
@@ -25,6 +26,7 @@ ACA_ASSET_LOCATION = {
 }
 
 UNITS_PER_SECOND = 5 * 10 ** 5
+ASSET_CHANGE_TIMEOUT = 10 * BLOCK_GENERATE_TIME
 ACA_METADATA = {
     'name': 'ACA',
     'symbol': 'ACA',
@@ -233,15 +235,40 @@ def get_balance_account_from_pallet_balance(substrate, addr, _, block_hash=None)
     return get_account_balance(substrate, addr, block_hash)
 
 
+# The storage each balance getter reads, so a block range can be fetched in one request
+ASSET_STORAGE_KEYS = {
+    get_tokens_account_from_pallet_assets:
+        lambda substrate, addr, asset_id: substrate.create_storage_key('Assets', 'Account', [asset_id, addr]),
+    get_tokens_account_from_pallet_tokens:
+        lambda substrate, addr, asset_id: substrate.create_storage_key('Tokens', 'Accounts', [addr, asset_id]),
+    get_balance_account_from_pallet_balance:
+        lambda substrate, addr, _: substrate.create_storage_key('System', 'Account', [addr]),
+}
+
+
+def _iter_changed_blocks(substrate, addr, asset_id, start_block, end_block, func):
+    """Yields (block_num, block_hash) of start_block and of every later block where the storage of func changes"""
+    if func not in ASSET_STORAGE_KEYS:
+        for i in range(start_block, end_block + 1):
+            yield i, substrate.get_block_hash(i)
+        return
+
+    key = ASSET_STORAGE_KEYS[func](substrate, addr, asset_id).to_hex()
+    prev_value = None
+    for i, block_hash, values in iter_raw_storage_series(substrate, [key], start_block, end_block):
+        if i == start_block or values[key] != prev_value:
+            yield i, block_hash
+        prev_value = values[key]
+
+
 def wait_for_account_asset_change_wrap(substrate, addr, asset_id, prev_token, block_num, func):
     block_hash = substrate.get_block_hash(block_num)
     if not prev_token:
         prev_token = func(substrate, addr, asset_id, block_hash)
 
-    # go to check preivous setting
+    # go to check preivous setting, only the blocks where the raw storage changes are decoded
     now_block = substrate.get_block_number(None)
-    for i in range(block_num, now_block + 1):
-        block_hash = substrate.get_block_hash(i)
+    for i, block_hash in _iter_changed_blocks(substrate, addr, asset_id, block_num, now_block, func):
         print(f"Checking block {i} for account {addr} asset {asset_id}")
         print(f"hash {block_hash}")
         now_token = func(substrate, addr, asset_id, block_hash)
@@ -249,18 +276,22 @@ def wait_for_account_asset_change_wrap(substrate, addr, asset_id, prev_token, bl
             print(f"Account {addr} balance {prev_token} changed to {now_token} on peaq at block {i}")
             return now_token
 
-    # Check next
-    count = 0
-    now_block = substrate.get_block_number(None)
-    while func(substrate, addr, asset_id) == prev_token and count < 10:
-        time.sleep(BLOCK_GENERATE_TIME)
-        now_block = substrate.get_block_number(None)
-        print(f"Waiting for account {addr} asset {asset_id} balance change, current block {now_block}")
-        count += 1
-    now_token = func(substrate, addr, asset_id)
-    if now_token == prev_token:
+    # Check next, every new head is checked once when it is announced
+    checked = {'block': now_block}
+
+    def check_new_blocks(head_block):
+        for i in range(checked['block'] + 1, head_block + 1):
+            now_token = func(substrate, addr, asset_id, substrate.get_block_hash(i))
+            if now_token != prev_token:
+                print(f"Account {addr} balance {prev_token} changed to {now_token} on peaq at block {i}")
+                return now_token
+        checked['block'] = max(checked['block'], head_block)
+        print(f"Waiting for account {addr} asset {asset_id} balance change, current block {head_block}")
+        return None
+
+    now_token = wait_for_new_heads(substrate, check_new_blocks, ASSET_CHANGE_TIMEOUT)
+    if now_token is None:
         raise IOError(f"Account {addr} balance {prev_token} not changed on peaq")
-    print(f"Account {addr} balance {prev_token} changed to {now_token} on peaq at block {now_block}")
     return now_token
 
 
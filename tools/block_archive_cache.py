@@ -0,0 +1,162 @@
+import json
+import time
+import sqlite3
+import threading
+
+
+# RPCs whose result only depends on the block hash passed as the last parameter
+CACHEABLE_METHODS = {
+    'chain_getBlock',
+    'chain_getHeader',
+    'chain_getRuntimeVersion',
+    'state_getRuntimeVersion',
+    'state_getMetadata',
+    'state_getStorage',
+    'state_getStorageAt',
+    'state_getKeysPaged',
+    'state_queryStorageAt',
+    'state_call',
+}
+FINALIZED_REFRESH_PERIOD = 6
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS finalized (number INTEGER PRIMARY KEY, hash TEXT NOT NULL UNIQUE)',
+    'CREATE TABLE IF NOT EXISTS rpc_cache ('
+    '    method TEXT NOT NULL, params TEXT NOT NULL, block_hash TEXT NOT NULL, result TEXT NOT NULL,'
+    '    PRIMARY KEY (method, params))',
+    'CREATE INDEX IF NOT EXISTS rpc_cache_block_hash ON rpc_cache (block_hash)',
+]
+
+
+class BlockArchiveCache():
+    """
+    SQLite cache of the RPC results of finalized blocks (bodies, headers, events, the storage
+    the block author is derived from, ...), keyed by block hash with a number -> hash index.
+    Finalized data never changes, so the cache can be shared by every tool and run.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self):
+        # sqlite3 connections cannot be shared between threads
+        if not hasattr(self._local, 'conn'):
+            self._local.conn = sqlite3.connect(self._path, timeout=60)
+            self._local.conn.execute('PRAGMA journal_mode=WAL')
+        return self._local.conn
+
+    def close(self):
+        """Closes the SQLite connection of the calling thread"""
+        if hasattr(self._local, 'conn'):
+            self._local.conn.close()
+            del self._local.conn
+
+    def get_finalized_hash(self, number):
+        row = self._connect().execute('SELECT hash FROM finalized WHERE number = ?', (number,)).fetchone()
+        return row[0] if row else None
+
+    def is_finalized_hash(self, block_hash):
+        return self._connect().execute('SELECT 1 FROM finalized WHERE hash = ?', (block_hash,)).fetchone() is not None
+
+    def set_finalized_hash(self, number, block_hash):
+        with self._connect() as conn:
+            conn.execute('INSERT OR IGNORE INTO finalized (number, hash) VALUES (?, ?)', (number, block_hash))
+
+    def get(self, method, params):
+        row = self._connect().execute(
+            'SELECT result FROM rpc_cache WHERE method = ? AND params = ?', (method, json.dumps(params))).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, method, params, block_hash, result):
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO rpc_cache (method, params, block_hash, result) VALUES (?, ?, ?, ?)',
+                (method, json.dumps(params), block_hash, json.dumps(result)))
+
+
+class _FinalizedHeight():
+    def __init__(self, original_rpc_request):
+        self._rpc_request = original_rpc_request
+        self._number = -1
+        self._refresh_at = 0
+
+    def get(self, wanted):
+        """Returns the finalized height, only asks the node when wanted is above the known one"""
+        if wanted > self._number and time.time() >= self._refresh_at:
+            block_hash = self._rpc_request('chain_getFinalizedHead', [])['result']
+            self._number = int(self._rpc_request('chain_getHeader', [block_hash])['result']['number'], 16)
+            self._refresh_at = time.time() + FINALIZED_REFRESH_PERIOD
+        return self._number
+
+
+class BlockArchiveRpc():
+    """
+    Answers the RPCs of finalized blocks from the cache and stores the responses of the node,
+    the block hash of a call is trusted as finalized when it was resolved by chain_getBlockHash.
+    """
+
+    def __init__(self, cache, original_rpc_request):
+        self._cache = cache
+        self._finalized_height = _FinalizedHeight(original_rpc_request)
+
+    def _is_block_hash_call(self, method, params):
+        return method == 'chain_getBlockHash' and len(params) > 0 and isinstance(params[0], int)
+
+    def _is_finalized_call(self, method, params):
+        return method in CACHEABLE_METHODS and len(params) > 0 and isinstance(params[-1], str) and \
+            self._cache.is_finalized_hash(params[-1])
+
+    def close(self):
+        self._cache.close()
+
+    def get(self, method, params):
+        """Returns the cached response, None if the call has to be sent to the node"""
+        if self._is_block_hash_call(method, params):
+            block_hash = self._cache.get_finalized_hash(params[0])
+            return {'jsonrpc': '2.0', 'result': block_hash} if block_hash else None
+        if self._is_finalized_call(method, params):
+            result = self._cache.get(method, params)
+            return None if result is None else {'jsonrpc': '2.0', 'result': result}
+        return None
+
+    def store(self, method, params, response):
+        if self._is_block_hash_call(method, params):
+            if response.get('result') and params[0] <= self._finalized_height.get(params[0]):
+                self._cache.set_finalized_hash(params[0], response['result'])
+        elif self._is_finalized_call(method, params) and response.get('result') is not None:
+            self._cache.set(method, params, params[-1], response['result'])
+
+
+def enable_block_archive_cache(substrate, path):
+    """Serves the RPCs of finalized blocks of this connection from the cache at path"""
+    original_rpc_request = substrate.rpc_request
+    archive_rpc = BlockArchiveRpc(BlockArchiveCache(path), original_rpc_request)
+
+    def cached_rpc_request(method, params, result_handler=None):
+        if result_handler is not None or not params:
+            return original_rpc_request(method, params, result_handler)
+
+        response = archive_rpc.get(method, params)
+        if response is not None:
+            return response
+        response = original_rpc_request(method, params)
+        archive_rpc.store(method, params, response)
+        return response
+
+    substrate.rpc_request = cached_rpc_request
+    substrate.block_archive_cache_path = path
+    substrate.block_archive_rpc = archive_rpc
+    return substrate
+
+
+def get_block_archive_cache_path(substrate):
+    return getattr(substrate, 'block_archive_cache_path', None)
+
+
+def get_block_archive_rpc(substrate):
+    """The cache of the connection for the calls sent outside rpc_request, None if it has none"""
+    return getattr(substrate, 'block_archive_rpc', None)
@@ -1,8 +1,15 @@
 import sys
 sys.path.append('.')
 
-
+import math
+from collections import defaultdict
 from peaq.utils import get_block_height
+from tools.storage_series import get_storage_series
+from tools.block_range_scanner import scan_blocks, SCANNER_WORKER_NUM
+from tools.stats_utils import get_percentiles
+
+
+BLOCK_TIME_PERCENTILES = [50, 90, 99]
 
 
 def get_block_timestamp(substrate, height):
@@ -11,12 +18,75 @@ def get_block_timestamp(substrate, height):
     return create_time
 
 
-def get_block_creation_times(substrate, block_traverse_num):
+def get_block_timestamps(substrate, start, end):
+    """Returns {block_num: Timestamp::Now in ms} of the blocks in [start, end], read with batched storage queries"""
+    storage_key = substrate.create_storage_key('Timestamp', 'Now')
+    return {block_num: row[0] for block_num, row in get_storage_series(substrate, [storage_key], start, end).items()}
+
+
+def get_block_authors(substrate, start, end, worker_num=SCANNER_WORKER_NUM):
+    """Returns {block_num: author} of the blocks in [start, end], fetched over a connection pool"""
+    def fetch(substrate, block_num):
+        return substrate.get_block_header(substrate.get_block_hash(block_num), include_author=True).get('author')
+    return dict(scan_blocks(substrate, start, end + 1, fetch, worker_num))
+
+
+def get_slot_duration(substrate):
+    """Aura slots are twice the minimum timestamp period"""
+    return substrate.get_constant('Timestamp', 'MinimumPeriod').value * 2
+
+
+def _summarize(diff_times):
+    diff_times = sorted(diff_times)
+    mean = sum(diff_times) / len(diff_times)
+    out = {
+        'count': len(diff_times),
+        'mean': mean,
+        'stddev': math.sqrt(sum((diff - mean) ** 2 for diff in diff_times) / len(diff_times)),
+        'min': diff_times[0],
+        'max': diff_times[-1],
+    }
+    out.update({f'p{percent}': value for percent, value in get_percentiles(diff_times, BLOCK_TIME_PERCENTILES).items()})
+    return out
+
+
+def get_block_time_stats(substrate, block_traverse_num, slot_ms=None, include_author=False, worker_num=SCANNER_WORKER_NUM):
+    """
+    Block time statistics (ms) of the last block_traverse_num blocks:
+    mean, stddev, min, max, percentiles and the slots missed between two blocks.
+    With include_author, 'authors' breaks the block times and the missed slots down
+    per author of the block that ends the interval.
+    """
     latest_height = get_block_height(substrate)
     if latest_height < block_traverse_num:
         raise IOError(f'Please wait longer, current block height {latest_height} < {block_traverse_num}')
-    create_times = [get_block_timestamp(substrate, height)
-                    for height in range(latest_height - block_traverse_num, latest_height)]
-    diff_times = [x - y for x, y in zip(create_times[1:], create_times)]
-    ave_time = sum(diff_times) / len(diff_times)
-    return ave_time
+    if slot_ms is None:
+        slot_ms = get_slot_duration(substrate)
+
+    start = latest_height - block_traverse_num
+    timestamps = get_block_timestamps(substrate, start, latest_height - 1)
+    diff_times = {
+        block_num: timestamps[block_num] - timestamps[block_num - 1]
+        for block_num in range(start + 1, latest_height)}
+    missed_slots = {block_num: max(round(diff / slot_ms) - 1, 0) for block_num, diff in diff_times.items()}
+
+    out = _summarize(diff_times.values())
+    out['slot_ms'] = slot_ms
+    out['missed_slots'] = sum(missed_slots.values())
+    if not include_author:
+        return out
+
+    authors = get_block_authors(substrate, start + 1, latest_height - 1, worker_num)
+    author_diff_times = defaultdict(list)
+    author_missed_slots = defaultdict(int)
+    for block_num, diff in diff_times.items():
+        author_diff_times[authors[block_num]].append(diff)
+        author_missed_slots[authors[block_num]] += missed_slots[block_num]
+    out['authors'] = {
+        author: dict(_summarize(diffs), missed_slots=author_missed_slots[author])
+        for author, diffs in author_diff_times.items()}
+    return out
+
+
+def get_block_creation_times(substrate, block_traverse_num):
+    return get_block_time_stats(substrate, block_traverse_num)['mean']
@@ -0,0 +1,130 @@
+import weakref
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from substrateinterface import SubstrateInterface
+from websocket import WebSocketException
+from tools.block_archive_cache import enable_block_archive_cache, get_block_archive_cache_path
+
+
+SCANNER_WORKER_NUM = 8
+# Number of blocks fetched ahead of the consumer
+SCANNER_PREFETCH_NUM = 64
+SCANNER_RETRY_TIMES = 3
+# Blocks fetched per call of a batch fetcher
+SCANNER_BATCH_SIZE = 50
+
+_SCANNERS = weakref.WeakKeyDictionary()
+
+
+class BlockRangeScanner():
+    """
+    Fetches the blocks of a range over a pool of connections and yields them in order.
+    fetch(substrate, block_num) runs on a worker connection and returns what the consumer
+    needs from that block, so the round trips of many blocks overlap instead of adding up.
+    The workers and their connections are kept across scans until close().
+    """
+
+    def __init__(self, url, fetch=None, worker_num=SCANNER_WORKER_NUM, prefetch=SCANNER_PREFETCH_NUM, cache_path=None):
+        self._url = url
+        self._cache_path = cache_path
+        self._fetch = fetch
+        self._worker_num = worker_num
+        self._prefetch = max(prefetch, worker_num)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._substrates = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _get_substrate(self, reconnect=False):
+        if reconnect and hasattr(self._local, 'substrate'):
+            self._local.substrate.close()
+            del self._local.substrate
+        if not hasattr(self._local, 'substrate'):
+            substrate = SubstrateInterface(url=self._url)
+            if self._cache_path:
+                enable_block_archive_cache(substrate, self._cache_path)
+            with self._lock:
+                self._substrates.append(substrate)
+            self._local.substrate = substrate
+        return self._local.substrate
+
+    def _fetch_with_retry(self, fetch, block_num):
+        # Only a broken connection is worth another try, a request error would fail the same way again
+        for i in range(SCANNER_RETRY_TIMES):
+            try:
+                return fetch(self._get_substrate(i > 0), block_num)
+            except (ConnectionError, WebSocketException) as e:
+                print(f'Fetch block {block_num} failed, retry {i + 1}/{SCANNER_RETRY_TIMES}: {e}')
+        raise IOError(f'Cannot fetch block {block_num}')
+
+    def scan(self, start, end, fetch=None, prefetch=None):
+        """Yields (block_num, fetched) for every block in [start, end), in order, fetch overrides the one of the scanner"""
+        fetch = fetch or self._fetch
+        prefetch = max(prefetch or self._prefetch, self._worker_num)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self._worker_num)
+            executor = self._executor
+
+        pending = deque()
+        next_block = start
+        try:
+            while pending or next_block < end:
+                while next_block < end and len(pending) < prefetch:
+                    pending.append((next_block, executor.submit(self._fetch_with_retry, fetch, next_block)))
+                    next_block += 1
+                block_num, future = pending.popleft()
+                yield block_num, future.result()
+        finally:
+            # The consumer can stop early, do not fetch the blocks it will never read
+            for _, future in pending:
+                future.cancel()
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            substrates, self._substrates = self._substrates, []
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        for substrate in substrates:
+            substrate.close()
+
+
+def get_block_range_scanner(substrate, worker_num=SCANNER_WORKER_NUM):
+    """
+    One scanner per connection and worker number, so repeated scans reuse its workers and connections.
+    The worker connections share the block archive cache of substrate, if it has one,
+    and are closed together with substrate.
+    """
+    scanners = _SCANNERS.setdefault(substrate, {})
+    if worker_num not in scanners:
+        scanner = BlockRangeScanner(substrate.url, worker_num=worker_num, cache_path=get_block_archive_cache_path(substrate))
+        weakref.finalize(substrate, scanner.close)
+        scanners[worker_num] = scanner
+    return scanners[worker_num]
+
+
+def scan_blocks(substrate, start, end, fetch, worker_num=SCANNER_WORKER_NUM):
+    return get_block_range_scanner(substrate, worker_num).scan(start, end, fetch)
+
+
+def scan_block_batches(substrate, start, end, fetch_batch, batch_size=SCANNER_BATCH_SIZE, worker_num=SCANNER_WORKER_NUM):
+    """
+    Same as scan_blocks, but fetch_batch(substrate, block_nums) gets up to batch_size blocks at once,
+    e.g. with one JSON-RPC batch, and returns one fetched entry per block number.
+    """
+    def fetch(substrate, batch_idx):
+        batch_start = start + batch_idx * batch_size
+        return fetch_batch(substrate, list(range(batch_start, min(batch_start + batch_size, end))))
+
+    batch_num = (end - start + batch_size - 1) // batch_size
+    scanner = get_block_range_scanner(substrate, worker_num)
+    for batch_idx, fetched in scanner.scan(0, batch_num, fetch, prefetch=worker_num * 2):
+        yield from zip(range(start + batch_idx * batch_size, end), fetched)
@@ -4,8 +4,10 @@ sys.path.append('./')
 
 from substrateinterface import SubstrateInterface
 from peaq.utils import get_block_height, get_block_hash
+from tools.block_archive_cache import enable_block_archive_cache
 import argparse
 from collections import Counter
+import requests
 import pprint
 pp = pprint.PrettyPrinter(indent=4)
 
@@ -21,6 +23,18 @@ def get_current_collator(substrate, num=80):
     return Counter(collators)
 
 
+def get_tracked_collator(tracker_url):
+    """Reads the latest session authorship from tools/collator_tracker.py instead of fetching the blocks"""
+    response = requests.get(f'{tracker_url}/session', timeout=10)
+    try:
+        response.raise_for_status()
+    except requests.HTTPError as e:
+        # The tracker explains the failure in the body, e.g. no session is tracked yet
+        raise IOError(f'Tracker {tracker_url} returns no session: {response.json().get("error", e)}') from e
+    session = response.json()
+    return set(session['missing']), Counter(session['authors'])
+
+
 def get_session_validator(substrate):
     session_info = substrate.query(
         module='Session',
@@ -32,13 +46,33 @@ def get_session_validator(substrate):
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Get storage and constants from a Substrate chain')
-    parser.add_argument('-r', '--runtime', type=str, required=True, help='Your runtime websocket endpoint')
+    parser.add_argument('-r', '--runtime', type=str, required=False, help='Your runtime websocket endpoint, not needed with --tracker')
+    parser.add_argument('--cache', type=str, required=False, help='SQLite file to cache the finalized blocks in')
+    parser.add_argument(
+        '-t', '--tracker', type=str, required=False,
+        help='URL of a running tools/collator_tracker.py, e.g. http://127.0.0.1:8935, reports its latest session')
 
     args = parser.parse_args()
 
+    if not args.tracker and not args.runtime:
+        parser.error('-r/--runtime is required without --tracker')
+
+    if args.tracker:
+        try:
+            missing, collator_set = get_tracked_collator(args.tracker)
+        except (IOError, ValueError) as e:
+            print(e)
+            sys.exit(1)
+        print(f'Validators who didn\'t produce block: {missing}')
+        print('Block author count:')
+        pp.pprint(collator_set)
+        sys.exit(0)
+
     substrate = SubstrateInterface(
         url=args.runtime,
     )
+    if args.cache:
+        enable_block_archive_cache(substrate, args.cache)
     validators = get_session_validator(substrate)
     collator_set = get_current_collator(substrate, 16 * 4)
     print(f'Validators who didn\'t produce block: {validators - set(collator_set.keys())}')
@@ -0,0 +1,206 @@
+import sys
+sys.path.append('./')
+
+import os
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from substrateinterface import SubstrateInterface
+from substrateinterface.exceptions import SubstrateRequestException
+from websocket import WebSocketException
+from tools.block_archive_cache import enable_block_archive_cache, get_block_archive_rpc
+
+
+TRACKER_STATE_PATH = 'collator_tracker.json'
+TRACKER_PORT = 8935
+# Sessions kept in memory and on disk, older ones are dropped
+TRACKER_SESSION_NUM = 16
+# The state is written to disk every this many blocks
+TRACKER_SAVE_BLOCK_NUM = 10
+TRACKER_RECONNECT_SECONDS = 6
+
+
+class CollatorTracker():
+    """
+    Keeps the per-session block author counts up to date from the finalized heads,
+    every block is only fetched once, also across restarts through the state file.
+    """
+
+    def __init__(self, url, state_path=TRACKER_STATE_PATH, session_num=TRACKER_SESSION_NUM, cache_path=None):
+        self._url = url
+        self._state_path = state_path
+        self._session_num = session_num
+        self._cache_path = cache_path
+        self._lock = threading.Lock()
+        self._substrate = None
+        self._state = self._load_state()
+
+    def _load_state(self):
+        if not os.path.exists(self._state_path):
+            return {'last_block': None, 'sessions': {}}
+        with open(self._state_path) as f:
+            state = json.load(f)
+        print(f'Resume from block {state["last_block"]}, {len(state["sessions"])} sessions in {self._state_path}')
+        return state
+
+    def _save_state(self):
+        with self._lock:
+            data = json.dumps(self._state, indent=4)
+        tmp_path = f'{self._state_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, self._state_path)
+
+    def _close(self):
+        if self._substrate is None:
+            return
+        archive_rpc = get_block_archive_rpc(self._substrate)
+        if archive_rpc:
+            archive_rpc.close()
+        self._substrate.close()
+        self._substrate = None
+
+    def _connect(self):
+        # Every reconnect replaces the connection, the old one and its cache handle are closed first
+        self._close()
+        self._substrate = SubstrateInterface(url=self._url)
+        if self._cache_path:
+            enable_block_archive_cache(self._substrate, self._cache_path)
+
+    def get_state(self):
+        with self._lock:
+            return json.loads(json.dumps(self._state))
+
+    def get_session(self, session_idx=None):
+        """Returns the author counts and the validators without blocks of a session, the latest one by default"""
+        with self._lock:
+            if not self._state['sessions']:
+                return None
+            if session_idx is None:
+                session_idx = max(self._state['sessions'], key=int)
+            session = self._state['sessions'].get(str(session_idx))
+            if session is None:
+                return None
+            return {
+                'session': int(session_idx),
+                'first_block': session['first_block'],
+                'last_block': session['last_block'],
+                'authors': dict(session['authors']),
+                'missing': sorted(set(session['validators']) - set(session['authors'])),
+            }
+
+    def _track_block(self, block_num):
+        substrate = self._substrate
+        block_hash = substrate.get_block_hash(block_num)
+        author = substrate.get_block_header(block_hash, include_author=True).get('author')
+        session_idx = str(substrate.query('Session', 'CurrentIndex', block_hash=block_hash).value)
+
+        with self._lock:
+            sessions = self._state['sessions']
+            if session_idx not in sessions:
+                validators = substrate.query('Session', 'Validators', block_hash=block_hash).value
+                sessions[session_idx] = {
+                    'first_block': block_num, 'last_block': block_num, 'validators': validators, 'authors': {}}
+                for old_idx in sorted(sessions, key=int)[:-self._session_num]:
+                    del sessions[old_idx]
+            session = sessions[session_idx]
+            session['authors'][author] = session['authors'].get(author, 0) + 1
+            session['last_block'] = block_num
+            self._state['last_block'] = block_num
+
+    def _catch_up(self, finalized_num):
+        """Tracks the blocks after the last tracked one until finalized_num, the finalized heads can skip blocks"""
+        last_block = self._state['last_block']
+        start = finalized_num if last_block is None else last_block + 1
+        for block_num in range(start, finalized_num + 1):
+            self._track_block(block_num)
+            if block_num % TRACKER_SAVE_BLOCK_NUM == 0 or block_num == finalized_num:
+                self._save_state()
+        if start <= finalized_num:
+            print(f'Tracked until block {finalized_num}: {self.get_session()}')
+
+    def backfill(self, block_num):
+        """Starts a new state block_num blocks before the finalized head"""
+        if self._state['last_block'] is not None:
+            return
+        self._connect()
+        finalized_num = self._substrate.get_block_number(self._substrate.get_chain_finalised_head())
+        self._state['last_block'] = max(finalized_num - block_num, 0)
+
+    def run(self):
+        """Follows the finalized heads forever, reconnects and catches up after a connection failure"""
+        def result_handler(message, update_nr, subscription_id):
+            self._catch_up(int(message['params']['result']['number'], 16))
+
+        while True:
+            listener = None
+            try:
+                # The blocks are fetched on their own connection, the subscription one only receives the heads
+                self._connect()
+                listener = SubstrateInterface(url=self._url)
+                listener.rpc_request('chain_subscribeFinalizedHeads', [], result_handler=result_handler)
+            except (ConnectionError, WebSocketException, SubstrateRequestException) as e:
+                print(f'Connection to {self._url} failed: {e}, reconnect in {TRACKER_RECONNECT_SECONDS} seconds')
+                time.sleep(TRACKER_RECONNECT_SECONDS)
+            finally:
+                if listener:
+                    listener.close()
+
+
+def _make_handler(tracker):
+    class TrackerHandler(BaseHTTPRequestHandler):
+        """
+        GET /sessions: every tracked session
+        GET /session: the latest session
+        GET /session/<idx>: one session
+        """
+
+        def do_GET(self):
+            parts = self.path.strip('/').split('/')
+            if parts == ['sessions']:
+                self._reply(200, tracker.get_state())
+            elif parts[0] == 'session' and len(parts) <= 2:
+                session = tracker.get_session(parts[1] if len(parts) == 2 else None)
+                self._reply(200 if session else 404, session or {'error': 'session is not tracked'})
+            else:
+                self._reply(404, {'error': f'unknown path {self.path}'})
+
+        def _reply(self, code, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return TrackerHandler
+
+
+def serve_tracker(tracker, host, port):
+    server = ThreadingHTTPServer((host, port), _make_handler(tracker))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f'Serve the collator authorship on http://{host}:{port}/session')
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Track the block authors per session and serve them over HTTP')
+    parser.add_argument('-r', '--runtime', type=str, required=True, help='Your runtime websocket endpoint')
+    parser.add_argument('-s', '--state', type=str, default=TRACKER_STATE_PATH, help='JSON file the tracked sessions are kept in')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='HTTP listen address')
+    parser.add_argument('-p', '--port', type=int, default=TRACKER_PORT, help='HTTP listen port')
+    parser.add_argument('--session-num', type=int, default=TRACKER_SESSION_NUM, help='Number of sessions to keep')
+    parser.add_argument('--backfill', type=int, default=0, help='Blocks before the finalized head to track on a new state')
+    parser.add_argument('--cache', type=str, required=False, help='SQLite file to cache the finalized blocks in')
+
+    args = parser.parse_args()
+
+    tracker = CollatorTracker(args.runtime, args.state, args.session_num, args.cache)
+    tracker.backfill(args.backfill)
+    serve_tracker(tracker, args.host, args.port)
+    tracker.run()
@@ -0,0 +1,104 @@
+import time
+import weakref
+from collections import OrderedDict
+
+
+# Number of blocks whose decoded events are kept per connection
+EVENT_INDEX_BLOCK_NUM = 256
+# Seconds the finalized height is trusted before it is asked again
+FINALIZED_REFRESH_PERIOD = 6
+
+_EVENT_INDEXES = weakref.WeakKeyDictionary()
+
+
+class EventIndex():
+    """
+    Per-connection cache of decoded events.
+
+    Events are keyed by block hash, so they never become stale. The block number -> hash
+    mapping is only remembered for finalized blocks because unfinalized heights can be reorged.
+    Both maps are LRU bounded by max_blocks.
+    The index only keeps a weak reference to its connection, so it is dropped together with it.
+    """
+
+    def __init__(self, substrate, max_blocks=EVENT_INDEX_BLOCK_NUM):
+        self._substrate_ref = weakref.ref(substrate)
+        self._max_blocks = max_blocks
+        # block hash -> [(module_id, event_id, attributes, extrinsic_idx, event), ...]
+        self._events = OrderedDict()
+        # finalized block number -> block hash
+        self._hashes = OrderedDict()
+        self._finalized_num = 0
+        self._refresh_at = 0
+
+    @property
+    def _substrate(self):
+        substrate = self._substrate_ref()
+        if substrate is None:
+            raise ReferenceError('The connection of the event index is already closed')
+        return substrate
+
+    def _remember(self, cache, key, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self._max_blocks:
+            cache.popitem(last=False)
+
+    def refresh_finalized(self, wanted=None):
+        """Asks the node for the finalized head, only when wanted is above the known finalized height"""
+        if wanted is not None and (wanted <= self._finalized_num or time.time() < self._refresh_at):
+            return self._finalized_num
+        finalized_hash = self._substrate.get_chain_finalised_head()
+        self._finalized_num = self._substrate.get_block_number(finalized_hash)
+        self._remember(self._hashes, self._finalized_num, finalized_hash)
+        self._refresh_at = time.time() + FINALIZED_REFRESH_PERIOD
+        return self._finalized_num
+
+    def get_block_hash(self, block_num):
+        if block_num in self._hashes:
+            self._hashes.move_to_end(block_num)
+            return self._hashes[block_num]
+
+        block_hash = self._substrate.get_block_hash(block_num)
+        if block_hash and block_num <= self._finalized_num:
+            self._remember(self._hashes, block_num, block_hash)
+        return block_hash
+
+    def get_entries(self, block_hash):
+        if not block_hash:
+            block_hash = self._substrate.get_chain_head()
+        if block_hash in self._events:
+            self._events.move_to_end(block_hash)
+            return self._events[block_hash]
+
+        entries = []
+        for event in self._substrate.get_events(block_hash):
+            value = event.value
+            entries.append((
+                value['module_id'],
+                value['event_id'],
+                value['attributes'],
+                value.get('extrinsic_idx'),
+                event,
+            ))
+        self._remember(self._events, block_hash, entries)
+        return entries
+
+    def get_events(self, block_hash):
+        return [entry[4] for entry in self.get_entries(block_hash)]
+
+    def find_events(self, block_hash, module, event_name, extrinsic_idx=None):
+        return [
+            event
+            for module_id, event_id, _, tx_idx, event in self.get_entries(block_hash)
+            if module_id == module and event_id == event_name and
+            (extrinsic_idx is None or tx_idx == extrinsic_idx)
+        ]
+
+
+def get_event_index(substrate):
+    index = _EVENT_INDEXES.get(substrate)
+    if index is None:
+        index = EventIndex(substrate)
+        _EVENT_INDEXES[substrate] = index
+    return index
@@ -1,98 +1,174 @@
 import sys
 sys.path.append('./')
 
+import csv
 import argparse
+from collections import defaultdict
 from substrateinterface import SubstrateInterface
+from tools.block_archive_cache import enable_block_archive_cache
+from tools.block_range_scanner import scan_blocks, SCANNER_WORKER_NUM
+from tools.stats_utils import get_percentiles
 from decimal import Decimal
 
 
-def get_all_evm_tip_in_block(substrate, block_hash):
-    block = substrate.get_block(block_hash)
-    events = substrate.get_events(block_hash=block_hash)
+BLOCK_TIME = 6
+FEE_PERCENTILES = [50, 90, 99, 100]
+TX_CSV_FIELDS = ['block_num', 'extrinsic_idx', 'fee', 'tip']
+BLOCK_CSV_FIELDS = ['block_num', 'count', 'fee', 'tip']
 
-    evm_all_tip = Decimal(0)
-    evm_count = 0
-    for idx, tx in enumerate(block['extrinsics']):
-        if idx < 2:
-            continue
-        if tx.value['call']['call_module'] != 'Ethereum':
-            continue
-        evm_tip = Decimal(0)
-        related_events = [
-            event.value
-            for event in events if 'extrinsic_idx' in event.value and event.value['extrinsic_idx'] == idx]
-        if related_events[0]['module_id'] != 'Balances' or related_events[0]['event_id'] != 'Withdraw':
-            raise IOError(f'    error: first event is not withdraw, {block_hash}, {idx}, {events[0]}')
-        evm_tip = Decimal(related_events[0]['event']['attributes']['amount'])
-
-        for event in related_events[1:]:
-            if event['module_id'] != 'Balances' or event['event_id'] != 'Deposit':
-                continue
-            evm_tip -= Decimal(event['event']['attributes']['amount'])
-        if evm_tip < 0:
-            raise IOError(f'    error: evm_tip < 0, {evm_tip}, {block_hash}, {idx}')
-        # print(f' tx tip found: {block_hash}-{idx}: fee {evm_tip}')
-        evm_all_tip += evm_tip
-        evm_count += 1
-    return {
-        'tip': evm_all_tip,
-        'count': evm_count
-    }
+
+def group_events_by_extrinsic(events):
+    """Returns {extrinsic_idx: [event value]}, the events of the block are only walked once"""
+    out = defaultdict(list)
+    for event in events:
+        if 'extrinsic_idx' in event.value:
+            out[event.value['extrinsic_idx']].append(event.value)
+    return out
 
 
-def get_all_evm_tx_fee_in_block(substrate, block_hash):
+def get_evm_fee_tips_in_block_hash(substrate, block_hash):
+    """Returns [(extrinsic_idx, fee, tip)] of the Ethereum extrinsics in the block, fee and tip are in wei"""
     block = substrate.get_block(block_hash)
-    events = substrate.get_events(block_hash=block_hash)
+    events = group_events_by_extrinsic(substrate.get_events(block_hash=block_hash))
 
-    evm_total_tx_fee = Decimal(0)
-    evm_count = 0
+    out = []
     for idx, tx in enumerate(block['extrinsics']):
         if idx < 2:
             continue
         if tx.value['call']['call_module'] != 'Ethereum':
             continue
-        evm_tx_fee = Decimal(0)
-        related_events = [
-            event.value
-            for event in events if 'extrinsic_idx' in event.value and event.value['extrinsic_idx'] == idx]
+        related_events = events[idx]
         if related_events[0]['module_id'] != 'Balances' or related_events[0]['event_id'] != 'Withdraw':
-            raise IOError(f'    error: first event is not withdraw, {block_hash}, {idx}, {events[0]}')
-
-        for event in related_events[1:]:
-            if event['module_id'] != 'Balances' or event['event_id'] != 'Deposit':
-                continue
-            evm_tx_fee += Decimal(event['event']['attributes']['amount'])
-        # print(f' tx fee found: {block_hash}-{idx}: fee {evm_tx_fee}')
-        evm_total_tx_fee += evm_tx_fee
-        evm_count += 1
-    return {
-        'fee': evm_total_tx_fee,
-        'count': evm_count
-    }
+            raise IOError(f'    error: first event is not withdraw, {block_hash}, {idx}, {related_events[0]}')
+        fee = sum(
+            int(event['event']['attributes']['amount'])
+            for event in related_events[1:]
+            if event['module_id'] == 'Balances' and event['event_id'] == 'Deposit')
+        tip = int(related_events[0]['event']['attributes']['amount']) - fee
+        if tip < 0:
+            raise IOError(f'    error: evm_tip < 0, {tip}, {block_hash}, {idx}')
+        out.append((idx, fee, tip))
+    return out
 
 
-def get_all_evm_fee_tip_in_block(substrate, block_hash):
-    fee = get_all_evm_tx_fee_in_block(substrate, block_hash)
-    tip = get_all_evm_tip_in_block(substrate, block_hash)
-    if fee['count'] != tip['count']:
-        raise IOError(f'    error: fee count != tip count, {fee["count"]}, {tip["count"]}, {block_hash}')
+def get_evm_fee_tips_in_block(substrate, block_num):
+    return get_evm_fee_tips_in_block_hash(substrate, substrate.get_block_hash(block_num))
 
+
+def get_all_evm_fee_tip_in_block(substrate, block_hash):
+    fee_tips = get_evm_fee_tips_in_block_hash(substrate, block_hash)
     return {
-        'fee': fee['fee'],
-        'tip': tip['tip'],
-        'count': fee['count']
+        'fee': Decimal(sum(fee for _, fee, _ in fee_tips)),
+        'tip': Decimal(sum(tip for _, _, tip in fee_tips)),
+        'count': len(fee_tips)
     }
 
 
+class EvmFeeStats():
+    """
+    Column store of the per-tx and per-block fees and tips, in wei.
+    Totals stay exact integers, the distributions are computed in token units.
+    """
+
+    def __init__(self):
+        self.tx_columns = {field: [] for field in TX_CSV_FIELDS}
+        self.block_columns = {field: [] for field in BLOCK_CSV_FIELDS}
+
+    def add_block(self, block_num, fee_tips):
+        for idx, fee, tip in fee_tips:
+            self.tx_columns['block_num'].append(block_num)
+            self.tx_columns['extrinsic_idx'].append(idx)
+            self.tx_columns['fee'].append(fee)
+            self.tx_columns['tip'].append(tip)
+        self.block_columns['block_num'].append(block_num)
+        self.block_columns['count'].append(len(fee_tips))
+        self.block_columns['fee'].append(sum(fee for _, fee, _ in fee_tips))
+        self.block_columns['tip'].append(sum(tip for _, _, tip in fee_tips))
+
+    def _distribution(self, values, unit=10**18):
+        if not values:
+            return {}
+        values = [value / unit for value in values]
+        out = {'mean': sum(values) / len(values)}
+        out.update({f'p{percent}': value for percent, value in get_percentiles(values, FEE_PERCENTILES).items()})
+        return out
+
+    def summary(self):
+        return {
+            'block': len(self.block_columns['block_num']),
+            'count': len(self.tx_columns['block_num']),
+            'fee': Decimal(sum(self.tx_columns['fee'])) / 10**18,
+            'tip': Decimal(sum(self.tx_columns['tip'])) / 10**18,
+            'tx_fee': self._distribution(self.tx_columns['fee']),
+            'tx_tip': self._distribution(self.tx_columns['tip']),
+            'block_count': self._distribution(self.block_columns['count'], 1),
+            'block_fee': self._distribution(self.block_columns['fee']),
+        }
+
+    def dump(self, path_prefix, file_format='csv'):
+        """Writes {path_prefix}-tx and {path_prefix}-block as csv, or parquet when pyarrow is installed"""
+        for name, columns in [('tx', self.tx_columns), ('block', self.block_columns)]:
+            path = f'{path_prefix}-{name}.{file_format}'
+            if file_format == 'parquet':
+                import pyarrow
+                import pyarrow.parquet
+                # Wei amounts overflow int64
+                table = pyarrow.table({
+                    field: [str(value) for value in values] if field in ['fee', 'tip'] else values
+                    for field, values in columns.items()})
+                pyarrow.parquet.write_table(table, path)
+            else:
+                with open(path, 'w', newline='') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(columns.keys())
+                    writer.writerows(zip(*columns.values()))
+            print(f'{name} records are written to {path}')
+
+
+def collect_evm_fee_stats(substrate, start, end, worker_num=SCANNER_WORKER_NUM):
+    """Fetches the blocks in [start, end) over a connection pool into EvmFeeStats"""
+    stats = EvmFeeStats()
+    for block_num, fee_tips in scan_blocks(substrate, start, end, get_evm_fee_tips_in_block, worker_num):
+        stats.add_block(block_num, fee_tips)
+        if (block_num - start + 1) % 1000 == 0:
+            print(f'Fetched {block_num - start + 1}/{end - start} blocks, block idx: {block_num}')
+    return stats
+
+
+def report_evm_fee_stats(substrate, args):
+    now_block_number = substrate.get_block_number(None)
+    block_num = int(args.period / BLOCK_TIME)
+    stats = collect_evm_fee_stats(substrate, now_block_number - block_num + 1, now_block_number + 1, args.worker)
+    summary = stats.summary()
+    print('======================')
+    print(f'block: {summary["block"]}, fee: {summary["fee"]}, tip: {summary["tip"]}, count: {summary["count"]}')
+    for name in ['tx_fee', 'tx_tip', 'block_count', 'block_fee']:
+        print(f'{name}: ' + ', '.join(f'{key}: {value:.6g}' for key, value in summary[name].items()))
+    stats.dump(args.output, args.output_format)
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Fetch EVM tx fee')
     parser.add_argument('-r', '--runtime', type=str, required=True, help='Your runtime websocket endpoint')
     parser.add_argument('-p', '--period', type=int, required=True, help='Time period (seconds) to fetch')
+    parser.add_argument('--cache', type=str, required=False, help='SQLite file to cache the finalized blocks in')
+    parser.add_argument(
+        '-s', '--stats', action='store_true',
+        help='Fetch the blocks in parallel and report the fee/tip distributions, the records are written to --output')
+    parser.add_argument('-w', '--worker', type=int, default=SCANNER_WORKER_NUM, help='Number of connections to fetch blocks with')
+    parser.add_argument('-o', '--output', type=str, default='evm_tx_fee', help='Path prefix of the stats records')
+    parser.add_argument('--output-format', choices=['csv', 'parquet'], default='csv', help='parquet needs pyarrow')
     args = parser.parse_args()
 
     substrate = SubstrateInterface(
         url=args.runtime,
     )
+    if args.cache:
+        enable_block_archive_cache(substrate, args.cache)
+    if args.stats:
+        report_evm_fee_stats(substrate, args)
+        sys.exit(0)
+
     now_block_number = substrate.get_block_number(None)
     out = {
         'fee': Decimal(0),
@@ -1,48 +1,170 @@
 import sys
 sys.path.append('./')
 
+import os
+import json
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from substrateinterface import SubstrateInterface
 from peaq.utils import get_block_hash
 from peaq.utils import get_block_height
 
 
+# Heights probed per open interval and round, a round narrows every interval by PROBE_NUM + 1
+PROBE_NUM = 8
+PROBE_WORKER_NUM = 8
+UPGRADE_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'peaq-bc-test', 'runtime_upgrades.json')
+
+
 def get_runtime_version(substrate, block_number):
     block_hash = get_block_hash(substrate, block_number)
     return substrate.get_block_runtime_version(block_hash)['specVersion']
 
 
-def find_first_occurrence(substrate, version):
-    # Binary search for the block number,
-    low = 1
+class RuntimeVersionProber():
+    """
+    Gets the runtime versions of many heights at once over a pool of connections, every height is probed once.
+    The pool and its connections are kept for all probes until close().
+    """
+
+    def __init__(self, url, worker_num=PROBE_WORKER_NUM):
+        self._url = url
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._substrates = []
+        self._executor = ThreadPoolExecutor(worker_num)
+        self._versions = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _get_version(self, block_number):
+        if not hasattr(self._local, 'substrate'):
+            self._local.substrate = SubstrateInterface(url=self._url)
+            with self._lock:
+                self._substrates.append(self._local.substrate)
+        return get_runtime_version(self._local.substrate, block_number)
+
+    def probe(self, block_numbers):
+        """Returns {block_number: specVersion} of block_numbers"""
+        todo = sorted({block_number for block_number in block_numbers if block_number not in self._versions})
+        if todo:
+            self._versions.update(zip(todo, self._executor.map(self._get_version, todo)))
+        return {block_number: self._versions[block_number] for block_number in block_numbers}
+
+    def close(self):
+        self._executor.shutdown()
+        for substrate in self._substrates:
+            substrate.close()
+
+
+def _split_interval(low, high, probe_num):
+    step = (high - low) / (probe_num + 1)
+    return sorted({low + round(step * i) for i in range(1, probe_num + 1)} - {low, high})
+
+
+def find_upgrade_blocks(prober, low, high, probe_num=PROBE_NUM):
+    """
+    Returns {specVersion: first block number executed with it} of the upgrades in (low, high].
+    The state of the block which sets the code already reports the new version,
+    so the first block executed with it is the next one.
+    Every round probes all open intervals at once, so the rounds are log(high - low) / log(probe_num + 1).
+    """
+    versions = prober.probe([low, high])
+    intervals = [(low, high)] if versions[low] != versions[high] else []
+    upgrades = {}
+    round_num = 0
+    while intervals:
+        round_num += 1
+        heights = {interval: _split_interval(*interval, probe_num) for interval in intervals}
+        versions = prober.probe([height for interval in intervals for height in (interval[0], interval[1], *heights[interval])])
+        next_intervals = []
+        for interval in intervals:
+            points = [interval[0], *heights[interval], interval[1]]
+            for start, end in zip(points, points[1:]):
+                if versions[start] == versions[end]:
+                    continue
+                if end - start == 1:
+                    upgrades[versions[end]] = end + 1
+                else:
+                    next_intervals.append((start, end))
+        print(f'Round {round_num}: probed {len(versions)} heights, {len(next_intervals)} intervals left')
+        intervals = next_intervals
+    return upgrades
+
+
+def load_upgrade_cache(path, genesis_hash):
+    if not path or not os.path.exists(path):
+        return {'searched_to': 0, 'upgrades': {}}
+    with open(path) as f:
+        chain = json.load(f).get(genesis_hash, {'searched_to': 0, 'upgrades': {}})
+    chain['upgrades'] = {int(version): block_number for version, block_number in chain['upgrades'].items()}
+    return chain
+
+
+def save_upgrade_cache(path, genesis_hash, chain):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    caches = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            caches = json.load(f)
+    caches[genesis_hash] = chain
+    with open(path, 'w') as f:
+        json.dump(caches, f, indent=4)
+
+
+def get_upgrade_blocks(substrate, cache_path=None, probe_num=PROBE_NUM, worker_num=PROBE_WORKER_NUM):
+    """
+    Returns {specVersion: first block number executed with it} of all upgrades until the head.
+    With cache_path, the upgrades are kept per genesis hash and only the blocks after the last search are probed.
+    """
+    genesis_hash = get_block_hash(substrate, 0)
+    chain = load_upgrade_cache(cache_path, genesis_hash)
+    low = max(chain['searched_to'], 1)
     high = get_block_height(substrate)
-    result = 0
-    while low < high:
-        mid = (low + high) // 2
-        value = get_runtime_version(substrate, mid)
-        # 0: equal, 1: mid > version, -1: mid < version
-        if value == version:
-            result = mid
-            high = mid - 1
-            print(f'Found runtime version {version} at block number {mid}')
-        elif value < version:
-            print(f'Runtime version {version} is already reached at block number {mid}')
-            low = mid + 1
-        else:
-            high = mid - 1
-            print(f'Runtime version {version} is not reached yet at block number {mid}')
-    return result + 1
+    with RuntimeVersionProber(substrate.url, worker_num) as prober:
+        if not chain['searched_to']:
+            # The runtime of the genesis is used from the first block on
+            chain['upgrades'][prober.probe([low])[low]] = low
+        if low < high:
+            chain['upgrades'].update(find_upgrade_blocks(prober, low, high, probe_num))
+            chain['searched_to'] = high
+    if cache_path:
+        save_upgrade_cache(cache_path, genesis_hash, chain)
+    return chain['upgrades']
+
+
+def find_first_occurrence(substrate, version, cache_path=None, probe_num=PROBE_NUM, worker_num=PROBE_WORKER_NUM):
+    """
+    Returns the first block number executed with exactly this runtime version,
+    None if the chain never ran it (the previous binary search returned 1 then)
+    """
+    return get_upgrade_blocks(substrate, cache_path, probe_num, worker_num).get(version)
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Get storage and constants from a Substrate chain')
     parser.add_argument('-r', '--runtime', type=str, required=True, help='Your runtime websocket endpoint')
-    parser.add_argument('-v', '--version', type=int, required=True, help='The runtime version you want to check')
+    parser.add_argument('-v', '--version', type=int, required=False, help='The runtime version you want to check, all upgrades if not set')
+    parser.add_argument('-p', '--probe', type=int, default=PROBE_NUM, help='Heights probed per interval and round')
+    parser.add_argument('-w', '--worker', type=int, default=PROBE_WORKER_NUM, help='Number of connections to probe with')
+    parser.add_argument(
+        '-c', '--cache', type=str, nargs='?', const=UPGRADE_CACHE_PATH, default=None,
+        help=f'JSON file of the known upgrade blocks per chain, {UPGRADE_CACHE_PATH} if no path is given')
     args = parser.parse_args()
 
     substrate = SubstrateInterface(
         url=args.runtime,
     )
 
-    runtime_version = args.version
-    print(f'Block number for runtime version {runtime_version}: {find_first_occurrence(substrate, runtime_version)}')
+    if args.version is None:
+        for version, block_number in sorted(get_upgrade_blocks(substrate, args.cache, args.probe, args.worker).items()):
+            print(f'Block number for runtime version {version}: {block_number}')
+    else:
+        runtime_version = args.version
+        block_number = find_first_occurrence(substrate, runtime_version, args.cache, args.probe, args.worker)
+        print(f'Block number for runtime version {runtime_version}: {block_number}')
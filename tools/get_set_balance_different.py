@@ -2,7 +2,7 @@ import requests
 import sys
 sys.path.append('./')
 from substrateinterface import SubstrateInterface
-from peaq.utils import get_block_hash
+from tools.storage_series import get_account_balance_series
 import time
 
 
@@ -62,18 +62,16 @@ if __name__ == '__main__':
         time.sleep(1)
         data = get_detail_balance_set_event(event['event_index'])
 
-        previous_block_hash = get_block_hash(ws, data['block_num'] - 1)
-        now_block_hash = get_block_hash(ws, data['block_num'])
         addr = data['addr']
         if not addr.startswith('0x'):
             addr = f'0x{addr}'
 
-        result = ws.query('System', 'Account', [addr], previous_block_hash)
-        now_result = ws.query('System', 'Account', [addr], now_block_hash)
-        diff = now_result["data"]["free"].value - result["data"]["free"].value
+        # Both blocks in one state_queryStorage request
+        balances = get_account_balance_series(ws, addr, data['block_num'] - 1, data['block_num'])
         event_idx = event["event_index"]
-        prev_free = result["data"]["free"].value
-        now_free = now_result["data"]["free"].value
+        prev_free = balances[data['block_num'] - 1]
+        now_free = balances[data['block_num']]
+        diff = now_free - prev_free
         if addr == '0xbaa6e3c1c492a2324f2ce9bd7f05418597d2e8319924c54e827e52cf51b0747a' and diff == 0:
             print(f'{event_idx}, {addr}, {prev_free}, {now_free}, {data["amount"]}, sudo transfer in the same block')
         else:
@@ -0,0 +1,84 @@
+import os
+import threading
+from scalecodec.base import ScaleBytes
+from substrateinterface import SubstrateInterface
+
+
+# Raw metadata files are kept under {folder}/{genesis hash}/{spec version}.scale, an empty value disables the cache
+METADATA_CACHE_FOLDER = os.environ.get(
+    'METADATA_CACHE_FOLDER', os.path.join(os.path.expanduser('~'), '.cache', 'peaq-bc-test', 'metadata'))
+
+# Decoded metadata shared by all connections of this process, keyed by (genesis hash, spec version)
+_decoded_metadata = {}
+_lock = threading.Lock()
+
+
+class MetadataCacheRegion():
+    """
+    Takes the place of the dogpile cache region SubstrateInterface reads the metadata of a runtime version from,
+    so a new connection neither downloads nor decodes the metadata of a runtime it has already seen.
+    A runtime upgrade changes the spec version, so its metadata is a cache miss and fetched from the node.
+    """
+
+    def __init__(self, substrate, folder=METADATA_CACHE_FOLDER):
+        self._substrate = substrate
+        self._folder = folder
+        # Per connection, a relaunched chain at the same URL can have another genesis
+        self._genesis_hash = None
+        self._genesis_lock = threading.Lock()
+
+    def _get_cache_key(self, key):
+        # SubstrateInterface uses METADATA_{spec version} as the key
+        with self._genesis_lock:
+            if self._genesis_hash is None:
+                self._genesis_hash = self._substrate.rpc_request('chain_getBlockHash', [0])['result']
+        return self._genesis_hash, key.split('_', 1)[1]
+
+    def _get_path(self, genesis_hash, spec_version):
+        return os.path.join(self._folder, genesis_hash, f'{spec_version}.scale')
+
+    def get(self, key):
+        cache_key = self._get_cache_key(key)
+        with _lock:
+            if cache_key in _decoded_metadata:
+                return _decoded_metadata[cache_key]
+        path = self._get_path(*cache_key)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            metadata = self._substrate.runtime_config.create_scale_object('MetadataVersioned', data=ScaleBytes(f.read()))
+        metadata.decode()
+        with _lock:
+            _decoded_metadata[cache_key] = metadata
+        return metadata
+
+    def set(self, key, metadata):
+        cache_key = self._get_cache_key(key)
+        with _lock:
+            _decoded_metadata[cache_key] = metadata
+        path = self._get_path(*cache_key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Several processes can store the same runtime at once, only complete files are renamed in place
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(metadata.data.to_hex())
+        os.replace(tmp_path, path)
+
+
+def enable_metadata_cache(substrate, folder=METADATA_CACHE_FOLDER):
+    substrate.cache_region = MetadataCacheRegion(substrate, folder)
+    return substrate
+
+
+def monkey_patch():
+    """Every SubstrateInterface created without its own cache_region uses the metadata cache"""
+    if not METADATA_CACHE_FOLDER:
+        return
+    original_init = SubstrateInterface.__init__
+
+    def patched_init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        if self.cache_region is None and self.url:
+            enable_metadata_cache(self)
+
+    SubstrateInterface.__init__ = patched_init
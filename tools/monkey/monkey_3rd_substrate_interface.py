@@ -3,13 +3,36 @@ from scalecodec.types import GenericExtrinsic
 from substrateinterface.base import ExtrinsicReceipt
 from substrateinterface import SubstrateInterface
 from json.decoder import JSONDecodeError
+from websocket import ABNF, WebSocketException, WebSocketTimeoutException, WebSocketConnectionClosedException
+import json
 import time
 import socket
+import weakref
+import threading
+from contextlib import nullcontext
 
 
 from peaq.utils import wait_for_n_blocks
 
 
+# Idle connections are pinged by one background thread instead of before every request
+HEARTBEAT_INTERVAL = 20
+# Seconds the heartbeat waits for the pong before the connection is taken as broken
+PONG_TIMEOUT = 10
+# Replaying these after a reconnect could apply them twice
+NON_REPLAYABLE_METHODS = {
+    'author_submitExtrinsic',
+    'author_submitAndWatchExtrinsic',
+    'author_insertKey',
+    'author_rotateKeys',
+}
+CONNECTION_ERRORS = (BrokenPipeError, JSONDecodeError, socket.error, WebSocketException)
+
+_heartbeat_substrates = weakref.WeakSet()
+_heartbeat_lock = threading.Lock()
+_heartbeat_thread = None
+
+
 def _wait_finalization(substrate, included_block):
     while True:
         finalized_block = substrate.get_block_number(substrate.get_chain_finalised_head())
@@ -19,18 +42,109 @@ def _wait_finalization(substrate, included_block):
         wait_for_n_blocks(substrate, 1)
 
 
+def _wait_pong(substrate):
+    """Pings the connection and reads it until the pong, the messages read meanwhile are kept for rpc_request"""
+    websocket = substrate.websocket
+    timeout = websocket.gettimeout()
+    websocket.settimeout(PONG_TIMEOUT)
+    try:
+        websocket.ping()
+        deadline = time.time() + PONG_TIMEOUT
+        while True:
+            opcode, frame = websocket.recv_data_frame(control_frame=True)
+            if opcode == ABNF.OPCODE_PONG:
+                return
+            if opcode == ABNF.OPCODE_CLOSE:
+                raise WebSocketConnectionClosedException('Connection is closed by the node')
+            if opcode == ABNF.OPCODE_TEXT:
+                substrate._SubstrateInterface__rpc_message_queue.append(json.loads(frame.data))
+            # Pings of the node are answered by recv_data_frame, they do not extend the wait
+            if time.time() > deadline:
+                raise WebSocketTimeoutException(f'No pong in {PONG_TIMEOUT} seconds')
+    finally:
+        websocket.settimeout(timeout)
+
+
+def _heartbeat_once(substrate):
+    # A connection in use is skipped, only one thread can read its socket
+    if not substrate._heartbeat_busy.acquire(blocking=False):
+        return
+    try:
+        if time.time() - getattr(substrate, '_heartbeat_last_active', 0) < HEARTBEAT_INTERVAL:
+            return
+        _wait_pong(substrate)
+        substrate._heartbeat_last_active = time.time()
+    except CONNECTION_ERRORS as e:
+        # The next request reconnects before it sends anything
+        print(f"Heartbeat to {substrate.url} failed: {e}")
+        substrate._heartbeat_failed = True
+    finally:
+        substrate._heartbeat_busy.release()
+
+
+def _heartbeat():
+    while True:
+        time.sleep(HEARTBEAT_INTERVAL)
+        with _heartbeat_lock:
+            substrates = list(_heartbeat_substrates)
+        for substrate in substrates:
+            _heartbeat_once(substrate)
+
+
+def _watch(substrate):
+    global _heartbeat_thread
+    with _heartbeat_lock:
+        # Held by the requests, reentrant because a subscription handler can send requests on its connection
+        substrate._heartbeat_busy = threading.RLock()
+        _heartbeat_substrates.add(substrate)
+        if _heartbeat_thread is None:
+            _heartbeat_thread = threading.Thread(target=_heartbeat, daemon=True)
+            _heartbeat_thread.start()
+
+
+def connection_in_use(substrate):
+    """Held around code which reads the socket outside rpc_request, so the heartbeat does not read it meanwhile"""
+    return getattr(substrate, '_heartbeat_busy', None) or nullcontext()
+
+
+def _reconnect(substrate):
+    print(f"Attempting to reconnect... {substrate.url}")
+    time.sleep(1)
+    substrate.connect_websocket()
+    substrate._heartbeat_failed = False
+
+
+def _rpc_request_with_reconnect(original_rpc_request, substrate, method, params, result_handler):
+    if getattr(substrate, '_heartbeat_failed', False):
+        _reconnect(substrate)
+
+    substrate._heartbeat_last_active = time.time()
+    try:
+        return original_rpc_request(substrate, method, params, result_handler)
+    except (WebSocketTimeoutException, socket.timeout):
+        # The caller set the timeout, e.g. to stop waiting for a subscription
+        raise
+    except CONNECTION_ERRORS as e:
+        print(f"Connection error: {e}. {substrate.url}")
+        _reconnect(substrate)
+        if method in NON_REPLAYABLE_METHODS:
+            raise
+        # A subscription is re-established by sending its subscribe request again with the same handler
+        return original_rpc_request(substrate, method, params, result_handler)
+    finally:
+        substrate._heartbeat_last_active = time.time()
+
+
 def monkey_patch():
     original_rpc_request = SubstrateInterface.rpc_request
 
     def patched_rpc_request(self, method, params, result_handler=None):
-        try:
-            self.websocket.ping()
-            return original_rpc_request(self, method, params, result_handler)
-        except (BrokenPipeError, JSONDecodeError, socket.error) as e:
-            print(f"Connection error: {e}. Attempting to reconnect... {self.url}")
-            time.sleep(1)
-            self.connect_websocket()
+        if not self.websocket:
             return original_rpc_request(self, method, params, result_handler)
+        if self not in _heartbeat_substrates:
+            _watch(self)
+        with self._heartbeat_busy:
+            return _rpc_request_with_reconnect(original_rpc_request, self, method, params, result_handler)
 
     SubstrateInterface.rpc_request = patched_rpc_request
 
@@ -3,6 +3,7 @@ from substrateinterface.exceptions import SubstrateRequestException
 from peaq.utils import show_extrinsic
 from peaq.utils import wait_for_n_blocks
 from substrateinterface.base import ExtrinsicReceipt
+from tools.parallel_utils import account_lock
 
 
 BACKTRACE_BLOCK_NUM = 10
@@ -35,7 +36,11 @@ def short_print(batch):
 def monkey_execute_extrinsic_batch(self, substrate, kp_src, batch,
                                    wait_for_finalization=False,
                                    tip=0) -> str:
+    with account_lock(kp_src.ss58_address):
+        return _execute_extrinsic_batch_with_retry(self, substrate, kp_src, batch, wait_for_finalization, tip)
 
+
+def _execute_extrinsic_batch_with_retry(self, substrate, kp_src, batch, wait_for_finalization, tip):
     for i in range(RETRY_TIMES):
         try:
             print(f'{substrate.url}, {short_print(batch)}')
@@ -0,0 +1,18 @@
+# Monkey patches installed once per process, ensure_patches only restores the ones replaced later
+_patches = []
+
+
+def register_patch(owner, name, value):
+    """Sets owner.name = value and keeps it, so ensure_patches can restore it"""
+    setattr(owner, name, value)
+    _patches.append((owner, name, value))
+
+
+def ensure_patches():
+    """Re-applies the registered patches which something overwrote, returns their names"""
+    restored = []
+    for owner, name, value in _patches:
+        if owner.__dict__.get(name) is not value:
+            setattr(owner, name, value)
+            restored.append(f'{owner.__name__}.{name}')
+    return restored
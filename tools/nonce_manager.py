@@ -0,0 +1,52 @@
+import threading
+
+
+# Node errors which mean our local nonce is out of sync with the chain/pool
+NONCE_ERROR_KEYWORDS = [
+    'nonce too low',
+    'invalid nonce',
+    'transaction is outdated',
+    'priority is too low',
+    'already imported',
+    'already known',
+]
+NONCE_RETRY_TIMES = 3
+
+
+def is_nonce_error(error):
+    message = str(error).lower()
+    return any(keyword in message for keyword in NONCE_ERROR_KEYWORDS)
+
+
+class NonceManager():
+    """
+    Hands out consecutive nonces per account locally, so many transactions can be
+    sent back-to-back without waiting for the previous ones to be included.
+    The nonce of an account is fetched from the node on first use and after resync().
+    """
+
+    def __init__(self, fetch_nonce):
+        self._fetch_nonce = fetch_nonce
+        self._nonces = {}
+        self._lock = threading.Lock()
+
+    def next_nonce(self, addr):
+        with self._lock:
+            if addr not in self._nonces:
+                self._nonces[addr] = self._fetch_nonce(addr)
+            nonce = self._nonces[addr]
+            self._nonces[addr] += 1
+            return nonce
+
+    def resync(self, addr):
+        with self._lock:
+            self._nonces.pop(addr, None)
+
+
+def get_substrate_nonce_manager(substrate):
+    # system_accountNextIndex also counts the extrinsics in the tx pool
+    return NonceManager(substrate.get_account_nonce)
+
+
+def get_evm_nonce_manager(w3):
+    return NonceManager(lambda addr: w3.eth.get_transaction_count(addr, 'pending'))
@@ -0,0 +1,94 @@
+import os
+import fcntl
+import tempfile
+from contextlib import contextmanager
+from substrateinterface import Keypair
+
+
+# Keypairs derived for every pytest-xdist worker, funded again after every relaunch of the chain
+WORKER_KEYPAIR_NUM = 4
+WORKER_FUND_AMOUNT = 10000 * 10 ** 18
+
+
+def get_worker_id():
+    return os.environ.get('PYTEST_XDIST_WORKER', 'master')
+
+
+def is_parallel_run():
+    return 'PYTEST_XDIST_WORKER' in os.environ
+
+
+def get_worker_keypairs(num=WORKER_KEYPAIR_NUM, worker_id=None):
+    if worker_id is None:
+        worker_id = get_worker_id()
+    return [Keypair.create_from_uri(f'//Worker//{worker_id}//{i}') for i in range(num)]
+
+
+def _get_run_path(name):
+    # All workers of one run share the same uid, so they also share the lock folder
+    run_uid = os.environ.get('PYTEST_XDIST_TESTRUNUID', 'local')
+    folder = os.path.join(tempfile.gettempdir(), f'peaq-bc-test-{run_uid}')
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, name)
+
+
+def _get_lock_path(name):
+    return _get_run_path(f'{name}.lock')
+
+
+def get_chain_generation():
+    """Number of chain relaunches in this run, shared by all workers"""
+    path = _get_run_path('chain-generation')
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return int(f.read() or 0)
+
+
+def bump_chain_generation():
+    # Only called by a relaunch, which holds the session lock exclusively
+    path = _get_run_path('chain-generation')
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(str(get_chain_generation() + 1))
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _file_lock(name, exclusive):
+    if not is_parallel_run():
+        yield
+        return
+
+    with open(_get_lock_path(name), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+@contextmanager
+def session_lock(exclusive):
+    """
+    Held by every test while it runs; shared for normal tests and exclusive
+    for the tests which cannot run beside other workers (e.g. relaunch the chain).
+    The gate lock stops new shared holders while an exclusive one is waiting.
+    """
+    if exclusive:
+        with _file_lock('gate', True), _file_lock('session', True):
+            yield
+        return
+
+    with _file_lock('gate', False):
+        pass
+    with _file_lock('session', False):
+        yield
+
+
+def account_lock(addr):
+    """
+    Serializes the submissions of one account across workers, so the nonce read
+    and the inclusion of the extrinsic cannot interleave with another worker's.
+    """
+    return _file_lock(f'account-{addr}', True)
@@ -1,4 +1,5 @@
 from functools import wraps
+from tools.parallel_utils import account_lock
 
 
 def _show_extrinsic(receipt, info_type):
@@ -47,17 +48,18 @@ def user_extrinsic_send(func):
     def wrapper(*args, **kwargs):
         substrate = args[0]
         kp_src = args[1]
-        nonce = substrate.get_account_nonce(kp_src.ss58_address)
+        with account_lock(kp_src.ss58_address):
+            nonce = substrate.get_account_nonce(kp_src.ss58_address)
 
-        call = func(*args, **kwargs)
+            call = func(*args, **kwargs)
 
-        extrinsic = substrate.create_signed_extrinsic(
-            call=call,
-            keypair=kp_src,
-            era={'period': 64},
-            nonce=nonce
-        )
-        receipt = substrate.submit_extrinsic(extrinsic, wait_for_finalization=True)
+            extrinsic = substrate.create_signed_extrinsic(
+                call=call,
+                keypair=kp_src,
+                era={'period': 64},
+                nonce=nonce
+            )
+            receipt = substrate.submit_extrinsic(extrinsic, wait_for_finalization=True)
         _show_extrinsic(receipt, func.__name__)
         return receipt
     return wrapper
@@ -9,6 +9,7 @@ from peaq import eth
 from tools.constants import ETH_TIMEOUT
 import time
 from tools.constants import BLOCK_GENERATE_TIME
+from tools.nonce_manager import is_nonce_error, NONCE_RETRY_TIMES
 import random
 import string
 
@@ -155,10 +156,41 @@ def wait_w3_tx(w3, tx_hash, timimeout=ETH_TIMEOUT):
         raise e
 
 
-def sign_and_submit_evm_transaction(tx, w3, signer):
+def send_evm_transaction(tx, w3, signer, nonce_manager):
+    """
+    Signs tx with the next local nonce of the signer and sends it without waiting for the receipt,
+    the nonce is resynced from the node whenever the transaction is not accepted.
+    """
+    addr = signer.ss58_address
+    for i in range(NONCE_RETRY_TIMES):
+        tx['nonce'] = nonce_manager.next_nonce(addr)
+        try:
+            signed_txn = w3.eth.account.sign_transaction(tx, private_key=signer.private_key)
+            return send_raw_tx(w3, signed_txn)
+        except Exception as e:
+            # The nonce is already taken, without a resync every later transaction would wait for the gap
+            nonce_manager.resync(addr)
+            if not isinstance(e, ValueError) or not is_nonce_error(e):
+                raise e
+            print(f'Nonce {tx["nonce"]} is rejected, resync the nonce of {addr}')
+    raise IOError(f'Cannot send transaction, nonce of {addr} is still rejected')
+
+
+def wait_w3_receipts(w3, tx_hashes, timeout=ETH_TIMEOUT):
+    return [w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout) for tx_hash in tx_hashes]
+
+
+def sign_and_submit_evm_transaction(tx, w3, signer, nonce_manager=None):
+    """
+    Signs and sends tx and waits until it is finalized, with nonce_manager the nonce
+    is taken from it instead of the one in tx
+    """
     for i in range(3):
-        signed_txn = w3.eth.account.sign_transaction(tx, private_key=signer.private_key)
-        tx_hash = send_raw_tx(w3, signed_txn)
+        if nonce_manager is None:
+            signed_txn = w3.eth.account.sign_transaction(tx, private_key=signer.private_key)
+            tx_hash = send_raw_tx(w3, signed_txn)
+        else:
+            tx_hash = send_evm_transaction(tx, w3, signer, nonce_manager)
         wait_w3_tx(w3, tx_hash)
 
         # Check whether the block is finalized or not. If not, wait for it
@@ -173,5 +205,7 @@ def sign_and_submit_evm_transaction(tx, w3, signer):
                 time.sleep(BLOCK_GENERATE_TIME * 2)
         else:
             print(f'Cannot find tx {tx_hash.hex()}')
+            if nonce_manager is not None:
+                nonce_manager.resync(signer.ss58_address)
             tx['data'] = tx['data'] + '00'
     raise IOError('Cannot send transaction')
@@ -0,0 +1,217 @@
+import json
+import requests
+from collections import defaultdict
+from websocket import WebSocketException, WebSocketTimeoutException
+from scalecodec.base import ScaleBytes
+from substrateinterface.storage import StorageKey
+from substrateinterface.exceptions import SubstrateRequestException
+from tools.monkey.monkey_3rd_substrate_interface import connection_in_use
+from tools.block_archive_cache import get_block_archive_rpc
+
+
+# Calls per JSON-RPC batch, keeps the responses under the node's response size limit
+RPC_BATCH_SIZE = 100
+# Seconds to wait for the response of a batch before it is sent again call by call
+RPC_BATCH_TIMEOUT = 60
+# parentHash of the genesis header
+GENESIS_PARENT_HASH = '0x' + '00' * 32
+
+
+def _next_request_id(substrate):
+    request_id = substrate.request_id
+    substrate.request_id += 1
+    return request_id
+
+
+def _recv_batch(substrate, request_ids):
+    # Messages of other requests and subscriptions go back to the queue rpc_request reads from
+    message_queue = substrate._SubstrateInterface__rpc_message_queue
+    while True:
+        message = json.loads(substrate.websocket.recv())
+        if isinstance(message, list):
+            return message
+        # A node which does not take the batch (disabled, too large, malformed) answers with one error, its id is null
+        if 'error' in message and (message.get('id') is None or message.get('id') in request_ids):
+            return message
+        message_queue.append(message)
+
+
+def _send_batch(substrate, payload):
+    """Returns the list of responses, or the reply of a node which rejects the batch"""
+    request_ids = {request['id'] for request in payload}
+    if not substrate.websocket:
+        return substrate.session.request(
+            'POST', substrate.url, data=json.dumps(payload), headers=substrate.default_headers,
+            timeout=RPC_BATCH_TIMEOUT).json()
+
+    with connection_in_use(substrate):
+        timeout = substrate.websocket.gettimeout()
+        substrate.websocket.settimeout(RPC_BATCH_TIMEOUT)
+        try:
+            substrate.websocket.send(json.dumps(payload))
+            return _recv_batch(substrate, request_ids)
+        finally:
+            substrate.websocket.settimeout(timeout)
+
+
+def _send_calls(substrate, calls):
+    """Sends calls as one batch, or one rpc_request per call if the node does not take the batch"""
+    payload = [
+        {'jsonrpc': '2.0', 'method': method, 'params': params, 'id': _next_request_id(substrate)}
+        for method, params in calls]
+
+    try:
+        responses = _send_batch(substrate, payload)
+    except WebSocketTimeoutException as e:
+        # The late reply of the batch would stay unread in the socket, a new connection drops it
+        substrate.connect_websocket()
+        responses = e
+    except (ConnectionError, WebSocketException, requests.exceptions.RequestException) as e:
+        responses = e
+
+    if not isinstance(responses, list):
+        print(f'Batch request is not answered, send {len(calls)} requests one by one: {responses}')
+        return [_rpc_request_no_raise(substrate, method, params) for method, params in calls]
+
+    responses = {response.get('id'): response for response in responses}
+    missing = {'jsonrpc': '2.0', 'error': {'message': 'No response in the batch'}}
+    return [responses.get(request['id'], missing) for request in payload]
+
+
+def rpc_batch_request(substrate, calls):
+    """
+    Sends calls, a list of (method, params), as one JSON-RPC batch and returns their responses in order.
+    A response is the same dict rpc_request returns, the errors are returned instead of raised.
+    If the connection has a block archive cache, the finalized calls are answered from it,
+    only the misses are sent and their responses are stored.
+    The batch goes straight to the socket, so it skips the reconnect of the monkey patched rpc_request.
+    Falls back to one rpc_request per call if the node does not take the batch,
+    does not answer in RPC_BATCH_TIMEOUT seconds or the connection is broken.
+    """
+    archive_rpc = get_block_archive_rpc(substrate)
+    responses = [archive_rpc.get(method, params) if archive_rpc else None for method, params in calls]
+    misses = [idx for idx, response in enumerate(responses) if response is None]
+    if not misses:
+        return responses
+
+    for idx, response in zip(misses, _send_calls(substrate, [calls[idx] for idx in misses])):
+        responses[idx] = response
+        if archive_rpc and 'error' not in response:
+            archive_rpc.store(*calls[idx], response)
+    return responses
+
+
+def _rpc_request_no_raise(substrate, method, params):
+    try:
+        return substrate.rpc_request(method, params)
+    except SubstrateRequestException as e:
+        return {'jsonrpc': '2.0', 'error': e.args[0]}
+
+
+class RpcBatchResult():
+    """Handle of one call in an RpcBatch, filled when the batch is flushed"""
+
+    def __init__(self, method, params):
+        self.method = method
+        self.params = params
+        self.response = None
+
+    @property
+    def result(self):
+        if self.response is None:
+            raise ValueError(f'{self.method} is not sent yet, flush the batch first')
+        if 'error' in self.response:
+            raise SubstrateRequestException(self.response['error'])
+        return self.response.get('result')
+
+
+class RpcBatch():
+    """
+    Collects independent RPC calls and sends them as JSON-RPC batches of up to max_size calls,
+    the results are dispatched back to the handles add() returns.
+
+        with RpcBatch(substrate) as batch:
+            hashes = [batch.add('chain_getBlockHash', [block_num]) for block_num in block_nums]
+        print([block_hash.result for block_hash in hashes])
+    """
+
+    def __init__(self, substrate, max_size=RPC_BATCH_SIZE):
+        self._substrate = substrate
+        self._max_size = max_size
+        self._pending = []
+
+    def add(self, method, params):
+        handle = RpcBatchResult(method, params)
+        self._pending.append(handle)
+        return handle
+
+    def flush(self):
+        pending, self._pending = self._pending, []
+        for i in range(0, len(pending), self._max_size):
+            chunk = pending[i:i + self._max_size]
+            responses = rpc_batch_request(self._substrate, [(handle.method, handle.params) for handle in chunk])
+            for handle, response in zip(chunk, responses):
+                handle.response = response
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+
+
+def get_block_hashes_batch(substrate, block_nums):
+    with RpcBatch(substrate) as batch:
+        handles = [batch.add('chain_getBlockHash', [block_num]) for block_num in block_nums]
+    return [handle.result for handle in handles]
+
+
+def _group_by_runtime(substrate, headers, block_hashes):
+    """
+    Returns {specVersion: [index of the block, ...]}, a block is decoded with the runtime of its parent
+    like init_runtime does, so the block which sets the new code still groups with the old version
+    """
+    runtime_hashes = [
+        block_hash if header.result['parentHash'] == GENESIS_PARENT_HASH else header.result['parentHash']
+        for header, block_hash in zip(headers, block_hashes)]
+    with RpcBatch(substrate) as batch:
+        versions = {block_hash: batch.add('state_getRuntimeVersion', [block_hash]) for block_hash in set(runtime_hashes)}
+
+    block_groups = defaultdict(list)
+    for idx, runtime_hash in enumerate(runtime_hashes):
+        block_groups[versions[runtime_hash].result['specVersion']].append(idx)
+    return block_groups
+
+
+def query_batch(substrate, module, storage_function, block_hashes, params=None):
+    """
+    Same as substrate.query(module, storage_function, params, block_hash) for every block hash,
+    the raw values, the headers and then the runtime versions of the parents are fetched in two batches.
+    Every runtime version in the blocks is only initialized once to decode its values.
+    """
+    storage_key = substrate.create_storage_key(module, storage_function, params)
+    with RpcBatch(substrate) as batch:
+        raw_values = [batch.add('state_getStorage', [storage_key.to_hex(), block_hash]) for block_hash in block_hashes]
+        headers = [batch.add('chain_getHeader', [block_hash]) for block_hash in block_hashes]
+
+    out = [None] * len(block_hashes)
+    for idxs in _group_by_runtime(substrate, headers, block_hashes).values():
+        # init_runtime loads the runtime of the parent of this block, which is the version of the group
+        substrate.init_runtime(block_hash=block_hashes[idxs[0]])
+        runtime_key = StorageKey.create_from_storage_function(
+            module, storage_function, params, runtime_config=substrate.runtime_config, metadata=substrate.metadata)
+        for idx in idxs:
+            raw_value = raw_values[idx].result
+            out[idx] = runtime_key.decode_scale_value(None if raw_value is None else ScaleBytes(raw_value))
+    return out
+
+
+def get_events_batch(substrate, block_hashes):
+    """Same as substrate.get_events(block_hash) for every block hash, in one batch"""
+    return [events.elements if events else [] for events in query_batch(substrate, 'System', 'Events', block_hashes)]
+
+
+def get_block_events_batch(substrate, block_nums):
+    """Returns the events of every block number, two batches for any number of blocks"""
+    return get_events_batch(substrate, get_block_hashes_batch(substrate, block_nums))
@@ -1,5 +1,10 @@
+import sys
+sys.path.append('./')
+
 import argparse
+from scalecodec.base import ScaleBytes
 from substrateinterface import SubstrateInterface
+from tools.rpc_batch import rpc_batch_request
 from datetime import datetime, timezone, timedelta
 import pprint
 from colorama import Fore, Style, init
@@ -11,114 +16,145 @@ pp = pprint.PrettyPrinter(indent=4)
 init(autoreset=True)
 
 
-# Average block time for Substrate chains (6 seconds as requested)
+# Average block time for Substrate chains, used when the recent block rate cannot be measured
 AVERAGE_BLOCK_TIME_SECONDS = 6
+# Number of recent blocks the block rate for the estimation is measured over
+BLOCK_RATE_WINDOW = 600
+SESSION_NAMES = ["Current", "Next", "Two Sessions Ahead"]
+# Blocks after the session start whose time is shown, 0 is the base block
+SESSION_BLOCK_OFFSETS = [0, 100, 1500]
+
+
+def _batch_results(substrate: SubstrateInterface, calls: list):
+    """
+    Sends the calls in one batched JSON-RPC request and returns their results, None for a failed call.
+    """
+    out = []
+    for (method, params), response in zip(calls, rpc_batch_request(substrate, calls)):
+        if 'error' in response:
+            print(f"Error: {method} {params} failed: {response['error']}")
+        out.append(response.get('result'))
+    return out
+
+
+def get_block_times(substrate: SubstrateInterface, block_numbers: list):
+    """
+    Retrieves the timestamps of past blocks with two batched requests,
+    one for all block hashes and one for all Timestamp::Now values.
+
+    Args:
+        substrate (SubstrateInterface): The SubstrateInterface instance.
+        block_numbers (list): The block numbers to query, all of them already occurred.
+
+    Returns:
+        dict: block number -> datetime.datetime in local time, the failed blocks are left out.
+    """
+    block_numbers = sorted(set(block_numbers))
+    block_hashes = _batch_results(substrate, [('chain_getBlockHash', [block_number]) for block_number in block_numbers])
+
+    storage_key = substrate.create_storage_key('Timestamp', 'Now')
+    found = [(block_number, block_hash) for block_number, block_hash in zip(block_numbers, block_hashes) if block_hash]
+    raw_timestamps = _batch_results(
+        substrate, [('state_getStorage', [storage_key.to_hex(), block_hash]) for _, block_hash in found])
+
+    out = {}
+    for (block_number, _), raw_timestamp in zip(found, raw_timestamps):
+        if raw_timestamp is None:
+            continue
+        timestamp_ms = storage_key.decode_scale_value(ScaleBytes(raw_timestamp)).value
+        # Convert to local timezone
+        out[block_number] = datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc).astimezone()
+    return out
+
+
+def measure_block_time(block_times: dict, current_block_number: int, window: int):
+    """
+    Returns the average block time (seconds) over the last window blocks,
+    AVERAGE_BLOCK_TIME_SECONDS if it cannot be measured.
+    """
+    window_start = current_block_number - window
+    if window <= 0 or window_start not in block_times or current_block_number not in block_times:
+        return AVERAGE_BLOCK_TIME_SECONDS
+    return (block_times[current_block_number] - block_times[window_start]).total_seconds() / window
 
 
 def get_block_timestamp(
-    substrate: SubstrateInterface,
     block_number: int,
     current_block_number: int,
-    current_block_time: datetime
+    current_block_time: datetime,
+    block_times: dict,
+    block_time_seconds: float
 ):
     """
-    Retrieves the timestamp of a given block number. If the block has not yet occurred,
-    it estimates the time based on the average block time.
+    Returns the timestamp of a given block number. If the block has not yet occurred,
+    it estimates the time based on the measured block time.
 
     Args:
-        substrate (SubstrateInterface): The SubstrateInterface instance.
-        block_number (int): The block number to query or estimate.
+        block_number (int): The block number to look up or estimate.
         current_block_number (int): The current latest block number on the chain.
         current_block_time (datetime): The datetime of the current latest block.
+        block_times (dict): The timestamps of the past blocks, from get_block_times.
+        block_time_seconds (float): The block time to estimate the future blocks with.
 
     Returns:
         datetime.datetime: The datetime object representing the block's timestamp in local time,
-                           or None if an unrecoverable error occurs.
+                           or None if the past block could not be retrieved.
     """
     if block_number <= current_block_number:
-        # Block has already occurred, get actual timestamp
-        try:
-            block_hash = substrate.get_block_hash(block_id=block_number)
-            if not block_hash:
-                # This warning is kept as it indicates a potential issue even
-                # if block number is theoretically valid
-                print(f"Warning: Could not get block hash for block number "
-                      f"{block_number} (even though it's <= current).")
-                return None
-
-            timestamp_ms = substrate.query(
-                module='Timestamp',
-                storage_function='Now',
-                block_hash=block_hash,
-            ).value
-            # Convert to local timezone
-            utc_datetime = datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
-            return utc_datetime.astimezone()
-        except Exception as e:
-            print(f"Error getting actual timestamp for block {block_number}: {e}")
-            return None
-    else:
-        # Block has not occurred, estimate time
-        blocks_to_future = block_number - current_block_number
-        estimated_time_delta = timedelta(seconds=blocks_to_future * AVERAGE_BLOCK_TIME_SECONDS)
-        # Ensure it's in local timezone
-        estimated_datetime = current_block_time + estimated_time_delta
-        return estimated_datetime.astimezone()
+        if block_number not in block_times:
+            print(f"Warning: Could not get the timestamp for block number {block_number}")
+        return block_times.get(block_number)
+
+    # Block has not occurred, estimate time
+    blocks_to_future = block_number - current_block_number
+    estimated_time_delta = timedelta(seconds=blocks_to_future * block_time_seconds)
+    # Ensure it's in local timezone
+    estimated_datetime = current_block_time + estimated_time_delta
+    return estimated_datetime.astimezone()
 
 
 def print_session_times(
-    substrate: SubstrateInterface,
     session_name: str,
     base_block: int,
     current_block_number: int,
-    current_block_time_local: datetime
+    current_block_time_local: datetime,
+    block_times: dict,
+    block_time_seconds: float
 ):
     """
     Helper function to print times for a specific session's base block, +100, and +1500.
     """
     print(f"\n--- {session_name} Session (Base Block: {base_block}) ---")
 
-    # Get timestamp for base block (no color)
-    base_block_time = get_block_timestamp(
-        substrate, base_block, current_block_number, current_block_time_local
-    )
-    if base_block_time:
-        formatted_time = base_block_time.strftime('%Y-%m-%d %H:%M:%S %Z%z')
-        print(f"Local time for base block ({base_block}): {formatted_time}")
-
-    # Get timestamp for base + 100 block (yellow color)
-    block_plus_100 = base_block + 100
-    time_plus_100 = get_block_timestamp(
-        substrate, block_plus_100, current_block_number, current_block_time_local
-    )
-    if time_plus_100:
-        status = " (Actual Time)" if block_plus_100 <= current_block_number else \
-                 " (Estimated Time)"
-        formatted_time = time_plus_100.strftime('%Y-%m-%d %H:%M:%S %Z%z')
-        print(f"Local time for block {block_plus_100} (+100): "
-              f"{Fore.YELLOW}{formatted_time}{Style.RESET_ALL}{status}")
-
-    # Get timestamp for base + 1500 block (yellow color)
-    block_plus_1500 = base_block + 1500
-    time_plus_1500 = get_block_timestamp(
-        substrate, block_plus_1500, current_block_number, current_block_time_local
-    )
-    if time_plus_1500:
-        status = " (Actual Time)" if block_plus_1500 <= current_block_number else \
+    for offset in SESSION_BLOCK_OFFSETS:
+        block_number = base_block + offset
+        block_time = get_block_timestamp(
+            block_number, current_block_number, current_block_time_local, block_times, block_time_seconds
+        )
+        if not block_time:
+            continue
+        formatted_time = block_time.strftime('%Y-%m-%d %H:%M:%S %Z%z')
+        if offset == 0:
+            # Base block (no color)
+            print(f"Local time for base block ({block_number}): {formatted_time}")
+            continue
+        # Offset blocks (yellow color)
+        status = " (Actual Time)" if block_number <= current_block_number else \
                  " (Estimated Time)"
-        formatted_time = time_plus_1500.strftime('%Y-%m-%d %H:%M:%S %Z%z')
-        print(f"Local time for block {block_plus_1500} (+1500): "
+        print(f"Local time for block {block_number} (+{offset}): "
               f"{Fore.YELLOW}{formatted_time}{Style.RESET_ALL}{status}")
 
 
-def get_parachain_staking_round(url: str):
+def get_parachain_staking_round(url: str, block_rate_window: int = BLOCK_RATE_WINDOW):
     """
     Connects to a Substrate node, retrieves ParachainStaking Round information,
     and then calculates and prints local times for three consecutive sessions.
-    Connection and query messages are suppressed.
+    The head, the round and all past block timestamps are fetched with three batched requests,
+    the future blocks are estimated with the block time measured over the last block_rate_window blocks.
 
     Args:
         url (str): The WebSocket URL of the Substrate node.
+        block_rate_window (int): Number of recent blocks to measure the block time over.
 
     Returns:
         dict: A dictionary containing the Round information of the first session,
@@ -127,64 +163,55 @@ def get_parachain_staking_round(url: str):
     try:
         substrate = SubstrateInterface(url=url)
 
-        current_block_number = substrate.get_block_number(None)
-        current_block_hash = substrate.get_block_hash()
-        current_timestamp_ms = substrate.query(
-            module='Timestamp',
-            storage_function='Now',
-            block_hash=current_block_hash,
-        ).value
-        current_block_time_utc = datetime.fromtimestamp(current_timestamp_ms / 1000, tz=timezone.utc)
-        current_block_time_local = current_block_time_utc.astimezone()
-
-        # Query ParachainStaking.Round storage
-        parachain_staking_round_data = substrate.query(
-            module='ParachainStaking',
-            storage_function='Round',
-        ).value  # Directly get the value if query is successful
+        round_key = substrate.create_storage_key('ParachainStaking', 'Round')
+        current_header, raw_round = _batch_results(substrate, [
+            ('chain_getHeader', []),
+            ('state_getStorage', [round_key.to_hex()]),
+        ])
+        current_block_number = int(current_header['number'], 16)
 
         # Check if the query returned valid data
-        if parachain_staking_round_data:
-            print("\nParachainStaking Round Information (Current Session):")
-            pp.pprint(parachain_staking_round_data)
-
-            first_block_current_session = parachain_staking_round_data['first']
-            length_current_session = parachain_staking_round_data['length']
+        if not raw_round:
+            # This block handles the case where the Round storage is empty
+            print("Error: Could not retrieve valid ParachainStaking.Round information.")
+            return None
 
-            # Print times for Current Session
-            print_session_times(
-                substrate, "Current",
-                first_block_current_session,
-                current_block_number,
-                current_block_time_local
-            )
+        # Query ParachainStaking.Round storage
+        parachain_staking_round_data = round_key.decode_scale_value(ScaleBytes(raw_round)).value
+        print("\nParachainStaking Round Information (Current Session):")
+        pp.pprint(parachain_staking_round_data)
+
+        first_block_current_session = parachain_staking_round_data['first']
+        length_current_session = parachain_staking_round_data['length']
+
+        # We assume the length of the next sessions is the same as the current one for estimation
+        base_blocks = [
+            first_block_current_session + length_current_session * i for i in range(len(SESSION_NAMES))]
+        block_numbers = [current_block_number, max(current_block_number - block_rate_window, 1)] + [
+            base_block + offset
+            for base_block in base_blocks
+            for offset in SESSION_BLOCK_OFFSETS
+            if base_block + offset <= current_block_number]
+        block_times = get_block_times(substrate, block_numbers)
+        if current_block_number not in block_times:
+            print(f"Error: Could not get the timestamp of the current block {current_block_number}")
+            return None
 
-            # Calculate and print times for Next Session
-            first_block_next_session = first_block_current_session + length_current_session
-            print_session_times(
-                substrate, "Next",
-                first_block_next_session,
-                current_block_number,
-                current_block_time_local
-            )
+        current_block_time_local = block_times[current_block_number]
+        block_time_seconds = measure_block_time(
+            block_times, current_block_number, min(block_rate_window, current_block_number - 1))
+        print(f"\nMeasured block time over the last {block_rate_window} blocks: {block_time_seconds:.3f} seconds")
 
-            # Calculate and print times for Two Sessions Ahead
-            # We assume the length of the next session is the same as the current one for estimation
-            first_block_two_sessions_ahead = first_block_next_session + length_current_session
+        for session_name, base_block in zip(SESSION_NAMES, base_blocks):
             print_session_times(
-                substrate, "Two Sessions Ahead",
-                first_block_two_sessions_ahead,
+                session_name, base_block,
                 current_block_number,
-                current_block_time_local
+                current_block_time_local,
+                block_times,
+                block_time_seconds
             )
 
-            return parachain_staking_round_data
-        else:
-            # This block handles the case where round_info.value might be empty or
-            # not what's expected (though substrate.query typically raises an
-            # exception for true failures)
-            print("Error: Could not retrieve valid ParachainStaking.Round information.")
-            return None
+        return parachain_staking_round_data
 
     except ConnectionRefusedError:
         print(f"Error: Connection to {url} was refused. "
@@ -204,7 +231,11 @@ if __name__ == '__main__':
         '-u', '--url', type=str, required=True,
         help='The WebSocket URL of the Substrate node (e.g., ws://127.0.0.1:9944)'
     )
+    parser.add_argument(
+        '-w', '--window', type=int, default=BLOCK_RATE_WINDOW,
+        help='Number of recent blocks to measure the block time for the estimation over'
+    )
 
     args = parser.parse_args()
 
-    get_parachain_staking_round(args.url)
+    get_parachain_staking_round(args.url, args.window)
@@ -0,0 +1,148 @@
+import sys
+sys.path.append('./')
+
+import os
+import json
+import math
+import zlib
+import argparse
+import tempfile
+from argparse import RawDescriptionHelpFormatter
+from tools.snapshot_format import open_snapshot
+
+
+# Maps with more keys are diffed partition by partition through temp files
+DIFF_PARTITION_KEY_NUM = 200000
+
+
+def _diff_dict(dict_a, items_b):
+    """Yields (key, change, a, b), dict_a is consumed"""
+    for key, value in items_b:
+        if key not in dict_a:
+            yield key, 'added', None, value
+            continue
+        old_value = dict_a.pop(key)
+        if old_value != value:
+            yield key, 'changed', old_value, value
+    for key, value in dict_a.items():
+        yield key, 'removed', value, None
+
+
+def _partition_items(items, folder, name, partition_num):
+    files = [open(os.path.join(folder, f'{name}.{i}'), 'w') for i in range(partition_num)]
+    try:
+        for key, value in items:
+            files[zlib.crc32(str(key).encode('utf-8')) % partition_num].write(json.dumps([key, value]) + '\n')
+    finally:
+        for f in files:
+            f.close()
+
+
+def _iter_partition(path):
+    with open(path) as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def diff_map_items(items_a, items_b, partition_num=1):
+    """
+    Key-level diff of two (key, value) streams, yields (key, change, a, b).
+    With partition_num > 1 both streams are split by the key hash first,
+    so only one partition of items_a is held in memory at a time.
+    """
+    if partition_num <= 1:
+        yield from _diff_dict(dict(items_a), items_b)
+        return
+
+    with tempfile.TemporaryDirectory() as folder:
+        _partition_items(items_a, folder, 'a', partition_num)
+        _partition_items(items_b, folder, 'b', partition_num)
+        for i in range(partition_num):
+            yield from _diff_dict(
+                dict(_iter_partition(os.path.join(folder, f'a.{i}'))),
+                _iter_partition(os.path.join(folder, f'b.{i}')))
+
+
+def diff_entry(reader_a, reader_b, section, pallet, entry):
+    """Yields (key, change, a, b) of one pallet::entry, key is None for the plain values"""
+    if not reader_b.has_section(section, pallet, entry):
+        for key, value in reader_a.iter_items(section, pallet, entry):
+            yield key, 'removed', value, None
+        return
+    if not reader_a.has_section(section, pallet, entry):
+        for key, value in reader_b.iter_items(section, pallet, entry):
+            yield key, 'added', None, value
+        return
+
+    if reader_a.get_kind(section, pallet, entry) == 'map' and reader_b.get_kind(section, pallet, entry) == 'map':
+        item_num = max(reader_a.get_item_num(section, pallet, entry), reader_b.get_item_num(section, pallet, entry))
+        yield from diff_map_items(
+            reader_a.iter_items(section, pallet, entry),
+            reader_b.iter_items(section, pallet, entry),
+            math.ceil(item_num / DIFF_PARTITION_KEY_NUM))
+        return
+
+    value_a = reader_a.get_value(section, pallet, entry)
+    value_b = reader_b.get_value(section, pallet, entry)
+    if isinstance(value_a, dict) and isinstance(value_b, dict):
+        # The pprint snapshots keep the maps as dict values
+        yield from diff_map_items(value_a.items(), value_b.items())
+    elif value_a != value_b:
+        yield None, 'changed', value_a, value_b
+
+
+def diff_snapshots(reader_a, reader_b):
+    """Yields one record per difference, entries only in one of the snapshots are fully added/removed"""
+    sections_a = [section for section in reader_a.iter_sections() if section[0] != 'chain']
+    sections_b = [section for section in reader_b.iter_sections() if section[0] != 'chain']
+    sections_a_set = set(sections_a)
+    for section, pallet, entry in sections_a + [s for s in sections_b if s not in sections_a_set]:
+        for key, change, value_a, value_b in diff_entry(reader_a, reader_b, section, pallet, entry):
+            yield {
+                'section': section, 'pallet': pallet, 'entry': entry,
+                'key': key, 'change': change, 'a': value_a, 'b': value_b,
+            }
+
+
+def write_diff_report(path_a, path_b, report_path):
+    """Writes every difference to {report_path}.jsonl and the per-entry counts to {report_path}.json"""
+    reader_a = open_snapshot(path_a)
+    reader_b = open_snapshot(path_b)
+    summary = {}
+    with open(f'{report_path}.jsonl', 'w') as f:
+        for record in diff_snapshots(reader_a, reader_b):
+            f.write(json.dumps(record, default=str) + '\n')
+            name = f'{record["section"]}:{record["pallet"]}::{record["entry"]}'
+            if name not in summary:
+                summary[name] = {'added': 0, 'removed': 0, 'changed': 0}
+            summary[name][record['change']] += 1
+
+    with open(f'{report_path}.json', 'w') as f:
+        json.dump({
+            'a': {'path': path_a, 'chain': reader_a.get_chain()},
+            'b': {'path': path_b, 'chain': reader_b.get_chain()},
+            'entries': summary,
+        }, f, indent=4)
+
+    for name, counts in summary.items():
+        print(f'{name}: added {counts["added"]}, removed {counts["removed"]}, changed {counts["changed"]}')
+    print(f'{len(summary)} entries differ, report is written to {report_path}.json and {report_path}.jsonl')
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        formatter_class=RawDescriptionHelpFormatter,
+        description='''
+        Diff the constants and storage of two snapshot_info outputs (pprint or jsonl)
+        python3 tools/snapshot_diff.py -a tools/snapshot/krest.v0.0.3 -b tools/snapshot/krest.7 -o krest.diff
+        '''
+    )
+    parser.add_argument('-a', '--old', type=str, required=True, help='The old snapshot')
+    parser.add_argument('-b', '--new', type=str, required=True, help='The new snapshot')
+    parser.add_argument(
+        '-o', '--output', type=str, default='snapshot.diff',
+        help='Path prefix of the report, written as .json (summary) and .jsonl (every difference)')
+
+    args = parser.parse_args()
+    write_diff_report(args.old, args.new, args.output)
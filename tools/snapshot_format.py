@@ -0,0 +1,257 @@
+import os
+import ast
+import gzip
+import json
+import zlib
+from contextlib import closing
+
+
+# Streaming snapshot format, JSON Lines split into sections, one section per pallet::entry:
+#     {"section": "storage", "pallet": "ParachainStaking", "entry": "Round", "kind": "value"}
+#     {"value": {...}}
+#     {"section": "storage", "pallet": "System", "entry": "Account", "kind": "map"}
+#     {"key": "5Grw...", "value": {...}}
+#     ...
+# The sections are chain, constant and storage. With compression (*.jsonl.gz), every section is
+# its own gzip member, so a section can be read by seeking to its offset without decompressing
+# the whole file. The offsets are kept in {path}.index; a missing index is rebuilt by scanning the file.
+
+SNAPSHOT_FORMAT_VERSION = 1
+INDEX_SUFFIX = '.index'
+
+
+def is_compressed(path):
+    return path.endswith('.gz')
+
+
+class SnapshotWriter():
+    def __init__(self, path):
+        self._path = path
+        self._compress = is_compressed(path)
+        self._file = open(path, 'wb')
+        self._stream = None
+        self._index = {}
+        self._counts = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _write_line(self, data):
+        self._stream.write(json.dumps(data, default=str).encode('utf-8') + b'\n')
+
+    def _start_section(self, section, pallet, entry, kind):
+        self._end_section()
+        self._index[f'{section}:{pallet}::{entry}'] = self._file.tell()
+        self._counts[f'{section}:{pallet}::{entry}'] = 0
+        self._stream = gzip.GzipFile(fileobj=self._file, mode='wb') if self._compress else self._file
+        self._write_line({'section': section, 'pallet': pallet, 'entry': entry, 'kind': kind})
+
+    def _end_section(self):
+        if self._stream is not None and self._stream is not self._file:
+            # Only finishes the gzip member, the file stays open
+            self._stream.close()
+        self._stream = None
+
+    def write_value(self, section, pallet, entry, value):
+        self._start_section(section, pallet, entry, 'value')
+        self._write_line({'value': value})
+        self._counts[f'{section}:{pallet}::{entry}'] = 1
+
+    def write_map(self, section, pallet, entry, items):
+        """items is an iterable of (key, value), it is written as it is consumed"""
+        self._start_section(section, pallet, entry, 'map')
+        for key, value in items:
+            self._write_line({'key': key, 'value': value})
+            self._counts[f'{section}:{pallet}::{entry}'] += 1
+
+    def write_chain(self, chain):
+        self.write_value('chain', '', '', chain)
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._end_section()
+        self._file.close()
+        with open(f'{self._path}{INDEX_SUFFIX}', 'w') as f:
+            json.dump({'version': SNAPSHOT_FORMAT_VERSION, 'sections': self._index, 'counts': self._counts}, f)
+
+
+class SnapshotReader():
+    """
+    Reads a streaming snapshot lazily, iter_sections/iter_items never hold more than one line in memory
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._compress = is_compressed(path)
+        self._counts = {}
+        self._index = self._load_index()
+
+    def _iter_lines(self, offset=0):
+        # GzipFile does not close the file it reads from, so the raw file is closed here
+        raw = open(self._path, 'rb')
+        try:
+            raw.seek(offset)
+            with gzip.GzipFile(fileobj=raw, mode='rb') if self._compress else raw as f:
+                for line in f:
+                    yield json.loads(line)
+        finally:
+            raw.close()
+
+    def _load_index(self):
+        index_path = f'{self._path}{INDEX_SUFFIX}'
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                index = json.load(f)
+            self._counts = index.get('counts', {})
+            return index['sections']
+        if self._compress:
+            # Member offsets are not visible through gzip, scan the members one by one
+            return self._scan_compressed_index()
+        return self._scan_index()
+
+    def _scan_index(self):
+        index = {}
+        offset = 0
+        with open(self._path, 'rb') as f:
+            for line in f:
+                if line.startswith(b'{"section"'):
+                    header = json.loads(line)
+                    index[f'{header["section"]}:{header["pallet"]}::{header["entry"]}'] = offset
+                offset += len(line)
+        return index
+
+    def _scan_compressed_index(self):
+        index = {}
+        size = os.path.getsize(self._path)
+        with open(self._path, 'rb') as raw:
+            while raw.tell() < size:
+                offset = raw.tell()
+                header = json.loads(self._read_gzip_member_header(raw))
+                index[f'{header["section"]}:{header["pallet"]}::{header["entry"]}'] = offset
+        return index
+
+    @staticmethod
+    def _read_gzip_member_header(raw):
+        """Returns the first line of the gzip member at the current offset and moves to the next member"""
+        # GzipFile reads on into the next members, zlib stops at the member end
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        header = b''
+        while not decompressor.eof:
+            chunk = raw.read(65536)
+            if not chunk:
+                raise ValueError(f'Truncated gzip member at {raw.tell()}')
+            data = decompressor.decompress(chunk)
+            if b'\n' not in header:
+                header += data
+        raw.seek(-len(decompressor.unused_data), os.SEEK_CUR)
+        return header.split(b'\n', 1)[0]
+
+    def has_section(self, section, pallet, entry):
+        return f'{section}:{pallet}::{entry}' in self._index
+
+    def get_chain(self):
+        return self.get_value('chain', '', '')
+
+    def get_item_num(self, section, pallet, entry):
+        name = f'{section}:{pallet}::{entry}'
+        if name not in self._counts:
+            self._counts[name] = sum(1 for _ in self.iter_items(section, pallet, entry))
+        return self._counts[name]
+
+    def get_kind(self, section, pallet, entry):
+        lines = self._iter_lines(self._index[f'{section}:{pallet}::{entry}'])
+        header = next(lines)
+        lines.close()
+        return header['kind']
+
+    def iter_sections(self):
+        """Yields (section, pallet, entry) in the file order"""
+        for name, offset in sorted(self._index.items(), key=lambda item: item[1]):
+            section, pallet_entry = name.split(':', 1)
+            pallet, entry = pallet_entry.split('::', 1)
+            yield section, pallet, entry
+
+    def iter_items(self, section, pallet, entry):
+        """Yields (key, value) of a map section, or one (None, value) of a value section"""
+        lines = self._iter_lines(self._index[f'{section}:{pallet}::{entry}'])
+        try:
+            next(lines)
+            for line in lines:
+                if 'section' in line:
+                    break
+                yield line.get('key'), line['value']
+        finally:
+            # The next section is not read to the end, close the file now instead of at the collection
+            lines.close()
+
+    def get_value(self, section, pallet, entry):
+        """Returns the value, a map section is loaded as a dict"""
+        if self.get_kind(section, pallet, entry) == 'value':
+            with closing(self.iter_items(section, pallet, entry)) as items:
+                return next(items)[1]
+        return dict(self.iter_items(section, pallet, entry))
+
+    def iter_all(self):
+        """Yields (section, pallet, entry, kind, key, value) for every line in a single pass"""
+        header = None
+        for line in self._iter_lines():
+            if 'section' in line:
+                header = line
+                continue
+            yield header['section'], header['pallet'], header['entry'], header['kind'], line.get('key'), line['value']
+
+
+class LegacySnapshotReader():
+    """
+    Reads the pprint snapshots (e.g. tools/snapshot/peaq.6) with the same interface as SnapshotReader,
+    the whole file is loaded because a python repr cannot be read partially
+    """
+
+    SECTIONS = {'constant': 'constants', 'storage': 'storage'}
+
+    def __init__(self, path):
+        with open(path) as f:
+            data = ast.literal_eval(f.read())
+        # Same types as a streaming snapshot after its json round trip, e.g. tuples become lists
+        self._data = json.loads(json.dumps(data, default=str))
+
+    def has_section(self, section, pallet, entry):
+        return entry in self._data[self.SECTIONS[section]].get(pallet, {})
+
+    def get_chain(self):
+        return self._data['chain']
+
+    def iter_sections(self):
+        yield 'chain', '', ''
+        for section, name in self.SECTIONS.items():
+            for pallet, entries in self._data[name].items():
+                for entry in entries:
+                    yield section, pallet, entry
+
+    def get_item_num(self, section, pallet, entry):
+        return 1
+
+    def get_kind(self, section, pallet, entry):
+        return 'value'
+
+    def get_value(self, section, pallet, entry):
+        if section == 'chain':
+            return self.get_chain()
+        return self._data[self.SECTIONS[section]][pallet][entry]
+
+    def iter_items(self, section, pallet, entry):
+        yield None, self.get_value(section, pallet, entry)
+
+    def iter_all(self):
+        for section, pallet, entry in self.iter_sections():
+            yield section, pallet, entry, 'value', None, self.get_value(section, pallet, entry)
+
+
+def open_snapshot(path):
+    if path.endswith('.jsonl') or path.endswith('.jsonl.gz'):
+        return SnapshotReader(path)
+    return LegacySnapshotReader(path)
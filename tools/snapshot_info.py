@@ -1,6 +1,18 @@
+import sys
+sys.path.append('./')
+
 from substrateinterface import SubstrateInterface
+from substrateinterface.storage import StorageKey
+from substrateinterface.exceptions import SubstrateRequestException
 from peaq.utils import get_chain
+from websocket import WebSocketException
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tools.snapshot_format import SnapshotWriter
 import argparse
+import json
+import os
+import shutil
+import threading
 from argparse import RawDescriptionHelpFormatter
 
 
@@ -46,6 +58,11 @@ STORAGE_SKIP_LIST = {
     'TransactionPayment': 'all',
 }
 
+# state_getKeysPaged returns at most 1000 keys per call
+RAW_KEY_PAGE_SIZE = 1000
+DUMP_WORKER_NUM = 8
+DUMP_RETRY_TIMES = 3
+
 SHEET_INTERESTED_LIST = {
     'InflationManager::InflationConfiguration',
     'InflationManager::InflationParameters',
@@ -118,36 +135,134 @@ SHEET_INTERESTED_LIST = {
 }
 
 
-def query_storage(substrate, module, storage_function):
-    try:
-        result = substrate.query(
-            module=module,
-            storage_function=storage_function,
-        )
-        print(f'Querying data: {module}::{storage_function}: {result.value}')
-        return result.value
-    except ValueError:
-        pass
+def _rpc_result(substrate, method, params):
+    response = substrate.rpc_request(method, params)
+    if 'error' in response:
+        raise SubstrateRequestException(response['error']['message'])
+    return response['result']
 
-    start_key = None
-    batch_size = 1000
-    out = {}
+
+def query_raw_map(substrate, prefix, block_hash):
+    """Returns all [key, value] hex pairs under prefix, fetched a full page of keys per request"""
+    pairs = []
+    start_key = prefix
     while True:
-        result = substrate.query_map(
-            module=module,
-            storage_function=storage_function,
-            start_key=start_key,
-            page_size=batch_size,
-        )
-        for k, v in result.records:
-            try:
-                out[str(k.value)] = v.value
-            except AttributeError:
-                out[str(k)] = v.value
-        if len(result.records) < batch_size:
-            break
-        start_key = result.last_key
-    print(f'Querying map: {module}::{storage_function}: v.value')
+        keys = _rpc_result(substrate, 'state_getKeysPaged', [prefix, RAW_KEY_PAGE_SIZE, start_key, block_hash])
+        if keys:
+            for change_set in _rpc_result(substrate, 'state_queryStorageAt', [keys, block_hash]):
+                pairs += change_set['changes']
+        if len(keys) < RAW_KEY_PAGE_SIZE:
+            return pairs
+        start_key = keys[-1]
+
+
+def _get_concat_hash_len(key_hasher):
+    return {'Blake2_128Concat': 16, 'Twox64Concat': 8, 'Identity': 0}[key_hasher]
+
+
+def decode_raw_map(substrate, storage_item, prefix, pairs, block_hash):
+    """Decodes the raw pairs of a map the same way as query_map does"""
+    param_types = storage_item.get_params_type_string()
+    key_hashers = storage_item.get_param_hashers()
+    key_type_string = []
+    for param_type, key_hasher in zip(param_types, key_hashers):
+        key_type_string.append(f'[u8; {_get_concat_hash_len(key_hasher)}]')
+        key_type_string.append(param_type)
+    key_type_string = f"({', '.join(key_type_string)})"
+    value_type = storage_item.get_value_type_string()
+
+    out = {}
+    for key, value in pairs:
+        # An entry which cannot be decoded is kept as raw hex under its raw key, so no entry is lost
+        try:
+            key_obj = substrate.decode_scale(
+                key_type_string, '0x' + key[len(prefix):], block_hash=block_hash, return_scale_obj=True)
+            if len(param_types) == 1:
+                item_key = str(key_obj.value_object[1].value)
+            else:
+                item_key = str(tuple(key_obj.value_object[idx] for idx in range(1, len(param_types) * 2, 2)))
+        except Exception as e:
+            print(f'Cannot decode the key {key} as {key_type_string}, keep the raw entry: {e}')
+            out[key] = value
+            continue
+        try:
+            out[item_key] = substrate.decode_scale(value_type, value, block_hash=block_hash)
+        except Exception as e:
+            print(f'Cannot decode the value of {item_key} as {value_type}, keep the raw value {value}: {e}')
+            out[item_key] = value
+    return out
+
+
+def _get_storage_item(substrate, module, storage_function):
+    return substrate.metadata.get_metadata_pallet(module).get_storage_function(storage_function)
+
+
+def get_storage_prefix(substrate, module, storage_function):
+    """The key of a plain entry, or the prefix of all keys of a map"""
+    return StorageKey.create_from_storage_function(
+        module, storage_function, [], runtime_config=substrate.runtime_config, metadata=substrate.metadata
+    ).to_hex()
+
+
+def get_raw_plain_value(storage_item, raw_value):
+    """Falls back to the metadata default like substrate.query does, None for an empty optional entry"""
+    if raw_value is not None:
+        return raw_value
+    if storage_item.value['modifier'] == 'Default':
+        default = storage_item.value_object['default'].value_object
+        return f'0x{default.hex()}' if isinstance(default, bytes) else default
+    return None
+
+
+def decode_raw_value(substrate, storage_item, raw_value, block_hash):
+    if raw_value is None:
+        return None
+    return substrate.decode_scale(storage_item.get_value_type_string(), raw_value, block_hash=block_hash)
+
+
+def should_decode(module, storage_function, decode_mode):
+    return decode_mode == 'all' or f'{module}::{storage_function}' in SHEET_INTERESTED_LIST
+
+
+def query_plain_storages(substrate, module, storage_functions, block_hash, decode_mode='all'):
+    """
+    Returns {storage_function: value} of plain entries of one pallet, all fetched in one request.
+    The values which should not be decoded are kept as raw hex.
+    """
+    substrate.init_runtime(block_hash=block_hash)
+    keys = {get_storage_prefix(substrate, module, storage_function): storage_function
+            for storage_function in storage_functions}
+    raw_values = {}
+    for change_set in _rpc_result(substrate, 'state_queryStorageAt', [list(keys), block_hash]):
+        raw_values.update({key: value for key, value in change_set['changes']})
+
+    out = {}
+    for key, storage_function in keys.items():
+        storage_item = _get_storage_item(substrate, module, storage_function)
+        raw_value = get_raw_plain_value(storage_item, raw_values.get(key))
+        if should_decode(module, storage_function, decode_mode):
+            out[storage_function] = decode_raw_value(substrate, storage_item, raw_value, block_hash)
+        else:
+            out[storage_function] = raw_value
+        print(f'Querying data: {module}::{storage_function}: {out[storage_function]}')
+    return out
+
+
+def query_storage(substrate, module, storage_function, block_hash=None, decode_mode='all'):
+    if block_hash is None:
+        block_hash = substrate.get_chain_head()
+    substrate.init_runtime(block_hash=block_hash)
+    storage_item = _get_storage_item(substrate, module, storage_function)
+    if not storage_item.get_params_type_string():
+        return query_plain_storages(substrate, module, [storage_function], block_hash, decode_mode)[storage_function]
+
+    prefix = get_storage_prefix(substrate, module, storage_function)
+    pairs = query_raw_map(substrate, prefix, block_hash)
+    if should_decode(module, storage_function, decode_mode):
+        out = decode_raw_map(substrate, storage_item, prefix, pairs, block_hash)
+    else:
+        out = {key: value for key, value in pairs}
+    print(f'Querying map: {module}::{storage_function}: {len(out)} keys')
     return out
 
 
@@ -163,6 +278,11 @@ def query_constant(substrate, module, storage_function):
     return result.value
 
 
+def is_state_discarded(error):
+    # A non-archive node only keeps the state of the last blocks, retrying does not bring it back
+    return 'state already discarded' in str(error).lower()
+
+
 def is_storage_ignore(module, storage_function):
     if module not in STORAGE_SKIP_LIST:
         return False
@@ -173,21 +293,136 @@ def is_storage_ignore(module, storage_function):
     return False
 
 
-def get_all_storage(substrate, metadata, out, interested_out):
-    for pallet in metadata.value[1]['V14']['pallets']:
-        if not pallet['storage']:
-            continue
+class StorageDumper():
+    """
+    Dumps storage entries from several connections at once, all at the same block.
+    Every finished entry is checkpointed to its own file, so a rerun only fetches the missing ones.
+    """
 
-        out[pallet['name']] = {}
-        for entry in pallet['storage']['entries']:
-            if is_storage_ignore(pallet['name'], entry['name']):
-                out[pallet['name']][entry['name']] = 'ignored'
+    def __init__(self, url, block_hash, checkpoint_folder, decode_mode='all'):
+        self._url = url
+        self._block_hash = block_hash
+        self._checkpoint_folder = checkpoint_folder
+        self._decode_mode = decode_mode
+        self._local = threading.local()
+
+    def _get_substrate(self, reconnect=False):
+        if reconnect and hasattr(self._local, 'substrate'):
+            self._local.substrate.close()
+            del self._local.substrate
+        if not hasattr(self._local, 'substrate'):
+            self._local.substrate = SubstrateInterface(url=self._url)
+        return self._local.substrate
+
+    def _get_checkpoint_path(self, module, storage_function):
+        return os.path.join(self._checkpoint_folder, f'{module}.{storage_function}.json')
+
+    def _load_checkpoint(self, module, storage_function):
+        with open(self._get_checkpoint_path(module, storage_function)) as f:
+            return json.load(f)
+
+    def _write_checkpoint(self, module, storage_function, data):
+        path = self._get_checkpoint_path(module, storage_function)
+        # Write to a temp file first, an interrupted write must not look like a finished entry
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(data, f, default=str)
+        os.replace(f'{path}.tmp', path)
+        # Normalize through json, so the fresh and the resumed entries look the same
+        return self._load_checkpoint(module, storage_function)
+
+    def _query_with_retry(self, name, query):
+        for i in range(DUMP_RETRY_TIMES):
+            try:
+                return query(self._get_substrate(i > 0))
+            except (ConnectionError, WebSocketException, SubstrateRequestException) as e:
+                if is_state_discarded(e):
+                    raise IOError(
+                        f'The state of the checkpoint block {self._block_hash} is pruned by {self._url}, '
+                        f'dump from an archive node or remove {self._checkpoint_folder} to start over') from e
+                print(f'Querying {name} failed, retry {i + 1}/{DUMP_RETRY_TIMES}: {e}')
+        raise IOError(f'Cannot query {name}')
+
+    def dump_entry(self, module, storage_function):
+        if os.path.exists(self._get_checkpoint_path(module, storage_function)):
+            print(f'Resuming from checkpoint: {module}::{storage_function}')
+            return self._load_checkpoint(module, storage_function)
+
+        data = self._query_with_retry(
+            f'{module}::{storage_function}',
+            lambda substrate: query_storage(substrate, module, storage_function, self._block_hash, self._decode_mode))
+        return self._write_checkpoint(module, storage_function, data)
+
+    def dump_plain_entries(self, module, storage_functions):
+        """Dumps the plain entries of one pallet with one request, returns [(storage_function, data)]"""
+        missing = [storage_function for storage_function in storage_functions
+                   if not os.path.exists(self._get_checkpoint_path(module, storage_function))]
+        if missing:
+            values = self._query_with_retry(
+                f'{module}::{missing}',
+                lambda substrate: query_plain_storages(
+                    substrate, module, missing, self._block_hash, self._decode_mode))
+            for storage_function, data in values.items():
+                self._write_checkpoint(module, storage_function, data)
+        return [(storage_function, self._load_checkpoint(module, storage_function))
+                for storage_function in storage_functions]
+
+
+def get_checkpoint_block_hash(substrate, checkpoint_folder):
+    """Returns the block hash the checkpoint is taken at, or pins the current head for a new checkpoint"""
+    os.makedirs(checkpoint_folder, exist_ok=True)
+    path = os.path.join(checkpoint_folder, 'block_hash')
+    if os.path.exists(path):
+        with open(path) as f:
+            return f.read().strip()
+    block_hash = substrate.get_chain_head()
+    with open(path, 'w') as f:
+        f.write(block_hash)
+    return block_hash
+
+
+def iter_all_storage(url, block_hash, metadata, checkpoint_folder, worker_num=DUMP_WORKER_NUM, decode_mode='all'):
+    """Yields (module, storage_function, is_map, data) of every entry as soon as it is fetched"""
+    dumper = StorageDumper(url, block_hash, checkpoint_folder, decode_mode)
+    futures = {}
+    with ThreadPoolExecutor(worker_num) as executor:
+        for pallet in metadata.value[1]['V14']['pallets']:
+            if not pallet['storage']:
                 continue
-            data = query_storage(substrate, pallet['name'], entry['name'])
-            if f'{pallet["name"]}::{entry["name"]}' in interested_out:
-                interested_out[f'{pallet["name"]}::{entry["name"]}'] = data
 
-            out[pallet['name']][entry['name']] = data
+            plain_entries = []
+            for entry in pallet['storage']['entries']:
+                if is_storage_ignore(pallet['name'], entry['name']):
+                    yield pallet['name'], entry['name'], False, 'ignored'
+                elif 'Map' in entry['type']:
+                    future = executor.submit(dumper.dump_entry, pallet['name'], entry['name'])
+                    futures[future] = (pallet['name'], entry['name'])
+                else:
+                    plain_entries.append(entry['name'])
+            if plain_entries:
+                future = executor.submit(dumper.dump_plain_entries, pallet['name'], plain_entries)
+                futures[future] = (pallet['name'], None)
+
+        for future in as_completed(futures):
+            # Maps are one entry per future, the plain entries of a pallet share one
+            module, map_storage_function = futures.pop(future)
+            if map_storage_function:
+                yield module, map_storage_function, True, future.result()
+                continue
+            for storage_function, data in future.result():
+                yield module, storage_function, False, data
+
+
+def get_all_storage(url, block_hash, metadata, out, interested_out, checkpoint_folder,
+                    worker_num=DUMP_WORKER_NUM, decode_mode='all'):
+    for pallet in metadata.value[1]['V14']['pallets']:
+        if pallet['storage']:
+            out[pallet['name']] = {}
+
+    for module, storage_function, is_map, data in iter_all_storage(
+            url, block_hash, metadata, checkpoint_folder, worker_num, decode_mode):
+        if f'{module}::{storage_function}' in interested_out:
+            interested_out[f'{module}::{storage_function}'] = data
+        out[module][storage_function] = data
 
     return out
 
@@ -207,6 +442,27 @@ def get_all_constants(substrate, metadata, out, interested_out):
     return out
 
 
+def write_stream_snapshot(filepath, url, substrate, metadata, chain, interested_out, checkpoint_folder,
+                          worker_num=DUMP_WORKER_NUM, decode_mode='all'):
+    """Writes every entry to the streaming snapshot as soon as it is fetched, the state is never fully in memory"""
+    with SnapshotWriter(filepath) as writer:
+        writer.write_chain(chain)
+        for module, storage_function, is_map, data in iter_all_storage(
+                url, chain['block_hash'], metadata, checkpoint_folder, worker_num, decode_mode):
+            if f'{module}::{storage_function}' in interested_out:
+                interested_out[f'{module}::{storage_function}'] = data
+            if is_map:
+                writer.write_map('storage', module, storage_function, data.items())
+            else:
+                writer.write_value('storage', module, storage_function, data)
+
+        constants = get_all_constants(substrate, metadata, {}, interested_out)
+        for module, entries in constants.items():
+            for name, value in entries.items():
+                writer.write_value('constant', module, name, value)
+    print(f'Wrote to {filepath}')
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(
         formatter_class=RawDescriptionHelpFormatter,
@@ -228,6 +484,18 @@ if __name__ == '__main__':
         '-f', '--folder', type=str, default='tools/snapshot',
         help='The output folder to write the data to'
     )
+    parser.add_argument(
+        '-w', '--worker', type=int, default=DUMP_WORKER_NUM,
+        help='Number of connections to dump the storage with'
+    )
+    parser.add_argument(
+        '--format', type=str, default='pprint', choices=['pprint', 'jsonl', 'jsonl.gz'],
+        help='pprint: one python repr, jsonl/jsonl.gz: streaming snapshot, see tools/snapshot_format.py'
+    )
+    parser.add_argument(
+        '--decode', type=str, default='all', choices=['all', 'interested'],
+        help='all: decode every entry, interested: only decode the sheet entries and keep the others as raw hex'
+    )
     parser.add_argument(
         '--sheet', default=False,
         action="store_true",
@@ -252,15 +520,28 @@ if __name__ == '__main__':
         'storage': {},
     }
 
+    # Rerun after a failure resumes from the checkpoint
+    checkpoint_folder = os.path.join(
+        args.folder or '.', f'{args.runtime}.{substrate.runtime_version}.{args.decode}.checkpoint')
+    block_hash = get_checkpoint_block_hash(substrate, checkpoint_folder)
+    out['chain']['block_hash'] = block_hash
+
     interested_out = {k: None for k in SHEET_INTERESTED_LIST}
-    get_all_storage(substrate, metadata, out['storage'], interested_out)
-    get_all_constants(substrate, metadata, out['constants'], interested_out)
+    if args.format == 'pprint':
+        get_all_storage(
+            runtime, block_hash, metadata, out['storage'], interested_out, checkpoint_folder, args.worker, args.decode)
+        get_all_constants(substrate, metadata, out['constants'], interested_out)
 
-    pp.pprint(out)
-    if args.folder:
-        filepath = f'{args.folder}/{args.runtime}.{substrate.runtime_version}'
-        with open(filepath, 'w') as f:
-            f.write(pp.pformat(out))
+        pp.pprint(out)
+        if args.folder:
+            filepath = f'{args.folder}/{args.runtime}.{substrate.runtime_version}'
+            with open(filepath, 'w') as f:
+                f.write(pp.pformat(out))
+    else:
+        write_stream_snapshot(
+            os.path.join(args.folder or '.', f'{args.runtime}.{substrate.runtime_version}.{args.format}'),
+            runtime, substrate, metadata, out['chain'], interested_out, checkpoint_folder, args.worker, args.decode)
+    shutil.rmtree(checkpoint_folder)
 
     pp.pprint(interested_out)
 
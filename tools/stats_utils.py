@@ -0,0 +1,17 @@
+def get_percentiles(values, percents):
+    """
+    Returns {percent: value} with the linear interpolation between the closest ranks, same as numpy.percentile,
+    the values are only sorted once for all percents
+    """
+    values = sorted(values)
+    out = {}
+    for percent in percents:
+        rank = (len(values) - 1) * percent / 100
+        low = int(rank)
+        high = min(low + 1, len(values) - 1)
+        out[percent] = values[low] + (values[high] - values[low]) * (rank - low)
+    return out
+
+
+def get_percentile(values, percent):
+    return get_percentiles(values, [percent])[percent]
@@ -0,0 +1,125 @@
+from collections import defaultdict
+from scalecodec.base import ScaleBytes
+from substrateinterface.storage import StorageKey
+from substrateinterface.exceptions import SubstrateRequestException
+from tools.rpc_batch import RpcBatch
+
+
+# Blocks covered by one state_queryStorage request
+STORAGE_SERIES_CHUNK_SIZE = 256
+
+
+def _rpc_result(substrate, method, params):
+    response = substrate.rpc_request(method, params)
+    if 'error' in response:
+        raise SubstrateRequestException(response['error']['message'])
+    return response['result']
+
+
+def get_block_hashes(substrate, start_block, end_block):
+    """Returns the hashes of the blocks in [start_block, end_block], chain_getBlockHash takes a list"""
+    return _rpc_result(substrate, 'chain_getBlockHash', [list(range(start_block, end_block + 1))])
+
+
+def _query_raw_chunk(substrate, keys, block_hashes):
+    """Returns {block_hash: [[key, raw value]]} of the blocks where any of the keys changes"""
+    try:
+        change_sets = _rpc_result(substrate, 'state_queryStorage', [keys, block_hashes[0], block_hashes[-1]])
+    except SubstrateRequestException as e:
+        # state_queryStorage is an unsafe RPC, fall back to one state_queryStorageAt per block
+        print(f'state_queryStorage is not available, query every block: {e}')
+        change_sets = []
+        for block_hash in block_hashes:
+            change_sets += _rpc_result(substrate, 'state_queryStorageAt', [keys, block_hash])
+    return {change_set['block']: change_set['changes'] for change_set in change_sets}
+
+
+def iter_raw_storage_series(substrate, keys, start_block, end_block, chunk_size=STORAGE_SERIES_CHUNK_SIZE):
+    """
+    Yields (block_num, block_hash, {key: raw value}) for every block in [start_block, end_block],
+    keys are storage key hex strings and a missing value is None.
+    Each chunk of blocks costs one chain_getBlockHash and one state_queryStorage request.
+    """
+    values = {}
+    for chunk_start in range(start_block, end_block + 1, chunk_size):
+        chunk_end = min(chunk_start + chunk_size - 1, end_block)
+        block_hashes = get_block_hashes(substrate, chunk_start, chunk_end)
+        changes = _query_raw_chunk(substrate, keys, block_hashes)
+        # The first block of every chunk lists all keys, so the values never leak across chunks
+        values = dict.fromkeys(keys)
+        for block_num, block_hash in enumerate(block_hashes, chunk_start):
+            values.update({key: value for key, value in changes.get(block_hash, [])})
+            yield block_num, block_hash, dict(values)
+
+
+def _fill_runtime_versions(substrate, block_hashes, versions, low, high):
+    """
+    Fills versions[low:high + 1] with the spec versions at block_hashes, spec versions only grow,
+    so a range with the same version at both ends is one runtime and only the upgrades are bisected.
+    """
+    with RpcBatch(substrate) as batch:
+        asked = {idx: batch.add('state_getRuntimeVersion', [block_hashes[idx]]) for idx in {low, high} if versions[idx] is None}
+    for idx, version in asked.items():
+        versions[idx] = version.result['specVersion']
+    if versions[low] == versions[high]:
+        versions[low:high + 1] = [versions[low]] * (high - low + 1)
+    elif high - low > 1:
+        mid = (low + high) // 2
+        _fill_runtime_versions(substrate, block_hashes, versions, low, mid)
+        _fill_runtime_versions(substrate, block_hashes, versions, mid, high)
+
+
+def _get_parent_runtime_versions(substrate, start_block, block_hashes):
+    """
+    Returns the spec version every block of block_hashes, starting at start_block, is decoded with.
+    That is the runtime of the parent, like init_runtime uses, the genesis uses its own one.
+    """
+    first_parent = block_hashes[0] if start_block == 0 else get_block_hashes(substrate, start_block - 1, start_block - 1)[0]
+    parent_hashes = [first_parent] + block_hashes[:-1]
+    versions = [None] * len(parent_hashes)
+    _fill_runtime_versions(substrate, parent_hashes, versions, 0, len(parent_hashes) - 1)
+    return versions
+
+
+def get_storage_series(substrate, storage_keys, start_block, end_block, chunk_size=STORAGE_SERIES_CHUNK_SIZE):
+    """
+    storage_keys are created by substrate.create_storage_key.
+    Returns {block_num: [decoded value of every storage key]} for every block in [start_block, end_block],
+    each block is decoded with the runtime of its parent and each distinct raw value once per runtime.
+    """
+    keys = [storage_key.to_hex() for storage_key in storage_keys]
+    rows = list(iter_raw_storage_series(substrate, keys, start_block, end_block, chunk_size))
+    if not rows:
+        return {}
+    versions = _get_parent_runtime_versions(substrate, start_block, [block_hash for _, block_hash, _ in rows])
+
+    block_groups = defaultdict(list)
+    for row, version in zip(rows, versions):
+        block_groups[version].append(row)
+
+    out = {}
+    for group in block_groups.values():
+        # init_runtime loads the runtime of the parent of this block, which is the version of the group
+        substrate.init_runtime(block_hash=group[0][1])
+        runtime_keys = [
+            StorageKey.create_from_storage_function(
+                storage_key.pallet, storage_key.storage_function, storage_key.params,
+                runtime_config=substrate.runtime_config, metadata=substrate.metadata)
+            for storage_key in storage_keys]
+        decoded = {}
+        for block_num, _, values in group:
+            row = []
+            for key, runtime_key in zip(keys, runtime_keys):
+                if (key, values[key]) not in decoded:
+                    data = None if values[key] is None else ScaleBytes(values[key])
+                    decoded[(key, values[key])] = runtime_key.decode_scale_value(data).value
+                row.append(decoded[(key, values[key])])
+            out[block_num] = row
+    return dict(sorted(out.items()))
+
+
+def get_account_balance_series(substrate, addr, start_block, end_block):
+    """Returns {block_num: free balance of addr} for every block in [start_block, end_block]"""
+    storage_key = substrate.create_storage_key('System', 'Account', [addr])
+    series = get_storage_series(substrate, [storage_key], start_block, end_block)
+    return {block_num: int(row[0]['data']['free']) for block_num, row in series.items()}
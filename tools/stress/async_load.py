@@ -0,0 +1,347 @@
+import sys
+sys.path.append('.')
+
+import json
+import time
+import random
+import asyncio
+import threading
+import websockets
+from concurrent.futures import ThreadPoolExecutor
+from web3 import Web3, AsyncWeb3, AsyncHTTPProvider
+from substrateinterface import SubstrateInterface, Keypair, KeypairType
+from peaq.sudo_extrinsic import funds
+from peaq.eth import calculate_evm_account
+from tools.constants import KP_GLOBAL_SUDO
+from tools.peaq_eth_utils import get_contract, get_eth_chain_id, generate_random_hex
+from tools.nonce_manager import NonceManager, get_evm_nonce_manager
+from tools.stress.latency_recorder import TxLatencyRecorder
+
+
+STRESS_MNEMONIC = 'harbor camp unveil few second banana sell globe soft special again trophy'
+DID_ADDRESS = '0x0000000000000000000000000000000000000800'
+ABI_FILE = 'ETH/did/abi'
+FUND_BATCH_SIZE = 100
+SIGNER_THREAD_NUM = 8
+INCLUSION_TIMEOUT = 120
+FINALIZATION_TIMEOUT = 120
+EVM_GAS_MARGIN = 1.5
+# Statuses after which the node ends the watch subscription by itself
+TERMINAL_STATUSES = ['finalized', 'finalityTimeout', 'usurped', 'dropped', 'invalid']
+
+
+def get_stress_evm_keypairs(num):
+    return [
+        Keypair.create_from_uri(f"{STRESS_MNEMONIC}/m/44'/60'/0'/0/{i}", crypto_type=KeypairType.ECDSA)
+        for i in range(num)
+    ]
+
+
+def get_stress_substrate_keypairs(num):
+    return [Keypair.create_from_uri(f'{STRESS_MNEMONIC}//stress//{i}') for i in range(num)]
+
+
+def fund_stress_accounts(substrate, addrs, tokens):
+    for i in range(0, len(addrs), FUND_BATCH_SIZE):
+        receipt = funds(substrate, KP_GLOBAL_SUDO, addrs[i:i + FUND_BATCH_SIZE], tokens)
+        if not receipt.is_success:
+            raise IOError(f'Fund stress accounts failed: {receipt.error_message}')
+
+
+class AsyncSubstrateRpc():
+    """
+    Minimal asyncio JSON-RPC client over one websocket, responses and subscription
+    updates are dispatched by a single reader task.
+    """
+
+    def __init__(self, url):
+        self._url = url
+        self._ws = None
+        self._reader = None
+        self._request_id = 0
+        self._pending = {}
+        self._subscriptions = {}
+        self._closed = None
+
+    async def connect(self):
+        self._ws = await websockets.connect(self._url, max_size=None)
+        self._reader = asyncio.create_task(self._read())
+
+    async def close(self):
+        self._reader.cancel()
+        await self._ws.close()
+
+    async def _read(self):
+        error = ConnectionError(f'Connection to {self._url} is closed')
+        try:
+            async for raw in self._ws:
+                message = json.loads(raw)
+                if 'id' in message and message['id'] in self._pending:
+                    future, is_subscription = self._pending.pop(message['id'])
+                    if is_subscription and 'result' in message:
+                        # Register here, the first update can arrive before the caller resumes
+                        self._subscriptions[message['result']] = asyncio.Queue()
+                    future.set_result(message)
+                elif 'params' in message and message['params'].get('subscription') in self._subscriptions:
+                    self._subscriptions[message['params']['subscription']].put_nowait(message['params']['result'])
+        except Exception as e:
+            error = ConnectionError(f'Connection to {self._url} failed: {e}')
+        finally:
+            # Nothing answers the waiters anymore, they get the error instead of hanging
+            self._closed = error
+            for future, _ in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+            for queue in self._subscriptions.values():
+                queue.put_nowait(error)
+
+    async def request(self, method, params, is_subscription=False):
+        if self._closed:
+            raise self._closed
+        self._request_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[self._request_id] = (future, is_subscription)
+        await self._ws.send(json.dumps({
+            'jsonrpc': '2.0',
+            'id': self._request_id,
+            'method': method,
+            'params': params,
+        }))
+        message = await future
+        if 'error' in message:
+            raise IOError(message['error'])
+        return message['result']
+
+    async def subscribe(self, method, params):
+        subscription_id = await self.request(method, params, True)
+        return self._subscriptions[subscription_id]
+
+    @staticmethod
+    async def get_update(queue, timeout=None):
+        """Next update of a subscription queue, raises the error the reader put in when the connection ended"""
+        update = await asyncio.wait_for(queue.get(), timeout)
+        if isinstance(update, Exception):
+            raise update
+        return update
+
+    async def get_block_number(self, block_hash):
+        header = await self.request('chain_getHeader', [block_hash])
+        return int(header['number'], 16)
+
+    async def submit_and_watch(self, extrinsic_hex, timeout, on_ready=None):
+        """
+        Returns the block hash including the extrinsic, raises IOError if it is dropped or invalid.
+        on_ready is called once the extrinsic is accepted by the pool.
+        """
+        subscription_id = await self.request('author_submitAndWatchExtrinsic', [extrinsic_hex], True)
+        queue = self._subscriptions[subscription_id]
+        ended = False
+        try:
+            while True:
+                try:
+                    status = await self.get_update(queue, timeout)
+                except ConnectionError:
+                    ended = True
+                    raise
+                # Statuses with data, e.g. {'inBlock': hash} or {'usurped': hash}, are a dict of one key
+                key = status if isinstance(status, str) else next(iter(status))
+                ended = key in TERMINAL_STATUSES
+                if key in ['ready', 'future'] and on_ready:
+                    on_ready()
+                    on_ready = None
+                if key == 'inBlock':
+                    return status['inBlock']
+                if ended:
+                    raise IOError(f'Extrinsic is {key}: {status}')
+        finally:
+            self._subscriptions.pop(subscription_id, None)
+            if not ended:
+                await self.request('author_unwatchExtrinsic', [subscription_id])
+
+
+class RateLimiter():
+    """Spaces out the submissions, the rate grows linearly to target_tps during ramp_up seconds"""
+
+    def __init__(self, target_tps, ramp_up):
+        self._target_tps = target_tps
+        self._ramp_up = ramp_up
+        self._start = time.time()
+        self._next_slot = self._start
+
+    def _get_rate(self, now):
+        if not self._ramp_up:
+            return self._target_tps
+        return max(1.0, self._target_tps * min(1.0, (now - self._start) / self._ramp_up))
+
+    async def wait(self):
+        now = time.time()
+        slot = max(self._next_slot, now)
+        self._next_slot = slot + 1.0 / self._get_rate(now)
+        await asyncio.sleep(slot - now)
+
+
+class AsyncLoadGenerator():
+    def __init__(self, substrate_url, evm_url, target_tps, ramp_up, in_flight, duration, report_path):
+        self._substrate_url = substrate_url
+        self._evm_url = evm_url
+        self._in_flight = in_flight
+        self._deadline = time.time() + duration
+        self._limiter = RateLimiter(target_tps, ramp_up)
+        self._recorder = TxLatencyRecorder(report_path)
+        self._block_nums = {}
+        self._signers = ThreadPoolExecutor(SIGNER_THREAD_NUM)
+        self._signer_local = threading.local()
+
+        self._substrate = SubstrateInterface(url=substrate_url)
+        self._substrate_nonce = NonceManager(self._substrate.get_account_nonce)
+        w3 = Web3(Web3.HTTPProvider(evm_url))
+        self._evm_nonce = get_evm_nonce_manager(w3)
+        self._evm_chain_id = get_eth_chain_id(self._substrate)
+        self._evm_gas_price = w3.eth.gas_price
+        self._contract = get_contract(w3, DID_ADDRESS, ABI_FILE)
+        self._evm_gas = None
+        self._evm_gas_lock = threading.Lock()
+
+    def _create_did_extrinsic(self, kp, nonce):
+        # Extrinsic creation queries the runtime, so every signer thread owns a connection
+        if not hasattr(self._signer_local, 'substrate'):
+            self._signer_local.substrate = SubstrateInterface(url=self._substrate_url)
+        substrate = self._signer_local.substrate
+        call = substrate.compose_call('PeaqDid', 'add_attribute', {
+            'did_account': kp.ss58_address,
+            'name': generate_random_hex(20),
+            'value': generate_random_hex(20),
+            'valid_for': None,
+        })
+        # Immortal, a mortal era costs one more query per extrinsic
+        return substrate.create_signed_extrinsic(call=call, keypair=kp, nonce=nonce)
+
+    def _create_did_evm_tx(self, kp, nonce):
+        data = self._contract.encodeABI(
+            fn_name='addAttribute',
+            args=[kp.ss58_address, generate_random_hex(20), generate_random_hex(20), 100000])
+        tx = {
+            'from': kp.ss58_address,
+            'to': DID_ADDRESS,
+            'data': data,
+            'value': 0,
+            'gasPrice': self._evm_gas_price,
+            'nonce': nonce,
+            'chainId': self._evm_chain_id,
+        }
+        # Runs on the signer threads, only the first one estimates the gas
+        with self._evm_gas_lock:
+            if self._evm_gas is None:
+                self._evm_gas = int(self._contract.w3.eth.estimate_gas(tx) * EVM_GAS_MARGIN)
+        tx['gas'] = self._evm_gas
+        return self._contract.w3.eth.account.sign_transaction(tx, private_key=kp.private_key)
+
+    async def _get_block_number(self, rpc, block_hash):
+        # Many extrinsics share one block, so only query the header once
+        if block_hash not in self._block_nums:
+            self._block_nums[block_hash] = await rpc.get_block_number(block_hash)
+        return self._block_nums[block_hash]
+
+    async def _send_substrate(self, rpc, kp):
+        nonce = self._substrate_nonce.next_nonce(kp.ss58_address)
+        tx_id = f'{kp.ss58_address}-{nonce}'
+        loop = asyncio.get_running_loop()
+        try:
+            extrinsic = await loop.run_in_executor(self._signers, self._create_did_extrinsic, kp, nonce)
+            self._recorder.submitted(tx_id, 'substrate')
+            block_hash = await rpc.submit_and_watch(
+                str(extrinsic.data), INCLUSION_TIMEOUT, lambda: self._recorder.accepted(tx_id))
+            self._recorder.included(tx_id, await self._get_block_number(rpc, block_hash))
+        except Exception as e:
+            # Dropped, invalid, timed out or never sent, the account would stall in 'future' without a resync
+            self._substrate_nonce.resync(kp.ss58_address)
+            print(f'Substrate did_add failed: {kp.ss58_address}, {e}')
+            self._recorder.failed(tx_id, e, 'substrate')
+
+    async def _send_evm(self, aw3, kp):
+        nonce = self._evm_nonce.next_nonce(kp.ss58_address)
+        tx_id = f'{kp.ss58_address}-{nonce}'
+        loop = asyncio.get_running_loop()
+        try:
+            signed_txn = await loop.run_in_executor(self._signers, self._create_did_evm_tx, kp, nonce)
+            self._recorder.submitted(tx_id, 'evm')
+            tx_hash = await aw3.eth.send_raw_transaction(signed_txn.rawTransaction)
+            self._recorder.accepted(tx_id)
+            receipt = await aw3.eth.wait_for_transaction_receipt(
+                tx_hash, timeout=INCLUSION_TIMEOUT, poll_latency=1)
+            if receipt['status'] != 1:
+                raise IOError(f'EVM tx {tx_hash.hex()} is reverted')
+            self._recorder.included(tx_id, receipt['blockNumber'])
+        except Exception as e:
+            self._evm_nonce.resync(kp.ss58_address)
+            print(f'EVM did_add failed: {kp.ss58_address}, {e}')
+            self._recorder.failed(tx_id, e, 'evm')
+
+    async def _account_worker(self, send, kp):
+        while time.time() < self._deadline:
+            await self._limiter.wait()
+            await send(kp)
+
+    async def _report_periodically(self, period):
+        while True:
+            await asyncio.sleep(period)
+            self._recorder.report()
+
+    async def _track_finalization(self, rpc):
+        queue = await rpc.subscribe('chain_subscribeFinalizedHeads', [])
+        while True:
+            header = await rpc.get_update(queue)
+            self._recorder.finalized(int(header['number'], 16))
+
+    async def _wait_finalization(self, timeout):
+        deadline = time.time() + timeout
+        while self._recorder.get_pending_finalization_num() and time.time() < deadline:
+            await asyncio.sleep(1)
+
+    async def run(self, evm_kps, substrate_kps, report_period=20):
+        rpc = AsyncSubstrateRpc(self._substrate_url)
+        await rpc.connect()
+        aw3 = AsyncWeb3(AsyncHTTPProvider(self._evm_url))
+
+        workers = []
+        for kp in evm_kps:
+            workers += [
+                self._account_worker(lambda kp: self._send_evm(aw3, kp), kp)
+                for i in range(self._in_flight)]
+        for kp in substrate_kps:
+            workers += [
+                self._account_worker(lambda kp: self._send_substrate(rpc, kp), kp)
+                for i in range(self._in_flight)]
+        # Accounts start in random order, so the ramp-up mixes both kinds
+        random.shuffle(workers)
+
+        tracker = asyncio.create_task(self._track_finalization(rpc))
+        reporter = asyncio.create_task(self._report_periodically(report_period))
+        try:
+            await asyncio.gather(*workers)
+            await self._wait_finalization(FINALIZATION_TIMEOUT)
+        finally:
+            reporter.cancel()
+            tracker.cancel()
+            await rpc.close()
+            self._signers.shutdown()
+            self._recorder.close()
+        self._recorder.report()
+        return self._recorder
+
+
+def run_async_load(substrate_url, evm_url, accounts, evm_ratio, tokens,
+                   target_tps, ramp_up, in_flight, duration, report_path):
+    evm_num = round(accounts * evm_ratio)
+    evm_kps = get_stress_evm_keypairs(evm_num)
+    substrate_kps = get_stress_substrate_keypairs(accounts - evm_num)
+
+    substrate = SubstrateInterface(url=substrate_url)
+    fund_stress_accounts(
+        substrate,
+        [calculate_evm_account(kp.ss58_address) for kp in evm_kps] + [kp.ss58_address for kp in substrate_kps],
+        tokens)
+
+    generator = AsyncLoadGenerator(substrate_url, evm_url, target_tps, ramp_up, in_flight, duration, report_path)
+    return asyncio.run(generator.run(evm_kps, substrate_kps))
@@ -0,0 +1,178 @@
+import csv
+import json
+import math
+import time
+
+
+# Stages are measured from the submit time of the transaction
+LATENCY_STAGES = ['pool_accept', 'inclusion', 'finalization']
+REPORT_PERCENTILES = [50, 90, 95, 99, 99.9]
+CSV_FIELDS = [
+    'tx_id', 'kind', 'submit_time', 'pool_accept_time', 'inclusion_time', 'inclusion_block',
+    'finalization_time', 'finalization_block', 'error',
+]
+
+
+class LatencyHistogram():
+    """
+    HDR-style histogram, values are kept in microseconds and bucketed with
+    a fixed number of significant digits, so the memory does not grow with the
+    number of samples and every percentile is within the bucket precision.
+    """
+
+    def __init__(self, significant_digits=2):
+        self._significant_digits = significant_digits
+        self._counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _get_bucket(self, value):
+        magnitude = max(0, len(str(value)) - self._significant_digits)
+        return (magnitude, value // 10 ** magnitude)
+
+    def record(self, seconds):
+        value = max(0, round(seconds * 1000000))
+        bucket = self._get_bucket(value)
+        self._counts[bucket] = self._counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, pct):
+        """Returns the highest value of the bucket which holds the percentile, in seconds"""
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(self.count * pct / 100))
+        seen = 0
+        for magnitude, mantissa in sorted(self._counts):
+            seen += self._counts[(magnitude, mantissa)]
+            if seen >= rank:
+                return min(self.max, (mantissa + 1) * 10 ** magnitude - 1) / 1000000
+        return self.max / 1000000
+
+    def to_dict(self):
+        if not self.count:
+            return {'count': 0}
+        out = {
+            'count': self.count,
+            'min': self.min / 1000000,
+            'max': self.max / 1000000,
+            'mean': self.total / self.count / 1000000,
+        }
+        for pct in REPORT_PERCENTILES:
+            out[f'p{pct}'] = self.percentile(pct)
+        return out
+
+
+class TxLatencyRecorder():
+    """
+    Records the submit, pool-accept, inclusion and finalization of every transaction
+    and keeps one histogram per kind and stage.
+    Finalization is reported per block, all included transactions up to that block are finalized.
+    A transaction is appended to {path_prefix}.csv and dropped from memory once it is finalized or failed,
+    so only the transactions in flight are kept.
+    """
+
+    def __init__(self, path_prefix):
+        self.start = time.time()
+        self._path_prefix = path_prefix
+        self._records = {}
+        self._wait_finalization = {}
+        self._histograms = {}
+        self._failed = {}
+        self._sent = 0
+        self._kinds = set()
+        self._csv_file = open(f'{path_prefix}.csv', 'w', newline='')
+        self._csv_writer = csv.DictWriter(self._csv_file, fieldnames=CSV_FIELDS)
+        self._csv_writer.writeheader()
+
+    def _record_stage(self, tx_id, stage, now):
+        record = self._records[tx_id]
+        record[f'{stage}_time'] = now
+        for kind in [record['kind'], 'all']:
+            if (kind, stage) not in self._histograms:
+                self._histograms[(kind, stage)] = LatencyHistogram()
+            self._histograms[(kind, stage)].record(now - record['submit_time'])
+
+    def _complete(self, tx_id):
+        self._csv_writer.writerow(self._records.pop(tx_id))
+
+    def submitted(self, tx_id, kind):
+        self._records[tx_id] = {'tx_id': tx_id, 'kind': kind, 'submit_time': time.time()}
+        self._sent += 1
+        self._kinds.add(kind)
+
+    def accepted(self, tx_id):
+        self._record_stage(tx_id, 'pool_accept', time.time())
+
+    def included(self, tx_id, block_num):
+        self._record_stage(tx_id, 'inclusion', time.time())
+        self._records[tx_id]['inclusion_block'] = block_num
+        self._wait_finalization.setdefault(block_num, []).append(tx_id)
+
+    def failed(self, tx_id, error, kind=None):
+        """kind is only needed when the transaction failed before it was submitted"""
+        if tx_id not in self._records:
+            self.submitted(tx_id, kind)
+        record = self._records[tx_id]
+        record['error'] = str(error)
+        self._failed[record['kind']] = self._failed.get(record['kind'], 0) + 1
+        self._complete(tx_id)
+
+    def finalized(self, block_num):
+        now = time.time()
+        for included_block in [num for num in self._wait_finalization if num <= block_num]:
+            for tx_id in self._wait_finalization.pop(included_block):
+                self._record_stage(tx_id, 'finalization', now)
+                self._records[tx_id]['finalization_block'] = block_num
+                self._complete(tx_id)
+
+    def get_pending_finalization_num(self):
+        return sum(len(tx_ids) for tx_ids in self._wait_finalization.values())
+
+    def get_histogram(self, kind, stage):
+        return self._histograms.get((kind, stage), LatencyHistogram())
+
+    def summary(self):
+        elapsed = time.time() - self.start
+        kinds = sorted(self._kinds) + ['all']
+        return {
+            'elapsed': elapsed,
+            'sent': self._sent,
+            'failed': dict(self._failed),
+            'included_tps': self.get_histogram('all', 'inclusion').count / elapsed,
+            'latency': {
+                kind: {stage: self.get_histogram(kind, stage).to_dict() for stage in LATENCY_STAGES}
+                for kind in kinds
+            },
+        }
+
+    def report(self):
+        summary = self.summary()
+        print(f'elapsed: {summary["elapsed"]:.1f}s, sent: {summary["sent"]}, failed: {summary["failed"]}, '
+              f'included TPS: {summary["included_tps"]:.2f}')
+        for kind, stages in summary['latency'].items():
+            for stage in LATENCY_STAGES:
+                hist = stages[stage]
+                if not hist['count']:
+                    continue
+                print(f'  {kind:<10} {stage:<13} count: {hist["count"]}, p50: {hist["p50"]:.3f}s, '
+                      f'p95: {hist["p95"]:.3f}s, p99: {hist["p99"]:.3f}s, max: {hist["max"]:.3f}s')
+
+    def dump(self):
+        """Writes the summary to {path_prefix}.json, the completed transactions are already in {path_prefix}.csv"""
+        with open(f'{self._path_prefix}.json', 'w') as f:
+            json.dump(self.summary(), f, indent=4)
+        self._csv_file.flush()
+
+    def close(self):
+        """Writes the summary and the transactions still in flight"""
+        for tx_id in list(self._records):
+            self._complete(tx_id)
+        self._wait_finalization = {}
+        self.dump()
+        self._csv_file.close()
+        print(f'Latency report is written to {self._path_prefix}.json and {self._path_prefix}.csv')
@@ -11,6 +11,11 @@ from peaq.utils import ExtrinsicBatch
 from tools.peaq_eth_utils import generate_random_hex
 from peaq.did import did_add_payload
 from tools.peaq_eth_utils import get_eth_chain_id
+from tools.peaq_eth_utils import send_evm_transaction, wait_w3_receipts
+from tools.nonce_manager import get_evm_nonce_manager, get_substrate_nonce_manager
+from tools.utils import execute_batch_without_wait, wait_for_extrinsics
+from tools.stress.async_load import run_async_load
+from tools.stress.latency_recorder import TxLatencyRecorder
 import multiprocessing
 import time
 import argparse
@@ -49,35 +54,47 @@ def fund_evm(substrate_url, tokens, client):
         raise Exception("EVM fund failed")
 
 
-def stress_evm_one_account(substrate_url, evm_url, mnomenic):
+def stress_evm_one_account(substrate_url, evm_url, mnomenic, pipeline, report_path):
     with SubstrateInterface(substrate_url) as substrate:
         eth_chain_id = get_eth_chain_id(substrate)
 
     eth_key = get_eth_info(mnomenic)
     w3 = Web3(Web3.HTTPProvider(evm_url))
     contract = get_contract(w3, DID_ADDRESS, ABI_FILE)
+    nonce_manager = get_evm_nonce_manager(w3)
+    recorder = TxLatencyRecorder(f"{report_path}-evm-{eth_key['kp'].ss58_address}")
     fail_count = 0
-    for i in range(10000000):
-        nonce = w3.eth.get_transaction_count(eth_key['kp'].ss58_address)
-        key = generate_random_hex(20)
-        value = generate_random_hex(20)
-        tx = contract.functions.addAttribute(eth_key['kp'].ss58_address, key, value, 100000).build_transaction({
-            'from': eth_key['kp'].ss58_address,
-            'nonce': nonce,
-            'chainId': eth_chain_id})
-
-        signed_txn = w3.eth.account.sign_transaction(tx, private_key=eth_key['kp'].private_key)
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.rawTransaction)
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-        if receipt['status'] != 1:
-            fail_count += 1
-        if i % 20 == 0:
-            print(f"EVM did_add success: {eth_key['kp'].ss58_address} already send {i} tx, failed {fail_count}")
+    for i in range(0, 10000000, pipeline):
+        # Send the whole pipeline back-to-back, then wait for the receipts
+        tx_hashes = []
+        for j in range(pipeline):
+            key = generate_random_hex(20)
+            value = generate_random_hex(20)
+            tx = contract.functions.addAttribute(eth_key['kp'].ss58_address, key, value, 100000).build_transaction({
+                'from': eth_key['kp'].ss58_address,
+                'nonce': 0,
+                'chainId': eth_chain_id})
+            recorder.submitted(i + j, 'evm')
+            tx_hashes.append(send_evm_transaction(tx, w3, eth_key['kp'], nonce_manager))
+            recorder.accepted(i + j)
+
+        for j, receipt in enumerate(wait_w3_receipts(w3, tx_hashes)):
+            if receipt['status'] != 1:
+                fail_count += 1
+                recorder.failed(i + j, 'reverted')
+            else:
+                recorder.included(i + j, receipt['blockNumber'])
+        recorder.finalized(w3.eth.get_block('finalized')['number'])
+        if i % 20 < pipeline:
+            print(f"EVM did_add success: {eth_key['kp'].ss58_address} already send {i + pipeline} tx, failed {fail_count}")
+            recorder.report()
+            recorder.dump()
         time.sleep(WAIT_PERIOD)
+    recorder.close()
 
 
-def stress_evm(substrate_url, evm_url, client):
-    args = [(substrate_url, evm_url, EVM_MNOMENICS[i]) for i in range(client)]
+def stress_evm(substrate_url, evm_url, client, pipeline, report_path):
+    args = [(substrate_url, evm_url, EVM_MNOMENICS[i], pipeline, report_path) for i in range(client)]
     with multiprocessing.Pool(client) as p:
         print('start the substrate stress test')
         p.starmap(stress_evm_one_account, args)
@@ -94,26 +111,43 @@ def fund_substrate(substrate_url, tokens, client):
         raise Exception("Substrate fund failed")
 
 
-def stress_substrate_one_account(substrate_url, kp_src):
+def stress_substrate_one_account(substrate_url, kp_src, pipeline, report_path):
     substrate = SubstrateInterface(substrate_url)
+    nonce_manager = get_substrate_nonce_manager(substrate)
+    recorder = TxLatencyRecorder(f'{report_path}-substrate-{kp_src.ss58_address}')
     fail_acount = 0
-    for i in range(10000000):
-        key = generate_random_hex(20)
-        value = generate_random_hex(20)
-        batch = ExtrinsicBatch(substrate, kp_src)
-        did_add_payload(batch, kp_src.ss58_address, key, value)
-        receipt = batch.execute_n_clear()
-        if not receipt.is_success:
-            fail_acount += 1
-            print(f"Substrate did_add failed: {receipt.extrinsic_hash}")
-        if i % 10 == 0:
-            print(f"Substrate did_add success: {kp_src.ss58_address} already send {i} tx, failed {fail_acount}")
+    for i in range(0, 10000000, pipeline):
+        # Submit the whole pipeline back-to-back, then wait for the inclusion
+        block_idx_prev = substrate.get_block_number(None)
+        extrinsic_hashes = []
+        for j in range(pipeline):
+            key = generate_random_hex(20)
+            value = generate_random_hex(20)
+            batch = ExtrinsicBatch(substrate, kp_src)
+            did_add_payload(batch, kp_src.ss58_address, key, value)
+            recorder.submitted(i + j, 'substrate')
+            extrinsic_hashes.append(execute_batch_without_wait(batch, nonce_manager))
+            recorder.accepted(i + j)
+
+        for j, receipt in enumerate(wait_for_extrinsics(substrate, extrinsic_hashes, block_idx_prev)):
+            if not receipt.is_success:
+                fail_acount += 1
+                print(f"Substrate did_add failed: {receipt.extrinsic_hash}")
+                recorder.failed(i + j, receipt.error_message)
+            else:
+                recorder.included(i + j, receipt.block_number)
+        recorder.finalized(substrate.get_block_number(substrate.get_chain_finalised_head()))
+        if i % 10 < pipeline:
+            print(f"Substrate did_add success: {kp_src.ss58_address} already send {i + pipeline} tx, failed {fail_acount}")
+            recorder.report()
+            recorder.dump()
         time.sleep(WAIT_PERIOD)
+    recorder.close()
 
 
-def stress_substrate(substrate_url, client):
+def stress_substrate(substrate_url, client, pipeline, report_path):
     kp_srcs = [Keypair.create_from_mnemonic(SUBSTRATE_MOMENNTS[i]) for i in range(client)]
-    args = [(substrate_url, kp_src) for kp_src in kp_srcs]
+    args = [(substrate_url, kp_src, pipeline, report_path) for kp_src in kp_srcs]
     with multiprocessing.Pool(client) as p:
         print('start the substrate stress test')
         p.starmap(stress_substrate_one_account, args)
@@ -127,29 +161,65 @@ python3 {__file__} \\
     --substrate wss://docker-test.peaq.network \\
     --evm https://docker-test.peaq.network \\
     --fund 20000 \\
-    --client 3
+    --client 3 \\
+    --pipeline 10
+
+Or keep many transactions in flight from a single process
+python3 {__file__} \\
+    --substrate wss://docker-test.peaq.network \\
+    --evm https://docker-test.peaq.network \\
+    --mode async \\
+    --accounts 200 \\
+    --in-flight 4 \\
+    --tps 300 \\
+    --ramp-up 60 \\
+    --duration 600
     ''', formatter_class=argparse.RawTextHelpFormatter)
     parser.add_argument('-s', '--substrate', type=str, required=True, help='Your runtime websocket endpoint')
     parser.add_argument('-e', '--evm', type=str, required=True, help='Your evm endpoint')
     parser.add_argument('-f', '--fund', type=int, default=10000, help='Fund amount (in unit of 10^18)')
     parser.add_argument('-c', '--client', type=int, default=5, help='Number of client')
+    parser.add_argument('-p', '--pipeline', type=int, default=1, help='Number of tx sent back-to-back per account before waiting')
+    parser.add_argument('-m', '--mode', type=str, default='process', choices=['process', 'async'],
+                        help='process: one process per client, async: one asyncio process for all accounts')
+    parser.add_argument('--accounts', type=int, default=100, help='[async] Number of accounts')
+    parser.add_argument('--in-flight', type=int, default=4, help='[async] Number of in-flight tx per account')
+    parser.add_argument('--tps', type=float, default=100, help='[async] Target tx per second')
+    parser.add_argument('--ramp-up', type=float, default=30, help='[async] Seconds to reach the target tps')
+    parser.add_argument('--evm-ratio', type=float, default=0.5, help='[async] Ratio of the accounts sending evm tx')
+    parser.add_argument('--duration', type=float, default=600, help='[async] Seconds to send tx')
+    parser.add_argument('-r', '--report', type=str, default='stress_latency',
+                        help='Path prefix of the latency report, written as .json and .csv')
 
     args = parser.parse_args()
 
     substrate_url = args.substrate
     evm_url = args.evm
 
+    if args.mode == 'async':
+        if args.accounts < 1 or args.in_flight < 1 or args.tps <= 0:
+            raise Exception("Accounts, in-flight and tps should be greater than 0")
+        if not 0 <= args.evm_ratio <= 1:
+            raise Exception("EVM ratio should be between 0 and 1")
+        run_async_load(
+            substrate_url, evm_url, args.accounts, args.evm_ratio, args.fund * 10 ** 18,
+            args.tps, args.ramp_up, args.in_flight, args.duration, args.report)
+        sys.exit(0)
+
     if args.client > min(len(EVM_MNOMENICS), len(SUBSTRATE_MOMENNTS)):
         raise Exception(f"Client number should be less than {len(EVM_MNOMENICS)} or {len(SUBSTRATE_MOMENNTS)}")
 
     if args.client < 1:
         raise Exception("Client number should be greater than 0")
 
+    if args.pipeline < 1:
+        raise Exception("Pipeline number should be greater than 0")
+
     fund_evm(substrate_url, args.fund * 10 ** 18, args.client)
-    process1 = multiprocessing.Process(target=stress_evm, args=(substrate_url, evm_url, args.client))
+    process1 = multiprocessing.Process(target=stress_evm, args=(substrate_url, evm_url, args.client, args.pipeline, args.report))
     # send substrate
     fund_substrate(substrate_url, args.fund * 10 ** 18, args.client)
-    process2 = multiprocessing.Process(target=stress_substrate, args=(substrate_url, args.client))
+    process2 = multiprocessing.Process(target=stress_substrate, args=(substrate_url, args.client, args.pipeline, args.report))
     process1.start()
     process2.start()
 
@@ -7,6 +7,10 @@ from peaq.utils import get_block_hash
 from peaq.utils import get_account_balance
 from tools.utils import PARACHAIN_STAKING_POT
 from tools.utils import get_existential_deposit
+from tools.block_range_scanner import scan_blocks, scan_block_batches, SCANNER_WORKER_NUM
+from tools.rpc_batch import get_block_events_batch, get_block_hashes_batch, get_events_batch
+from tools.storage_series import get_account_balance_series
+from tools.block_archive_cache import enable_block_archive_cache
 from decimal import Decimal
 import argparse
 # from collections import Counter
@@ -14,6 +18,8 @@ import pprint
 pp = pprint.PrettyPrinter(indent=4)
 
 DEBUG = False
+# Number of connections the blocks of a range are fetched with
+SCAN_WORKER_NUM = SCANNER_WORKER_NUM
 
 COLLATOR_POT = '5EYCAe5cKPAoFh2HnQQvpKqRYZGqBpaA87u4Zzw89qPE58is'
 PERCISION_ERROR = 0.000001
@@ -52,29 +58,34 @@ def get_pervious_session_block(substrate, test_session_num):
     return out
 
 
+def get_author_and_collator_blocks(session_idx):
+    def fetch(substrate, block_height):
+        block_hash = get_block_hash(substrate, block_height)
+        author = substrate.get_block(block_hash, include_author=True)['author']
+        result = substrate.query(
+            module='ParachainStaking',
+            storage_function='CollatorBlocks',
+            params=[session_idx, author],
+            block_hash=block_hash,
+        )
+        return author, result
+    return fetch
+
+
 def traverse_single_blocks_and_check(substrate, session_height, round_length, session_idx):
     print(f'Check session block: {session_height}, session idx: {session_idx}, round length: {round_length}')
 
     check_data = {}
     end_block_height = session_height + round_length
     # We don't check the latest block because we also distirbute the rewrd at the new session block
-    for i in range(session_height + 1, end_block_height):
-        # print(f'get author in block height: {i}, session idx: {session_idx}')
-        block_hash = get_block_hash(substrate, i)
-        block_info = substrate.get_block(block_hash, include_author=True)
-        # print(f'block author: {block_info["author"]}')
-        # print(f'CollatorBlock: {result}')
-        check_data[block_info['author']] = check_data.get(block_info["author"], 0) + 1
-        result = substrate.query(
-            module='ParachainStaking',
-            storage_function='CollatorBlocks',
-            params=[session_idx, block_info['author']],
-            block_hash=block_hash,
-        )
+    for i, (author, result) in scan_blocks(
+            substrate, session_height + 1, end_block_height,
+            get_author_and_collator_blocks(session_idx), SCAN_WORKER_NUM):
+        check_data[author] = check_data.get(author, 0) + 1
         if i % 100 == 0:
-            print(f'during block: {i}, author: {block_info["author"]}, checked')
-        if result != check_data[block_info["author"]]:
-            raise IOError(f'    error: {block_info["author"]}: CollatorBlock: {result} v.s. {check_data.get(block_info["author"], 0)}')
+            print(f'during block: {i}, author: {author}, checked')
+        if result != check_data[author]:
+            raise IOError(f'    error: {author}: CollatorBlock: {result} v.s. {check_data.get(author, 0)}')
     print(f'End block: {end_block_height}, session: {session_idx}, contributed collators length: {len(check_data.keys())}')
 
 
@@ -139,22 +150,27 @@ def get_all_distribution_to_collator_delegator_in_block(substrate, block_hash):
     return distribution
 
 
-def calculate_pot_balance(substrate, block_height):
-    prev_block_hash = get_block_hash(substrate, block_height - 1)
-
-    prev_block_pot_balance = get_account_balance(substrate, PARACHAIN_STAKING_POT, prev_block_hash)
-    now_block_hash = get_block_hash(substrate, block_height)
-    now_block_pot_balance = get_account_balance(substrate, PARACHAIN_STAKING_POT, now_block_hash)
+def calculate_pot_balance(block_height, pot_balances, distribution):
+    prev_block_pot_balance = pot_balances[block_height - 1]
+    now_block_pot_balance = pot_balances[block_height]
     print(f'block: {block_height}, pot balance: {now_block_pot_balance/10**18}, prev pot balance: {prev_block_pot_balance/10**18}')
-    distribution = get_all_distribution_to_collator_delegator_in_block(substrate, now_block_hash)
     return Decimal(now_block_pot_balance) - Decimal(prev_block_pot_balance) + Decimal(distribution)
 
 
+def get_block_reward_and_distribution(substrate, block_height):
+    distribution = get_all_distribution_to_collator_delegator_in_block(substrate, get_block_hash(substrate, block_height))
+    return calculate_block_reward(substrate, block_height), distribution
+
+
 def block_check(substrate, test_num):
     now_block_height = substrate.get_block_number(None)
-    for block_height in range(now_block_height - test_num, now_block_height):
-        cal_block_reward = calculate_block_reward(substrate, block_height)
-        pot_balance = calculate_pot_balance(substrate, block_height)
+    # The pot balance of the whole range is fetched with a few requests instead of two per block
+    pot_balances = get_account_balance_series(
+        substrate, PARACHAIN_STAKING_POT, now_block_height - test_num - 1, now_block_height - 1)
+    for block_height, (cal_block_reward, distribution) in scan_blocks(
+            substrate, now_block_height - test_num, now_block_height,
+            get_block_reward_and_distribution, SCAN_WORKER_NUM):
+        pot_balance = calculate_pot_balance(block_height, pot_balances, distribution)
         print(f'block: {block_height}, reward: {cal_block_reward/10**18}, pot balance: {pot_balance/10**18}')
         print(f'error: {(cal_block_reward - pot_balance) / 10**18}')
         if (cal_block_reward - pot_balance) > Decimal(PERCISION_ERROR) * cal_block_reward:
@@ -304,9 +320,13 @@ def get_all_transaction_fee_in_block(substrate, block_hash):
 
 
 def get_all_deposits_to_pot(substrate, block_hash):
+    return get_deposits_to_pot_in_events(substrate.get_events(block_hash=block_hash), block_hash)
+
+
+def get_deposits_to_pot_in_events(events, block_hash):
     deposit = 0
     block_reward = True
-    for event in substrate.get_events(block_hash=block_hash):
+    for event in events:
         if event.value['module_id'] != 'Balances' or event.value['event_id'] != 'Deposit':
             continue
         if event.value['event']['attributes']['who'] != COLLATOR_POT:
@@ -321,17 +341,24 @@ def get_all_deposits_to_pot(substrate, block_hash):
     return deposit
 
 
+def get_block_deposits_to_pot_batch(substrate, block_idxs):
+    block_hashes = get_block_hashes_batch(substrate, block_idxs)
+    return [
+        get_deposits_to_pot_in_events(events, block_hash)
+        for block_hash, events in zip(block_hashes, get_events_batch(substrate, block_hashes))]
+
+
 def get_total_session_rewards(substrate, session_height, round_length):
     # Now we are using the event in block to get the block + transaction reward
     # [TODO] However, we should check EVM/Blockreward/Substrate fee's stress tool
 
     deposit = Decimal(0)
     # We don include the latest block because we also distribute the reward at the new session block
-    for block_idx in range(session_height, session_height + round_length):
+    for block_idx, this_deposit in scan_block_batches(
+            substrate, session_height, session_height + round_length,
+            get_block_deposits_to_pot_batch, worker_num=SCAN_WORKER_NUM):
         if block_idx % 100 == 0:
             print(f'get tx fee in block: {block_idx}')
-        block_hash = get_block_hash(substrate, block_idx)
-        this_deposit = get_all_deposits_to_pot(substrate, block_hash)
         deposit += this_deposit
         if DEBUG:
             print(f'block: {block_idx}, tx fee: {this_deposit / 10 ** 18}')
@@ -355,10 +382,11 @@ def get_pot_balance(substrate, session_height, round_length):
 def get_reward_info(substrate, payout_session_height, round_length):
     all_reward_info = {}
     collator_addr = None
-    for block_idx in range(payout_session_height, payout_session_height + round_length):
+    for block_idx, events in scan_block_batches(
+            substrate, payout_session_height, payout_session_height + round_length,
+            get_block_events_batch, worker_num=SCAN_WORKER_NUM):
         reward_info = {}
-        block_hash = get_block_hash(substrate, block_idx)
-        for event in substrate.get_events(block_hash):
+        for event in events:
             if event.value['module_id'] != 'ParachainStaking' or \
                event.value['event_id'] != 'Rewarded':
                 continue
@@ -456,6 +484,8 @@ if __name__ == '__main__':
     parser.add_argument('-r', '--runtime', type=str, required=True, help='Your runtime websocket endpoint')
     parser.add_argument('-s', '--session', type=int, required=False, help='session block blockheight, needed on traverse mode and distribution')
     parser.add_argument('--test-session-num', type=int, required=False, default=10, help='test session number')
+    parser.add_argument('-w', '--worker', type=int, default=SCANNER_WORKER_NUM, help='Number of connections to fetch blocks with')
+    parser.add_argument('--cache', type=str, required=False, help='SQLite file to cache the finalized blocks in')
     parser.add_argument(
         '-t', '--type', choices=['traverse', 'collator', 'distribution', 'block'], required=True,
         help='Specify the type, '
@@ -469,7 +499,10 @@ if __name__ == '__main__':
     substrate = SubstrateInterface(
         url=args.runtime,
     )
+    if args.cache:
+        enable_block_archive_cache(substrate, args.cache)
     test_session_num = args.test_session_num
+    SCAN_WORKER_NUM = args.worker
 
     if args.type == 'traverse':
         travese_blocks_and_check(substrate, test_session_num)
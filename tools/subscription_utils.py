@@ -0,0 +1,56 @@
+import time
+from websocket import WebSocketTimeoutException
+
+
+# Seconds between two head polls of a connection without websocket
+HEAD_POLL_PERIOD = 1
+
+
+def _poll_new_heads(substrate, handler, timeout):
+    """Same as wait_for_new_heads over HTTP, where the head is polled instead of subscribed to"""
+    deadline = time.time() + timeout
+    prev_block = None
+    while True:
+        block_num = substrate.get_block_number(None)
+        if block_num != prev_block:
+            out = handler(block_num)
+            if out is not None:
+                return out
+            prev_block = block_num
+        if time.time() >= deadline:
+            return None
+        time.sleep(HEAD_POLL_PERIOD)
+
+
+def wait_for_new_heads(substrate, handler, timeout):
+    """
+    Subscribes to new best heads and calls handler(block_num) for every head the node announces,
+    the first call happens right away with the current head.
+    Returns the first value returned by handler which is not None, or None after timeout seconds.
+    """
+    if not substrate.websocket:
+        return _poll_new_heads(substrate, handler, timeout)
+
+    deadline = time.time() + timeout
+    subscription = {}
+
+    def result_handler(message, update_nr, subscription_id):
+        subscription['id'] = subscription_id
+        block_num = int(message['params']['result']['number'], 16)
+        out = handler(block_num)
+        if out is None and time.time() < deadline:
+            return None
+        substrate.rpc_request('chain_unsubscribeNewHeads', [subscription_id])
+        return {'result': out}
+
+    prev_timeout = substrate.websocket.gettimeout()
+    substrate.websocket.settimeout(timeout)
+    try:
+        return substrate.rpc_request('chain_subscribeNewHeads', [], result_handler=result_handler)['result']
+    except WebSocketTimeoutException:
+        print(f'No new head from {substrate.url} within {timeout} seconds')
+        if 'id' in subscription:
+            substrate.rpc_request('chain_unsubscribeNewHeads', [subscription['id']])
+        return None
+    finally:
+        substrate.websocket.settimeout(prev_timeout)
@@ -2,18 +2,115 @@ import sys
 sys.path.append('./')
 
 from substrateinterface import SubstrateInterface, Keypair
+from tools.block_archive_cache import enable_block_archive_cache
+from tools.block_range_scanner import scan_blocks, SCANNER_WORKER_NUM
+import sqlite3
 import argparse
 
 
+# Indexed blocks are committed in batches of this size, an interrupted scan resumes from the last batch
+INDEX_COMMIT_BLOCK_NUM = 1000
+
+INDEX_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS indexed_block (number INTEGER PRIMARY KEY)',
+    'CREATE TABLE IF NOT EXISTS extrinsic ('
+    '    address TEXT NOT NULL, block INTEGER NOT NULL, idx INTEGER NOT NULL,'
+    '    call_module TEXT, call_function TEXT, PRIMARY KEY (block, idx))',
+    'CREATE INDEX IF NOT EXISTS extrinsic_address ON extrinsic (address, block DESC, idx DESC)',
+]
+
+
+def get_signed_extrinsics(substrate, block_num):
+    """Returns [(signer, extrinsic index, call module, call function)] of the block"""
+    block = substrate.get_block(substrate.get_block_hash(block_num))
+    out = []
+    for idx, extrinsic in enumerate(block['extrinsics']):
+        if 'address' not in extrinsic:
+            continue
+        call = extrinsic.value['call']
+        out.append((extrinsic['address'].value, idx, call['call_module'], call['call_function']))
+    return out
+
+
+def open_index(path):
+    conn = sqlite3.connect(path)
+    for statement in INDEX_SCHEMA:
+        conn.execute(statement)
+    return conn
+
+
+def build_index(substrate, conn, start, end, worker_num=SCANNER_WORKER_NUM):
+    """Indexes the signed extrinsics of the blocks in [start, end], the blocks indexed before are skipped"""
+    indexed = {row[0] for row in conn.execute(
+        'SELECT number FROM indexed_block WHERE number BETWEEN ? AND ?', (start, end))}
+    todo = [block_num for block_num in range(start, end + 1) if block_num not in indexed]
+    print(f'Index {len(todo)} blocks in [{start}, {end}], {len(indexed)} are already indexed')
+    if not todo:
+        return
+
+    def fetch(substrate, i):
+        return get_signed_extrinsics(substrate, todo[i])
+
+    for i, extrinsics in scan_blocks(substrate, 0, len(todo), fetch, worker_num):
+        conn.executemany(
+            'INSERT OR REPLACE INTO extrinsic (address, block, idx, call_module, call_function) VALUES (?, ?, ?, ?, ?)',
+            [(address, todo[i], idx, call_module, call_function) for address, idx, call_module, call_function in extrinsics])
+        conn.execute('INSERT OR IGNORE INTO indexed_block (number) VALUES (?)', (todo[i],))
+        if (i + 1) % INDEX_COMMIT_BLOCK_NUM == 0:
+            conn.commit()
+            print(f'Indexed {i + 1}/{len(todo)} blocks, block_num: {todo[i]}')
+    conn.commit()
+
+
+def get_last_extrinsics(conn, address, number, end):
+    """Returns the last number [(block, extrinsic index, call module, call function)] signed by address until end"""
+    return conn.execute(
+        'SELECT block, idx, call_module, call_function FROM extrinsic '
+        'WHERE address = ? AND block <= ? ORDER BY block DESC, idx DESC LIMIT ?',
+        (address, end, number)).fetchall()
+
+
+def get_unfinalized_extrinsics(substrate, address, start, end, worker_num=SCANNER_WORKER_NUM):
+    """Same rows as get_last_extrinsics for the blocks in [start, end], read from the node because they can be reorged"""
+    out = []
+    for block_num, extrinsics in scan_blocks(substrate, start, end + 1, get_signed_extrinsics, worker_num):
+        out += [(block_num, idx, call_module, call_function)
+                for signer, idx, call_module, call_function in extrinsics if signer == address]
+    return sorted(out, reverse=True)
+
+
+def trace_by_index(substrate, args, key, latest_block_num):
+    # Only finalized blocks are written to the index, a reorged block would stay in it with the wrong extrinsics
+    finalized_block_num = min(substrate.get_block_number(substrate.get_chain_finalised_head()), latest_block_num)
+    conn = open_index(args.index)
+    build_index(substrate, conn, args.start, finalized_block_num, args.worker)
+    extrinsics = get_unfinalized_extrinsics(
+        substrate, key.ss58_address, max(finalized_block_num + 1, args.start), latest_block_num, args.worker)
+    extrinsics = (extrinsics + get_last_extrinsics(conn, key.ss58_address, args.number, finalized_block_num))[:args.number]
+    for block_num, idx, call_module, call_function in extrinsics:
+        print(f'block_num: {block_num}, extrinsic: {block_num}-{idx}, call: {call_module}.{call_function}')
+    print(f'Found {len(extrinsics)}/{args.number} extrinsics in [{args.start}, {latest_block_num}]')
+    conn.close()
+
+
 def main():
     parser = argparse.ArgumentParser(description='Trace the extrinsic from some users')
     parser.add_argument('--block', type=int, required=False, help='block number you want to trace')
     parser.add_argument('--number', type=int, required=True, help='number of the extrinsic you want to trace')
     parser.add_argument('--url', type=str, required=True, help='websocket URL')
     parser.add_argument('--user', type=str, required=True, help='Users\' ss58 address')
+    parser.add_argument('--cache', type=str, required=False, help='SQLite file to cache the finalized blocks in')
+    parser.add_argument(
+        '--index', type=str, required=False,
+        help='SQLite file of the signer index, the finalized blocks from --start to --block are indexed once '
+             'and the trace is answered from it')
+    parser.add_argument('--start', type=int, default=1, help='First block to index')
+    parser.add_argument('-w', '--worker', type=int, default=SCANNER_WORKER_NUM, help='Number of connections to index blocks with')
 
     args = parser.parse_args()
     substrate = SubstrateInterface(url=args.url)
+    if args.cache:
+        enable_block_archive_cache(substrate, args.cache)
     key = Keypair(ss58_address=args.user)
 
     # Get the latest block number
@@ -22,6 +119,10 @@ def main():
     else:
         latest_block_num = substrate.get_block_number(None)
 
+    if args.index:
+        trace_by_index(substrate, args, key, latest_block_num)
+        return
+
     for block_num in range(latest_block_num, 0, -1):
         print(f'block_num: {block_num}')
         block_hash = substrate.get_block_hash(block_num)
@@ -12,6 +12,11 @@ from peaq.utils import get_account_balance, show_extrinsic
 from peaq.sudo_extrinsic import fund
 from peaq.eth import calculate_evm_addr
 from peaq.utils import calculate_multi_sig
+from tools.event_index import get_event_index
+from tools.subscription_utils import wait_for_new_heads
+from tools.nonce_manager import is_nonce_error, NONCE_RETRY_TIMES
+from substrateinterface.base import ExtrinsicReceipt
+from substrateinterface.exceptions import SubstrateRequestException
 
 # Monkey patch
 from scalecodec.types import FixedLengthArray
@@ -23,6 +28,8 @@ from tools.monkey.monkey_3rd_substrate_interface import monkey_submit_extrinsic
 SubstrateInterface.submit_extrinsic = monkey_submit_extrinsic
 from tools.monkey.monkey_3rd_substrate_interface import monkey_patch as monkey_3rd_substrate_patch
 monkey_3rd_substrate_patch()
+from tools.metadata_cache import monkey_patch as monkey_metadata_cache_patch
+monkey_metadata_cache_patch()
 
 from peaq.utils import ExtrinsicBatch
 from tools.monkey.monkey_reorg_batch import monkey_execute_extrinsic_batch
@@ -346,32 +353,31 @@ def exist_pallet(substrate, pallet_name):
     return substrate.get_block_metadata(decode=True).get_metadata_pallet(pallet_name)
 
 
-def _check_event_in_previous_blocks(substrate, module, event, attributes, block_idx_prev):
-    now_block = substrate.get_block_number(None)
+def _check_event_in_previous_blocks(substrate, module, event, attributes, block_idx_prev, now_block):
+    event_index = get_event_index(substrate)
+    event_index.refresh_finalized(now_block)
     for bl_idx in range(block_idx_prev, now_block + 1):
-        block_hash = substrate.get_block_hash(bl_idx)
-        events = substrate.get_events(block_hash)
+        block_hash = event_index.get_block_hash(bl_idx)
+        events = event_index.get_events(block_hash)
         for e in events:
             if _is_it_this_event(e, module, event, attributes):
                 return e.value['event']
     return None
 
 
-def _check_event_in_future_blocks(substrate, module, event, attributes, timeout):
-    stime = time.time()
-    cur_bl = None
-    nxt_bl = substrate.get_block_hash()
-    while not (time.time() - stime) > timeout:
-        if nxt_bl != cur_bl:
-            cur_bl = nxt_bl
-            events = substrate.get_events(cur_bl)
-            for e in events:
-                if _is_it_this_event(e, module, event, attributes):
-                    time.sleep(1)  # To make sure everything has been processed
-                    return e.value['event']
-        time.sleep(1)
-        nxt_bl = substrate.get_block_hash()
-    return None
+def _check_event_in_future_blocks(substrate, module, event, attributes, timeout, checked_block):
+    checked = {'block': checked_block}
+
+    def check_new_blocks(head_block):
+        # Heads can be skipped by the subscription, so check every block since the last check
+        out = _check_event_in_previous_blocks(
+            substrate, module, event, attributes, checked['block'] + 1, head_block)
+        checked['block'] = max(checked['block'], head_block)
+        if out:
+            time.sleep(1)  # To make sure everything has been processed
+        return out
+
+    return wait_for_new_heads(substrate, check_new_blocks, timeout)
 
 
 def wait_for_event(substrate, module, event, attributes={}, timeout=30, block_idx_prev=0):
@@ -384,13 +390,14 @@ def wait_for_event(substrate, module, event, attributes={}, timeout=30, block_id
     - attributes:   dict with attributes and expected values to filter
     """
 
+    now_block = substrate.get_block_number(None)
     if not block_idx_prev:
-        block_idx_prev = substrate.get_block_number(None)
+        block_idx_prev = now_block
 
-    out = _check_event_in_previous_blocks(substrate, module, event, attributes, block_idx_prev)
+    out = _check_event_in_previous_blocks(substrate, module, event, attributes, block_idx_prev, now_block)
     if out:
         return out
-    out = _check_event_in_future_blocks(substrate, module, event, attributes, timeout)
+    out = _check_event_in_future_blocks(substrate, module, event, attributes, timeout, now_block)
     return out
 
 
@@ -414,19 +421,16 @@ def _is_it_this_event(e_obj, module, event, attributes) -> bool:
 
 
 def get_event(substrate, block_hash, pallet, event_name):
-    for event in substrate.get_events(block_hash):
-        if event.value['module_id'] != pallet or \
-           event.value['event_id'] != event_name:
-            continue
-        return event['event']
-    return None
+    events = get_event_index(substrate).find_events(block_hash, pallet, event_name)
+    if not events:
+        return None
+    return events[0]['event']
 
 
 def get_all_events(substrate, block_hash, pallet, event_name):
     return [
         event['event']
-        for event in substrate.get_events(block_hash)
-        if event.value['module_id'] == pallet and event.value['event_id'] == event_name
+        for event in get_event_index(substrate).find_events(block_hash, pallet, event_name)
     ]
 
 
@@ -441,6 +445,74 @@ def batch_fund(batch, kp_or_addr, amount):
     })
 
 
+def execute_batch_without_wait(batch, nonce_manager, tip=0):
+    """
+    Submits the batch with the next local nonce of its keypair and returns the extrinsic hash
+    without waiting for the inclusion, see wait_for_extrinsics
+    """
+    substrate = batch.substrate
+    call = substrate.compose_call(
+        call_module='Utility',
+        call_function='batch_all',
+        call_params={
+            'calls': batch.batch,
+        })
+    addr = batch.keypair.ss58_address
+    for i in range(NONCE_RETRY_TIMES):
+        nonce = nonce_manager.next_nonce(addr)
+        try:
+            extrinsic = substrate.create_signed_extrinsic(
+                call=call,
+                keypair=batch.keypair,
+                era={'period': 64},
+                nonce=nonce,
+                tip=tip
+            )
+            return substrate.submit_extrinsic(extrinsic).extrinsic_hash
+        except Exception as e:
+            # The nonce is already taken, without a resync every later extrinsic would wait for the gap
+            nonce_manager.resync(addr)
+            if not isinstance(e, SubstrateRequestException) or not is_nonce_error(e):
+                raise e
+            print(f'Nonce is rejected: {e}, resync the nonce of {addr}')
+    raise IOError(f'Cannot submit batch, nonce of {addr} is still rejected')
+
+
+def wait_for_extrinsics(substrate, extrinsic_hashes, block_idx_prev, timeout=60):
+    """
+    Waits until all extrinsics are included in the blocks after block_idx_prev
+    and returns their receipts in the same order
+    """
+    pending = set(extrinsic_hashes)
+    receipts = {}
+    checked = {'block': block_idx_prev - 1}
+
+    def check_new_blocks(head_block):
+        for block_num in range(checked['block'] + 1, head_block + 1):
+            block_hash = substrate.get_block_hash(block_num)
+            for idx, extrinsic in enumerate(substrate.get_block(block_hash)['extrinsics']):
+                if not extrinsic.extrinsic_hash:
+                    continue
+                tx_hash = f'0x{extrinsic.extrinsic_hash.hex()}'
+                if tx_hash not in pending:
+                    continue
+                pending.discard(tx_hash)
+                receipts[tx_hash] = ExtrinsicReceipt(
+                    substrate=substrate,
+                    extrinsic_hash=tx_hash,
+                    block_hash=block_hash,
+                    block_number=block_num,
+                    extrinsic_idx=idx)
+        checked['block'] = max(checked['block'], head_block)
+        if pending:
+            return None
+        return receipts
+
+    if wait_for_new_heads(substrate, check_new_blocks, timeout) is None:
+        raise IOError(f'{len(pending)} extrinsics are not included after {timeout} seconds: {pending}')
+    return [receipts[tx_hash] for tx_hash in extrinsic_hashes]
+
+
 def get_existential_deposit(substrate):
     result = substrate.get_constant(
         'Balances',
@@ -474,16 +546,10 @@ def get_balance_reserve_value(substrate, account, key):
 
 
 def get_events_impl(substrate, block_hash, pallet, event_name, tx_id):
-    events = []
-    for event in substrate.get_events(block_hash):
-        if event.value['module_id'] != pallet or \
-                event.value['event_id'] != event_name:
-            continue
-        if event.value['extrinsic_idx'] != tx_id:
-            continue
-
-        events.append(event['event'])
-    return events
+    return [
+        event['event']
+        for event in get_event_index(substrate).find_events(block_hash, pallet, event_name, tx_id)
+    ]
 
 
 def get_withdraw_events(substrate, block_hash, tx_id):